@@ -5,7 +5,7 @@ a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[],
+    datas=[('src/core/map_data.bin', 'src/core'), ('src/core/map_data.json', 'src/core')],
     hiddenimports=[],
     hookspath=[],
     hooksconfig={},
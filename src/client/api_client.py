@@ -10,27 +10,93 @@
 - 기능: register_user가 서버 정보를 보내고, verify_user는 보내지 않음
 - 2025-08-09 - [수정] - v1.6.1: /get-locations API 호출 방식 변경
 - 기능: get_all_users 함수가 POST 방식으로 사용자 정보를 보내도록 수정
+- 2026-10-18 - [추가] - v3.8.0: 위치 스트림(SSE) 구독
+- 기능: stream_locations 제너레이터가 /stream-locations 이벤트를 (이벤트, 데이터)로 전달
+- 2026-10-18 - [수정] - v3.9.0: 변경분(delta) 기반 사용자 목록 동기화
+- 기능: get_all_users가 since 커서와 ETag를 보내고, 받은 변경분을 로컬 사본에 병합하여 반환
+- 2026-10-18 - [추가] - v3.15.0: 위치 일괄 전송
+- 기능: send_location_batch가 여러 사용자의 위치를 /update-locations 요청 하나로 전송 (중계 노드용)
+- 2026-10-18 - [추가] - v3.16.0: 변경 시에만 위치 전송, 그 사이에는 드문 하트비트
+- 기능: report_location이 지역/그룹 크기 변경 시에만 /update-location을, 그 외에는
+  LOCATION_HEARTBEAT_SECONDS마다 /heartbeat만 호출
+- 2026-10-18 - [수정] - v3.17.0: 압축 전송 형식으로 사용자 목록 수신
+- 기능: get_all_users가 MessagePack(설치된 경우) 또는 열 기반 JSON을 요청하고 행 목록으로 복원
+- 2026-10-18 - [수정] - v3.18.0: 서버 측 필터/정렬/개수 제한 요청
+- 기능: get_all_users가 guild, min/max_group_size, sort, limit을 서버에 전달
 
 """
+import json
+import time
+
 import requests
 
-from src.config.settings import API_BASE_URL
+from src.config.settings import API_BASE_URL, STREAM_KEEPALIVE_SECONDS, LOCATION_HEARTBEAT_SECONDS
+from src.core.wire_format import (
+    FORMAT_COLUMNAR, FORMAT_MSGPACK, available_formats, decode_location_columns, deserialize,
+)
+
+
+# --- v3.17.0 추가: 선호하는 응답 형식 (압축 해제는 requests가 Content-Encoding에 따라 처리) ---
+LOCATION_ACCEPT = ", ".join(
+    ([FORMAT_MSGPACK] if FORMAT_MSGPACK in available_formats() else [])
+    + [f"{FORMAT_COLUMNAR};q=0.9", "application/json;q=0.5"])
+
+
+def _decode_users(users):
+    """열 기반 형식이면 기존 행 목록으로 되돌립니다."""
+    return decode_location_columns(users) if isinstance(users, dict) else users
+
+
+# --- v3.9.0 추가: 변경분 병합용 로컬 사본 (username, query, cursor, etag, users) ---
+_location_cache = {'username': None, 'query': None, 'cursor': None, 'etag': None, 'users': {}}
 
 
 # --- v1.6.1 수정: username 인자 추가 및 POST 방식으로 변경 ---
-def get_all_users(username):
-    """서버로부터 위치를 공유 중인 모든 사용자 목록을 받아옵니다."""
+def get_all_users(username, guild=None, min_group_size=None, max_group_size=None, sort=None,
+                  limit=None):
+    """
+    서버로부터 위치를 공유 중인 모든 사용자 목록을 받아옵니다.
+    v3.9.0부터 마지막 커서 이후의 변경분만 받아 로컬 사본에 병합하며,
+    서버가 304(변경 없음)를 보내면 로컬 사본을 그대로 반환합니다.
+    v3.18.0부터 필터(guild, min/max_group_size), 정렬(sort: 'distance', 'group_size',
+    'recency'), 개수(limit)를 서버에서 적용하며, sort가 있으면 그 순서대로 반환합니다.
+    """
+    query = {name: value for name, value in (
+        ('guild', guild), ('min_group_size', min_group_size),
+        ('max_group_size', max_group_size), ('sort', sort), ('limit', limit),
+    ) if value is not None}
+    cache = _location_cache
+    if cache['username'] != username or cache['query'] != query:
+        cache.update(username=username, query=query, cursor=None, etag=None, users={})
     url = f"{API_BASE_URL}/get-locations"
-    payload = {'username': username}
+    payload = {'username': username, 'since': cache['cursor'], **query}
+    headers = {'Accept': LOCATION_ACCEPT}
+    if cache['etag']:
+        headers['If-None-Match'] = cache['etag']
     try:
-        response = requests.post(url, json=payload) # GET -> POST
-        if response.status_code == 200:
-            return response.json()
-        else:
+        response = requests.post(url, json=payload, headers=headers) # GET -> POST
+        if response.status_code == 304:
+            return list(cache['users'].values())
+        if response.status_code != 200:
             return []
-    except requests.exceptions.ConnectionError:
+        data = deserialize(response.content, response.headers.get('Content-Type', ''))
+    except (requests.exceptions.ConnectionError, ValueError):
         return []
 
+    if isinstance(data, list):  # 변경분을 지원하지 않는 서버
+        return data
+    if 'v' in data:  # 변경분을 지원하지 않고 열 기반 형식만 지원하는 서버
+        return _decode_users(data)
+    if data.get('full'):
+        cache['users'] = {}
+    for user in _decode_users(data.get('users', [])):
+        cache['users'][user['username']] = user
+    for removed_username in data.get('removed', []):
+        cache['users'].pop(removed_username, None)
+    cache['cursor'] = data.get('cursor')
+    cache['etag'] = response.headers.get('ETag')
+    return list(cache['users'].values())
+
 # ... (나머지 함수는 이전과 동일) ...
 def register_user(username, server):
     url = f"{API_BASE_URL}/register"
@@ -55,8 +121,100 @@ def send_location_data(username, zone_name, group_size):
     payload = {'username': username, 'zone': zone_name, 'group_size': group_size}
     try:
         response = requests.post(url, json=payload)
-        if response.status_code == 200: return True
+        if response.status_code == 200:
+            return True
         else:
             print(f"서버 응답 오류: {response.json()}")
             return False
-    except requests.exceptions.ConnectionError: return False
\ No newline at end of file
+    except requests.exceptions.ConnectionError:
+        return False
+
+# --- v3.16.0 추가: 마지막으로 서버에 보낸 위치 (username, zone, group_size, sent_at) ---
+_last_report = {'username': None, 'zone': None, 'group_size': None, 'sent_at': 0.0}
+
+
+def send_heartbeat(username):
+    """위치 유지 시간만 연장합니다. 서버 응답 상태 코드를 반환하고, 연결 실패 시 None."""
+    url = f"{API_BASE_URL}/heartbeat"
+    try:
+        return requests.post(url, json={'username': username}).status_code
+    except requests.exceptions.ConnectionError:
+        return None
+
+
+def report_location(username, zone_name, group_size):
+    """
+    위치 공유 루프에서 매 주기 호출합니다.
+    지역이나 그룹 크기가 바뀌었을 때만 전체 위치를 보내고, 그대로면
+    LOCATION_HEARTBEAT_SECONDS마다 하트비트만 보냅니다. 서버에 위치가 없다고 하면(404)
+    전체 위치를 다시 보냅니다.
+    반환: 'sent', 'heartbeat', 'skipped' 또는 실패 시 None
+    """
+    last = _last_report
+    now = time.monotonic()
+    unchanged = (last['username'] == username and last['zone'] == zone_name
+                 and last['group_size'] == group_size)
+    if unchanged:
+        if now - last['sent_at'] < LOCATION_HEARTBEAT_SECONDS:
+            return 'skipped'
+        status = send_heartbeat(username)
+        if status == 200:
+            last['sent_at'] = now
+            return 'heartbeat'
+        if status != 404:
+            return None
+    if not send_location_data(username, zone_name, group_size):
+        return None
+    last.update(username=username, zone=zone_name, group_size=group_size, sent_at=now)
+    return 'sent'
+
+
+# --- v3.15.0 추가: 여러 캐릭터/중계 노드용 일괄 전송 ---
+def send_location_batch(updates):
+    """
+    updates: [{'username', 'zone', 'group_size', 'ts'(선택, 유닉스 시각)}, ...]
+    서버의 처리 결과({'applied', 'coalesced', 'stale', 'rejected'})를 반환하고, 실패하면 None.
+    """
+    url = f"{API_BASE_URL}/update-locations"
+    try:
+        response = requests.post(url, json={'updates': updates})
+        if response.status_code == 200:
+            return response.json()
+        print(f"서버 응답 오류: {response.json()}")
+        return None
+    except requests.exceptions.ConnectionError:
+        return None
+
+# --- v3.8.0 추가: 서버 푸시 기반 위치 스트림 ---
+def stream_locations(username, max_distance=None, stop_event=None):
+    """
+    /stream-locations를 구독하여 (이벤트 이름, 데이터) 튜플을 차례로 반환합니다.
+    연결이 끊기거나 stop_event가 설정되면 종료되며, 재연결은 호출하는 쪽에서 담당합니다.
+    """
+    url = f"{API_BASE_URL}/stream-locations"
+    params = {'username': username}
+    if max_distance is not None:
+        params['max_distance'] = max_distance
+    try:
+        # 서버가 keep-alive 주석을 보내는 주기보다 넉넉하게 읽기 타임아웃을 잡는다
+        with requests.get(url, params=params, stream=True,
+                          timeout=(5, STREAM_KEEPALIVE_SECONDS * 3)) as response:
+            if response.status_code != 200:
+                return
+            event, data_lines = None, []
+            for raw_line in response.iter_lines():
+                if stop_event is not None and stop_event.is_set():
+                    return
+                line = raw_line.decode('utf-8')
+                if not line:
+                    if event and data_lines:
+                        yield event, json.loads("\n".join(data_lines))
+                    event, data_lines = None, []
+                elif line.startswith(':'):
+                    continue
+                elif line.startswith('event:'):
+                    event = line[len('event:'):].strip()
+                elif line.startswith('data:'):
+                    data_lines.append(line[len('data:'):].strip())
+    except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+        return
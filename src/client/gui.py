@@ -40,6 +40,11 @@
 - 기능: 변경된 디렉터리 구조에 맞게 모든 import 경로 수정
 - 2025-08-09 - [수정] - v2.0.2: 리팩토링 후 import 경로 및 로직 수정
 - 기능: 변경된 settings_manager의 함수를 올바르게 호출하도록 수정
+- 2026-10-18 - [수정] - v3.8.0: 위치 스트림 구독 스레드 추가
+- 기능: 위치 공유 중 서버 스트림 이벤트로 사용자 목록을 갱신 (폴링 대신 푸시)
+- 2026-10-18 - [수정] - v3.27.1: 공유 세션마다 중지 이벤트를 새로 만듦
+- 기능: 중단 직후 다시 시작해도 이전 세션의 캡처/스트림 스레드가 되살아나지 않고 종료됨
+- 2026-10-18 - [수정] - v3.27.1: 위치 스트림을 STREAM_MAX_DISTANCE 반경으로 구독
 
 """
 
@@ -58,8 +63,10 @@ from src.core.capture import capture_screen_area
 from src.core.ocr import ocr_for_authentication
 # 새로운 네트워크 리스너 임포트
 from src.core.network_listener import start_capture
-from src.client.api_client import register_user, verify_user, send_location_data, get_all_users
-from src.config.settings import SHARE_INTERVAL_SECONDS, API_SERVERS
+from src.client.api_client import (register_user, verify_user, send_location_data, get_all_users,
+                                   stream_locations)
+from src.config.settings import (SHARE_INTERVAL_SECONDS, API_SERVERS, STREAM_RECONNECT_SECONDS,
+                                 STREAM_MAX_DISTANCE)
 from src.client.area_selector import AreaSelector
 from src.config.settings_manager import save_settings, load_settings, detect_resolution
 from src.config.resolution_presets import RESOLUTION_PRESETS
@@ -75,6 +82,7 @@ class AlbionBeaconApp(QWidget):
         super().__init__()
         self.is_sharing = False
         self.worker_thread = None
+        self.stream_thread = None
         self.capture_stop_event = Event()
         self.signals = WorkerSignals()
         self.selector_window = None
@@ -271,7 +279,8 @@ class AlbionBeaconApp(QWidget):
                 return
 
             self.is_sharing = True
-            self.capture_stop_event.clear()
+            # 이전 세션의 스레드가 아직 끝나지 않았을 수 있으므로 이벤트를 재사용하지 않음
+            self.capture_stop_event = Event()
             self.share_button.setText('위치 공유 중단')
             self.status_label.setText('상태: 네트워크 캡처 시작 중...')
 
@@ -281,6 +290,9 @@ class AlbionBeaconApp(QWidget):
                 daemon=True
             )
             self.worker_thread.start()
+            self.stream_thread = Thread(target=self.location_stream_thread,
+                                        args=(self.capture_stop_event,), daemon=True)
+            self.stream_thread.start()
             self.status_label.setText('상태: 위치 공유 중 (네트워크 감시 중)')
         else:
             self.is_sharing = False
@@ -288,6 +300,30 @@ class AlbionBeaconApp(QWidget):
             self.share_button.setText('위치 공유 시작')
             self.status_label.setText('상태: 공유 중단됨.')
 
+    # --- v3.8.0 추가: 서버 위치 스트림 구독 ---
+    def location_stream_thread(self, stop_event):
+        """
+        서버 스트림 이벤트를 로컬 목록에 반영하고, 연결이 끊기면 잠시 후 다시 구독합니다.
+        stop_event: 이 공유 세션의 중지 이벤트 (세션이 끝나면 다음 세션과 무관하게 종료)
+        """
+        users = {}
+        while not stop_event.is_set():
+            for event, data in stream_locations(self.authenticated_user,
+                                                max_distance=STREAM_MAX_DISTANCE,
+                                                stop_event=stop_event):
+                if stop_event.is_set():
+                    break
+                if event == 'snapshot':
+                    users = {user['username']: user for user in data}
+                elif event in ('joined', 'moved'):
+                    users[data['username']] = data
+                elif event == 'left':
+                    users.pop(data['username'], None)
+                else:
+                    continue
+                self.signals.update_user_list.emit(list(users.values()))
+            stop_event.wait(STREAM_RECONNECT_SECONDS)
+
     def open_area_selector(self):
         if not self.selector_window or not self.selector_window.isVisible():
             self.selector_window = AreaSelector()
@@ -5,14 +5,41 @@
 - 2025-08-07 - [수정] - v0.4.0: 고정 좌표 제거
 - 2025-08-09 - [수정] - v1.5.5: 서버별 API 주소 추가
 - 기능: East, West, Europe 서버의 API 엔드포인트 관리
+- 2026-10-18 - [수정] - v3.5.0: 위치 만료 설정 추가
+- 기능: 위치 정보 유지 시간(TTL)과 만료 정리 주기 관리
+- 2026-10-18 - [수정] - v3.6.0: 게임 정보 API 캐시 설정 추가
+- 기능: 플레이어 조회 캐시 TTL/크기, 타임아웃, 비동기 길드 조회 여부 관리
+- 2026-10-18 - [수정] - v3.8.0: 위치 스트림(SSE) 설정 추가
+- 2026-10-18 - [수정] - v3.9.0: 변경분 조회용 삭제 기록 보관 개수 추가
+- 2026-10-18 - [수정] - v3.10.0: 위치 저장소 백엔드 설정 추가
+- 기능: 'memory'(단일 프로세스) 또는 'sqlite'(여러 워커 프로세스 공유) 선택
+- 2026-10-18 - [수정] - v3.11.0: 부하 테스트용 환경 변수 설정 추가
+- 기능: 서버 DB 주소와 게임 정보 API 주소(스텁 서버)를 환경 변수로 바꿀 수 있도록 수정
+- 2026-10-18 - [수정] - v3.13.0: asyncio 서버 모드 설정 추가
+- 2026-10-18 - [수정] - v3.15.0: 위치 일괄 갱신 최대 개수 추가
+- 2026-10-18 - [수정] - v3.16.0: 위치 하트비트 주기 추가
+- 2026-10-18 - [수정] - v3.18.0: 위치 목록 조회 최대 개수(limit 상한) 추가
+- 2026-10-18 - [수정] - v3.19.0: 인메모리 위치 저장소 스냅샷 경로/주기 추가
+- 2026-10-18 - [수정] - v3.20.0: 위치 이력 로그 설정 추가
+- 2026-10-18 - [수정] - v3.21.0: 지역 활동 집계 윈도우 추가
+- 2026-10-18 - [수정] - v3.22.0: 가중치 경로 탐색(/route) 이동 비용 추가
+- 2026-10-18 - [수정] - v3.25.0: 토큰 버킷 요청 제한 설정 추가
+- 2026-10-18 - [수정] - v3.26.0: 서버 DB 연결 풀/PRAGMA 및 등록 일괄 커밋 설정 추가
+- 2026-10-18 - [수정] - v3.27.0: 길드 정보 주기적 갱신 설정 추가
+- 2026-10-18 - [수정] - v3.27.1: 위치 보고 지역 이름 최대 길이 추가
+- 2026-10-18 - [수정] - v3.27.1: 클라이언트 위치 스트림 구독 반경 추가
 
 """
+import os
 
 # 기존 설정값들
 SCREENSHOT_PATH = "../../zone_screenshot.png"
 TESSERACT_CMD_PATH = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 API_BASE_URL = "http://127.0.0.1:5000"
 SHARE_INTERVAL_SECONDS = 15
+# --- v3.16.0 추가: 위치가 그대로일 때 TTL만 연장하는 하트비트 주기 ---
+# LOCATION_TTL_SECONDS보다 짧게 설정
+LOCATION_HEARTBEAT_SECONDS = 120
 OCR_FAIL_TOLERANCE = 4
 
 
@@ -21,4 +48,113 @@ API_SERVERS = {
     'East (Asia)': 'https://gameinfo-sgp.albiononline.com/api/gameinfo',
     'West (Americas)': 'https://gameinfo.albiononline.com/api/gameinfo',
     'Europe': 'https://gameinfo-ams.albiononline.com/api/gameinfo',
-}
\ No newline at end of file
+}
+
+# --- v3.11.0 추가: 부하 테스트 등에서 모든 서버의 게임 정보 API를 스텁 서버로 교체 ---
+GAMEINFO_URL_OVERRIDE = os.getenv("BEACON_GAMEINFO_URL")
+if GAMEINFO_URL_OVERRIDE:
+    API_SERVERS = {server: GAMEINFO_URL_OVERRIDE for server in API_SERVERS}
+
+# --- v3.11.0 추가: 서버 DB 주소 ---
+SERVER_DATABASE_URI = os.getenv("BEACON_DATABASE_URI", "sqlite:///beacon.db")
+
+# --- v3.26.0 추가: 서버 DB(SQLite) 연결 풀과 연결마다 적용하는 PRAGMA ---
+SERVER_DB_POOL_SIZE = 8                  # 유지하는 연결 수 (ASYNC_DB_WORKERS 이상 권장)
+SERVER_DB_MAX_OVERFLOW = 8               # 부족할 때 잠시 더 여는 연결 수
+SERVER_DB_POOL_TIMEOUT_SECONDS = 10      # 풀에서 연결을 기다리는 최대 시간
+SERVER_DB_BUSY_TIMEOUT_SECONDS = 5       # 다른 연결이 쓰기 잠금을 잡고 있을 때 기다리는 시간
+SERVER_DB_PRAGMAS = (
+    "journal_mode=WAL",        # 읽기가 쓰기를 막지 않음
+    "synchronous=NORMAL",      # WAL 체크포인트 때만 fsync (전원 장애 시 최근 커밋 유실 가능)
+    "temp_store=MEMORY",
+    "cache_size=-16000",       # 연결당 페이지 캐시 약 16 MiB
+    "mmap_size=134217728",     # 128 MiB까지 메모리 맵으로 읽기
+)
+REGISTER_BATCH_MAX = 500                 # /register 그룹 커밋 한 번에 담는 최대 등록 수
+
+# --- v3.5.0 추가: 서버 위치 정보 만료 설정 ---
+LOCATION_TTL_SECONDS = 300            # 마지막 갱신 후 이 시간이 지나면 목록에서 제외
+LOCATION_REAP_INTERVAL_SECONDS = 5    # 백그라운드 정리 스레드의 실행 주기
+LOCATION_TOMBSTONE_LIMIT = 10000      # 변경분(since) 조회를 위해 보관하는 최근 삭제 기록 수
+LOCATION_BATCH_MAX_UPDATES = 1000     # /update-locations 요청 하나에 담을 수 있는 최대 갱신 수
+LOCATION_QUERY_MAX_LIMIT = 1000       # /get-locations limit 파라미터의 상한
+LOCATION_ZONE_MAX_LENGTH = 100        # 위치 보고의 지역 이름 최대 길이 (v3.27.1)
+
+# --- v3.10.0 추가: 위치 저장소 백엔드 ---
+# 'memory': 프로세스 내 딕셔너리 (단일 프로세스 전용)
+# 'sqlite': WAL 모드 SQLite 파일을 여러 워커 프로세스가 공유 (gunicorn -w N 등)
+LOCATION_STORE_BACKEND = os.getenv("BEACON_LOCATION_STORE", "memory")
+LOCATION_STORE_PATH = os.getenv("BEACON_LOCATION_STORE_PATH", "locations.db")
+
+# --- v3.19.0 추가: 인메모리 저장소 스냅샷 (빈 문자열이면 사용하지 않음) ---
+LOCATION_SNAPSHOT_PATH = os.getenv("BEACON_LOCATION_SNAPSHOT", "locations.snapshot")
+LOCATION_SNAPSHOT_INTERVAL_SECONDS = 30   # 재시작 시 잃을 수 있는 최대 시간 (TTL보다 짧게)
+
+# --- v3.20.0 추가: 위치 이력 로그 (빈 문자열이면 사용하지 않음) ---
+LOCATION_HISTORY_DIR = os.getenv("BEACON_LOCATION_HISTORY_DIR", "history")
+LOCATION_HISTORY_SEGMENT_SECONDS = 3600              # 세그먼트 파일 하나가 담는 시간 구간
+LOCATION_HISTORY_FLUSH_INTERVAL_SECONDS = 1.0        # 버퍼를 파일에 기록하는 주기
+LOCATION_HISTORY_FLUSH_MAX_RECORDS = 5000            # 버퍼가 이만큼 차면 주기를 기다리지 않고 기록
+LOCATION_HISTORY_BLOCK_MAX_RECORDS = 4096            # 블록 하나에 담는 최대 기록 수
+LOCATION_HISTORY_BUFFER_MAX = 200000                 # 기록이 밀릴 때 버퍼 상한 (넘으면 버림)
+LOCATION_HISTORY_RETENTION_SECONDS = 7 * 24 * 3600   # 이보다 오래된 기록은 압축 시 삭제
+LOCATION_HISTORY_COMPACT_INTERVAL_SECONDS = 600      # 압축 주기
+LOCATION_HISTORY_QUERY_MAX_LIMIT = 10000             # /location-history limit 파라미터의 상한
+
+# --- v3.21.0 추가: 지역/길드 활동 집계 윈도우 {이름: 초} (/zone-heatmap) ---
+# 하트비트도 집계에 들어가므로 '5m'(TTL과 같음)은 지금 활성 중인 사용자와 거의 같음
+ZONE_ACTIVITY_WINDOWS = {'1m': 60, '5m': 300, '60m': 3600}
+
+# --- v3.22.0 추가: 가중치 경로 탐색 이동 비용 (/route) ---
+# 일반 이동의 비용은 양쪽 지역 타입 비용의 평균, 포털 지역을 드나들거나 로얄 대륙과
+# 블랙존 사이를 넘는 이동은 ROUTE_PORTAL_COST로 계산
+ROUTE_ZONE_TYPE_COSTS = {'ROYAL': 1.0, 'BLACK': 1.5}   # 타입이 없는 지역은 1.0
+ROUTE_PORTAL_COST = 0.5
+
+# --- v3.25.0 추가: 토큰 버킷 요청 제한 (BEACON_RATE_LIMIT_ENABLED=0이면 사용하지 않음) ---
+# 경로 묶음별 {'user': (초당 토큰, 버킷 크기), 'global': (초당 토큰, 버킷 크기)}
+# 사용자별 버킷 키는 클라이언트 IP (v3.27.1: 본문의 username은 인증 전 값이라 키로 쓰지 않음)
+RATE_LIMIT_ENABLED = os.getenv("BEACON_RATE_LIMIT_ENABLED", "1") != "0"
+RATE_LIMIT_ROUTE_CLASSES = {
+    '/update-location': 'update', '/update-locations': 'update', '/heartbeat': 'update',
+    '/get-locations': 'read', '/stream-locations': 'read', '/zone-heatmap': 'read',
+    '/location-history': 'read', '/route': 'read',
+    '/register': 'auth', '/verify': 'auth',
+}
+RATE_LIMITS = {
+    'update': {'user': (1.0, 10), 'global': (2000.0, 4000)},   # 정상 클라이언트는 15초에 한 번
+    'read': {'user': (2.0, 20), 'global': (1000.0, 2000)},
+    'auth': {'user': (0.2, 5), 'global': (50.0, 100)},         # 게임 정보 API 호출을 동반
+}
+RATE_LIMIT_MAX_BUCKETS = 100000   # 사용자별 버킷 최대 개수 (넘으면 가장 오래 안 쓴 것부터 제거)
+
+# --- v3.6.0 추가: 알비온 게임 정보 API 조회 설정 ---
+GAMEINFO_TIMEOUT_SECONDS = 5
+GAMEINFO_CACHE_TTL_SECONDS = 600           # 조회 성공 결과 캐시 유지 시간
+GAMEINFO_CACHE_NEGATIVE_TTL_SECONDS = 60   # '플레이어 없음' 결과 캐시 유지 시간
+GAMEINFO_CACHE_MAX_ENTRIES = 10000         # LRU 캐시 최대 항목 수
+GAMEINFO_MAX_WORKERS = 4                   # 비동기 조회용 스레드 수
+VERIFY_ASYNC_GUILD_LOOKUP = False          # True면 /verify가 즉시 응답하고 길드 정보는 나중에 채움
+
+# --- v3.27.0 추가: 길드 정보 주기적 갱신 (BEACON_GUILD_REFRESH_ENABLED=0이면 사용하지 않음) ---
+GUILD_REFRESH_ENABLED = os.getenv("BEACON_GUILD_REFRESH_ENABLED", "1") != "0"
+GUILD_REFRESH_INTERVAL_SECONDS = 6 * 3600   # 한 바퀴(전체 인증 사용자)를 마친 뒤 다음 시작까지
+GUILD_REFRESH_BATCH_SIZE = 200              # DB에서 읽고 일괄 갱신하는 사용자 수
+GUILD_REFRESH_BATCH_PAUSE_SECONDS = 1.0     # 배치 사이 쉬는 시간
+GUILD_REFRESH_CONCURRENCY = 4               # 동시에 진행하는 게임 정보 API 요청 수
+# 게임 서버별 (초당 요청 수, 버스트) - 요청 처리용 조회와 별도로 갱신 작업에만 적용
+GUILD_REFRESH_RATE_LIMITS = {server: (5.0, 5) for server in API_SERVERS}
+
+# --- v3.8.0 추가: 위치 스트림(SSE) 설정 ---
+STREAM_KEEPALIVE_SECONDS = 15   # 이벤트가 없을 때 연결 유지용 주석을 보내는 주기
+STREAM_QUEUE_SIZE = 1000        # 구독자별 이벤트 큐 크기 (넘치면 전체 목록 재전송)
+STREAM_RECONNECT_SECONDS = 5    # 클라이언트 재연결 대기 시간
+STREAM_MAX_DISTANCE = 3         # 클라이언트가 구독하는 주변 지역 반경(홉), None이면 전체 (v3.27.1)
+STREAM_POLL_INTERVAL_SECONDS = 1.0  # sqlite 저장소에서 다른 프로세스의 변경을 확인하는 주기
+
+# --- v3.13.0 추가: asyncio 서버 모드 (python -m src.server.async_server) ---
+ASYNC_SERVER_HOST = "0.0.0.0"
+ASYNC_SERVER_PORT = 5000
+ASYNC_DB_WORKERS = 8                     # DB 작업(/register, /verify)을 처리하는 스레드 수
+ASYNC_KEEPALIVE_TIMEOUT_SECONDS = 75     # 요청이 없는 keep-alive 연결을 닫기까지의 시간
+ASYNC_MAX_BODY_BYTES = 1024 * 1024       # 요청 본문 최대 크기
@@ -6,6 +6,9 @@
 - 기능: Bridgewatch Portal 주변 블랙존 맵 정보 추가
 - 2025-08-09 - [수정] - v1.6.5: 전체 지역 이름 목록 추가
 - 기능: OCR 후처리용 '사전'으로 사용할 ALL_ZONES 리스트 추가
+- 2026-10-18 - [수정] - v3.23.0: ALL_ZONES 제거
+- 기능: 실제 맵 데이터는 map_data.json과 컴파일된 map_data.bin(zone_registry)을 사용하며,
+  이 파일은 형식 참고용 예시로만 유지 (지역 목록은 zone_registry.get_zone_registry().names)
 
 """
 ZONE_TYPES = {
@@ -23,7 +26,3 @@ MAP_CONNECTIONS = {
     "Lymhurst": ["Lymhurst Portal", "Highland Cross", "The Oolite Plain"],
     "Highland Cross": ["Lymhurst", "Dudley Cross", "Birchcopse"],
 }
-
-# --- v1.6.5 추가 ---
-# ZONE_TYPES와 MAP_CONNECTIONS의 모든 지역 이름을 합쳐 중복을 제거한 '사전'
-ALL_ZONES = list(set(list(ZONE_TYPES.keys()) + [zone for neighbors in MAP_CONNECTIONS.values() for zone in neighbors] + list(MAP_CONNECTIONS.keys())))
\ No newline at end of file
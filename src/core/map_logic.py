@@ -3,34 +3,55 @@
 - 기능: 너비 우선 탐색(BFS) 알고리즘을 사용하여 두 지역 간의 최단 거리 계산
 - 2025-08-10 - [수정] - v2.2.0: JSON 데이터 파일 연동
 - 기능: map_data.json 파일을 읽어 맵 데이터를 불러오도록 수정
+- 2026-10-18 - [수정] - v3.3.0: 전체 쌍(all-pairs) 거리 테이블 사전 계산
+- 기능: 시작 시 지역을 정수 ID로 인터닝하고 배열 기반 거리 테이블을 생성
+- 기능: get_distance를 요청별 BFS 대신 O(1) 테이블 조회로 변경
+- 2026-10-18 - [수정] - v3.4.0: 반경 내 지역 조회 기능 추가
+- 기능: zones_within으로 특정 지역에서 N홉 이내의 지역 목록을 거리순으로 반환
+- 2026-10-18 - [수정] - v3.23.0: 컴파일된 지역 레지스트리(zone_registry) 사용
+- 기능: 시작 시 map_data.json을 현재 디렉터리 기준으로 읽고 그래프/거리 테이블을 만들던 방식 대신
+  컴파일된 파일을 mmap으로 열어 지역 ID, 타입, CSR 인접 배열, 홉 거리 테이블을 그대로 사용
+- 기능: 리스트 기반 graph 딕셔너리 제거 (이웃 조회는 REGISTRY.neighbors)
+- 2026-10-18 - [추가] - v3.24.0: 출발 지역 하나에서 여러 대상 지역까지의 거리 일괄 조회
+- 기능: distances_from이 대상 지역 집합의 거리를 한 번에 반환하고 결과를 출발 지역별로 캐시
+  (맵 데이터는 프로세스 안에서 바뀌지 않으므로 clear_distance_cache를 호출할 때까지 유지)
+- 기능: 테이블 없이 BFS 한 번으로 모든 대상을 찾으면 멈추는 기준 구현 distances_from_bfs 추가
 
 """
-import json
 from collections import deque
 
-from src.core.map_data import MAP_CONNECTIONS
-
-try:
-    with open('src/core/map_data.json', 'r', encoding='utf-8') as f:
-        map_data = json.load(f)
-    ZONE_TYPES = map_data.get("ZONE_TYPES", {})
-    MAP_CONNECTIONS = map_data.get("MAP_CONNECTIONS", {})
-except (FileNotFoundError, json.JSONDecodeError):
-    print("오류: map_data.json 파일을 찾을 수 없거나 파일이 손상되었습니다.")
-    ZONE_TYPES = {}
-    MAP_CONNECTIONS = {}
-
-# 양방향 그래프 생성 (이전과 동일)
-graph = {}
-for zone, neighbors in MAP_CONNECTIONS.items():
-    if zone not in graph: graph[zone] = []
-    for neighbor in neighbors:
-        if neighbor not in graph: graph[neighbor] = []
-        graph[zone].append(neighbor)
-        graph[neighbor].append(zone)
+from src.core.zone_registry import build_hop_table, get_zone_registry
+
+# --- v3.23.0 수정: map_data.json 파싱/그래프/거리 테이블 생성 대신 공용 지역 레지스트리 사용 ---
+REGISTRY = get_zone_registry()
+ZONE_TYPES = REGISTRY.types
+
+# --- v3.3.0 추가: 지역 ID 인터닝 및 거리 테이블 ---
+# 그래프와 ZONE_TYPES에 등장하는 모든 지역에 0부터 시작하는 정수 ID를 부여
+ZONE_NAMES = REGISTRY.names
+ZONE_IDS = REGISTRY.ids
+ZONE_COUNT = REGISTRY.count
+
+
+def _build_distance_table():
+    """
+    레지스트리의 CSR 인접 배열로 홉 거리 테이블을 다시 계산합니다. (검증/벤치마크용)
+    서버는 컴파일 단계에서 같은 방식으로 만들어 둔 REGISTRY.hops를 그대로 사용합니다.
+    """
+    table = build_hop_table(REGISTRY.offsets, REGISTRY.adjacency, ZONE_COUNT)
+    return table, (0xFF if table.itemsize == 1 else 0xFFFF)
+
+
+DISTANCE_TABLE, UNREACHABLE = REGISTRY.hops, REGISTRY.unreachable
+
+
+def _in_graph(zone):
+    zone_id = ZONE_IDS.get(zone)
+    return zone_id is not None and REGISTRY.is_connected(zone_id)
+
 
 def get_distance(start_zone, end_zone):
-    # ... (이하 get_distance 함수 내용은 이전과 동일) ...
+    """두 지역 간의 홉 거리를 사전 계산된 테이블에서 조회합니다. (결과는 get_distance_bfs와 동일)"""
     if start_zone == end_zone:
         return 0
     start_type = ZONE_TYPES.get(start_zone)
@@ -39,16 +60,150 @@ def get_distance(start_zone, end_zone):
         return "알 수 없음"
     if start_type != end_type:
         return "블랙존" if end_type == "BLACK" else "로얄 대륙"
-    if start_zone not in graph or end_zone not in graph:
+    if not _in_graph(start_zone) or not _in_graph(end_zone):
+        return "알 수 없음"
+    distance = DISTANCE_TABLE[ZONE_IDS[start_zone] * ZONE_COUNT + ZONE_IDS[end_zone]]
+    if distance == UNREACHABLE:
+        return "경로 없음"
+    return distance
+
+
+# --- v3.3.0 수정: 기존 BFS 구현은 검증/벤치마크용 기준 구현으로 유지 ---
+def get_distance_bfs(start_zone, end_zone):
+    if start_zone == end_zone:
+        return 0
+    start_type = ZONE_TYPES.get(start_zone)
+    end_type = ZONE_TYPES.get(end_zone)
+    if not start_type or not end_type:
+        return "알 수 없음"
+    if start_type != end_type:
+        return "블랙존" if end_type == "BLACK" else "로얄 대륙"
+    if not _in_graph(start_zone) or not _in_graph(end_zone):
         return "알 수 없음"
     queue = deque([(start_zone, 0)])
     visited = {start_zone}
     while queue:
         current_zone, distance = queue.popleft()
-        for neighbor in graph.get(current_zone, []):
+        for neighbor_id in REGISTRY.neighbors(ZONE_IDS[current_zone]):
+            neighbor = ZONE_NAMES[neighbor_id]
             if neighbor == end_zone:
                 return distance + 1
             if neighbor not in visited:
                 visited.add(neighbor)
                 queue.append((neighbor, distance + 1))
-    return "경로 없음"
\ No newline at end of file
+    return "경로 없음"
+
+
+# --- v3.24.0 추가: 다중 대상 거리 조회 ---
+def _non_numeric_distance(start_zone, end_zone):
+    """get_distance가 숫자가 아닌 값을 반환하는 경우 그 값을, 아니면 None을 반환합니다."""
+    start_type = ZONE_TYPES.get(start_zone)
+    end_type = ZONE_TYPES.get(end_zone)
+    if not start_type or not end_type:
+        return "알 수 없음"
+    if start_type != end_type:
+        return "블랙존" if end_type == "BLACK" else "로얄 대륙"
+    if not _in_graph(start_zone) or not _in_graph(end_zone):
+        return "알 수 없음"
+    return None
+
+
+_source_distances = {}  # 출발 지역 -> {대상 지역: get_distance 결과} (알려진 지역만 캐시)
+
+
+def distances_from(source_zone, target_zones):
+    """
+    source_zone에서 target_zones 각각까지의 거리를 {대상 지역: 거리}로 반환합니다.
+    값은 get_distance(source_zone, 대상 지역)와 같고, 중복된 대상은 한 번만 계산합니다.
+    처음 보는 (출발, 대상) 쌍만 거리 테이블의 출발 지역 행에서 읽고 이후에는 캐시에서 반환합니다.
+    """
+    if source_zone not in ZONE_IDS:
+        return {target: get_distance(source_zone, target) for target in target_zones}
+    cached = _source_distances.get(source_zone)
+    if cached is None:
+        cached = _source_distances.setdefault(source_zone, {})
+    result = {}
+    for target in target_zones:
+        distance = cached.get(target)
+        if distance is None:
+            distance = get_distance(source_zone, target)
+            if target in ZONE_IDS:  # 클라이언트가 보낸 임의 문자열로 캐시가 커지지 않도록
+                cached[target] = distance
+        result[target] = distance
+    return result
+
+
+def clear_distance_cache():
+    """맵 데이터를 다시 불러온 경우 distances_from 캐시를 비웁니다."""
+    _source_distances.clear()
+
+
+def distances_from_bfs(source_zone, target_zones):
+    """
+    distances_from의 기준 구현입니다. (검증/벤치마크용)
+    source_zone에서 BFS를 한 번만 수행하며, 숫자 거리가 필요한 대상을 모두 찾으면 멈춥니다.
+    """
+    result, pending = {}, {}
+    for target in target_zones:
+        if target == source_zone:
+            result[target] = 0
+            continue
+        distance = _non_numeric_distance(source_zone, target)
+        if distance is None:
+            pending[ZONE_IDS[target]] = target
+        else:
+            result[target] = distance
+    if pending:
+        source_id = ZONE_IDS[source_zone]
+        visited = {source_id}
+        queue = deque([(source_id, 0)])
+        while queue and pending:
+            current, distance = queue.popleft()
+            for neighbor in REGISTRY.neighbors(current):
+                if neighbor in visited:
+                    continue
+                visited.add(neighbor)
+                target = pending.pop(neighbor, None)
+                if target is not None:
+                    result[target] = distance + 1
+                queue.append((neighbor, distance + 1))
+        for target in pending.values():
+            result[target] = "경로 없음"
+    return result
+
+
+# --- v3.4.0 추가: 반경 조회용 지역 이웃 목록 ---
+_neighbourhoods = {}
+
+
+def _neighbourhood(zone_id):
+    """같은 타입이면서 도달 가능한 지역들을 (거리, 지역 ID) 오름차순으로 캐시하여 반환합니다."""
+    cached = _neighbourhoods.get(zone_id)
+    if cached is None:
+        zone_type = ZONE_TYPES.get(ZONE_NAMES[zone_id])
+        row = zone_id * ZONE_COUNT
+        cached = sorted(
+            (DISTANCE_TABLE[row + other_id], other_id)
+            for other_id in range(ZONE_COUNT)
+            if DISTANCE_TABLE[row + other_id] != UNREACHABLE
+            and ZONE_TYPES.get(ZONE_NAMES[other_id]) == zone_type
+        )
+        _neighbourhoods[zone_id] = cached
+    return cached
+
+
+def zones_within(zone, max_distance):
+    """
+    zone에서 max_distance 홉 이내에 있는 지역과 그 거리를 [(지역, 거리), ...] 형태로 반환합니다.
+    get_distance가 숫자를 반환하는 지역(같은 타입, 도달 가능)만 포함하며,
+    자기 자신은 항상 거리 0입니다.
+    """
+    zone_id = ZONE_IDS.get(zone)
+    if zone_id is None or not REGISTRY.is_connected(zone_id) or not ZONE_TYPES.get(zone):
+        return [(zone, 0)]
+    result = []
+    for distance, other_id in _neighbourhood(zone_id):
+        if distance > max_distance:
+            break
+        result.append((ZONE_NAMES[other_id], distance))
+    return result
@@ -3,32 +3,27 @@
 - 기능: 레벤슈타인 거리를 사용하여 OCR 결과와 가장 유사한 텍스트를 사전에서 찾음
 - 2025-08-10 - [수정] - v2.2.0: JSON 데이터 파일 연동
 - 기능: map_data.json 파일을 읽어 ALL_ZONES '사전'을 생성
+- 2026-10-18 - [수정] - v3.23.0: 공용 지역 레지스트리 사용
+- 기능: 현재 디렉터리 기준 map_data.json 대신 컴파일된 지역 레지스트리에서 사전을 가져오고,
+  미리 정규화된 지역 이름과 비교하여 호출마다 사전 전체를 정규화하지 않도록 수정
 """
 import Levenshtein
-import json
-from src.core.map_data import ALL_ZONES
 
+from src.core.zone_registry import get_zone_registry, normalize_zone_name
 
-try:
-    with open('src/core/map_data.json', 'r', encoding='utf-8') as f:
-        map_data = json.load(f)
-    ZONE_TYPES = map_data.get("ZONE_TYPES", {})
-    MAP_CONNECTIONS = map_data.get("MAP_CONNECTIONS", {})
-    ALL_ZONES = list(set(list(ZONE_TYPES.keys()) + [zone for neighbors in MAP_CONNECTIONS.values() for zone in neighbors] + list(MAP_CONNECTIONS.keys())))
-except (FileNotFoundError, json.JSONDecodeError):
-    print("오류: map_data.json 파일을 찾을 수 없거나 파일이 손상되었습니다.")
-    ALL_ZONES = []
+# --- v3.23.0 수정: map_data.json을 따로 읽지 않고 공용 지역 레지스트리의 이름/정규화 이름 사용 ---
+ZONE_REGISTRY = get_zone_registry()
+ALL_ZONES = ZONE_REGISTRY.names
 
 
 def find_best_match(ocr_text):
     # ... (이하 find_best_match 함수 내용은 이전과 동일) ...
     if not ocr_text:
         return None
-    ocr_text_normalized = "".join(ocr_text.split()).lower()
+    ocr_text_normalized = normalize_zone_name(ocr_text)
     best_match = None
     lowest_distance = float('inf')
-    for zone_name in ALL_ZONES:
-        zone_name_normalized = "".join(zone_name.split()).lower()
+    for zone_name, zone_name_normalized in zip(ALL_ZONES, ZONE_REGISTRY.normalized):
         distance = Levenshtein.distance(ocr_text_normalized, zone_name_normalized)
         if distance < lowest_distance:
             lowest_distance = distance
@@ -0,0 +1,107 @@
+"""
+- 2026-10-18 - [추가] - v3.22.0: 가중치 이동 비용 기반 경로 탐색
+- 기능: 로얄 대륙/블랙존 구분 없이 MAP_CONNECTIONS 전체 그래프에서 가중치 최단 경로를 계산
+  (일반 이동은 지역 타입별 비용, 포털 지역 출입과 대륙 간 이동은 포털 비용)
+- 기능: 시작 시 모든 지역에서 다익스트라를 한 번씩 수행해 (지역 수 x 지역 수) 비용 테이블과
+  다음 지역(next hop) 테이블을 만들고, 비용은 O(1), 경로는 경로 길이에 비례하는 조회로 응답
+- 기능: 지역이 수백 개 수준이라 랜드마크(ALT)/축약 계층(CH) 대신 전체 테이블을 사용
+  (v3.3.0 홉 거리 테이블과 같은 방식, 약 1.4 MiB)
+- 2026-10-18 - [수정] - v3.23.0: 지역 레지스트리의 CSR 인접 배열 사용
+
+"""
+import heapq
+from array import array
+
+from src.config.settings import ROUTE_PORTAL_COST, ROUTE_ZONE_TYPE_COSTS
+from src.core.map_logic import REGISTRY, ZONE_COUNT, ZONE_IDS, ZONE_NAMES, ZONE_TYPES
+
+NO_ROUTE = float('inf')
+_NO_HOP = 0xFFFF
+
+
+def is_portal(zone):
+    """왕립 도시 포털처럼 다른 지역으로 순간 이동하는 포털 지역인지 여부입니다."""
+    return zone.endswith(' Portal')
+
+
+def edge_cost(zone, neighbor):
+    """인접한 두 지역 사이 이동 비용입니다. (양방향 동일)"""
+    zone_type, neighbor_type = ZONE_TYPES.get(zone), ZONE_TYPES.get(neighbor)
+    if is_portal(zone) or is_portal(neighbor) or zone_type != neighbor_type:
+        return ROUTE_PORTAL_COST
+    return (ROUTE_ZONE_TYPE_COSTS.get(zone_type, 1.0)
+            + ROUTE_ZONE_TYPE_COSTS.get(neighbor_type, 1.0)) / 2
+
+
+def _build_route_tables():
+    """
+    모든 지역에서 다익스트라를 수행해 (비용 테이블, 다음 지역 테이블)을 만듭니다.
+    비용은 float64('d'), 다음 지역은 uint16('H') 지역 ID이며 도달할 수 없으면 NO_ROUTE/0xFFFF.
+    next_hops[s * ZONE_COUNT + t]는 s에서 t로 가는 최단 경로의 첫 번째 지역입니다.
+    """
+    adjacency = [[(neighbor_id, edge_cost(zone, ZONE_NAMES[neighbor_id]))
+                  for neighbor_id in REGISTRY.neighbors(zone_id)]
+                 for zone_id, zone in enumerate(ZONE_NAMES)]
+    costs = array('d', [NO_ROUTE]) * (ZONE_COUNT * ZONE_COUNT)
+    next_hops = array('H', [_NO_HOP]) * (ZONE_COUNT * ZONE_COUNT)
+    for source in range(ZONE_COUNT):
+        row = source * ZONE_COUNT
+        costs[row + source] = 0.0
+        next_hops[row + source] = source
+        heap = [(0.0, source)]
+        while heap:
+            cost, current = heapq.heappop(heap)
+            if cost > costs[row + current]:
+                continue
+            first_hop = next_hops[row + current]
+            for neighbor, weight in adjacency[current]:
+                next_cost = cost + weight
+                if next_cost < costs[row + neighbor]:
+                    costs[row + neighbor] = next_cost
+                    next_hops[row + neighbor] = neighbor if current == source else first_hop
+                    heapq.heappush(heap, (next_cost, neighbor))
+    return costs, next_hops
+
+
+ROUTE_COSTS, NEXT_HOPS = _build_route_tables()
+
+
+def route_cost(start_zone, end_zone):
+    """두 지역 간 최소 이동 비용입니다. 알 수 없는 지역이거나 도달할 수 없으면 None."""
+    start_id, end_id = ZONE_IDS.get(start_zone), ZONE_IDS.get(end_zone)
+    if start_id is None or end_id is None:
+        return None if start_zone != end_zone else 0.0
+    cost = ROUTE_COSTS[start_id * ZONE_COUNT + end_id]
+    return None if cost == NO_ROUTE else cost
+
+
+def shortest_path(start_zone, end_zone):
+    """
+    start_zone부터 end_zone까지 최소 비용 경로의 지역 목록(양 끝 포함)을 반환합니다.
+    알 수 없는 지역이거나 도달할 수 없으면 None.
+    """
+    start_id, end_id = ZONE_IDS.get(start_zone), ZONE_IDS.get(end_zone)
+    if start_id is None or end_id is None:
+        return None if start_zone != end_zone else [start_zone]
+    if NEXT_HOPS[start_id * ZONE_COUNT + end_id] == _NO_HOP:
+        return None
+    path = [start_id]
+    while path[-1] != end_id:
+        path.append(NEXT_HOPS[path[-1] * ZONE_COUNT + end_id])
+    return [ZONE_NAMES[zone_id] for zone_id in path]
+
+
+def find_route(start_zone, end_zone):
+    """
+    {'path', 'cost', 'hops', 'portal_transitions'}를 반환하고, 경로가 없으면 None.
+    portal_transitions는 경로 중 포털 비용이 적용된 이동 수입니다.
+    """
+    path = shortest_path(start_zone, end_zone)
+    if path is None:
+        return None
+    portal_transitions = sum(
+        1 for zone, neighbor in zip(path, path[1:])
+        if is_portal(zone) or is_portal(neighbor)
+        or ZONE_TYPES.get(zone) != ZONE_TYPES.get(neighbor))
+    return {'path': path, 'cost': route_cost(start_zone, end_zone), 'hops': len(path) - 1,
+            'portal_transitions': portal_transitions}
@@ -0,0 +1,161 @@
+"""
+- 2026-10-18 - [추가] - v3.17.0: 위치 목록 압축 전송 형식
+- 기능: Accept 헤더로 응답 형식 협상 (JSON 행 목록 / 열 기반 JSON / MessagePack)
+- 기능: 열 기반 형식은 지역·길드 이름을 한 번만 담은 표(interned table)의 인덱스로 전송하고,
+  시각은 strftime 문자열 대신 유닉스 시각 정수로 전송
+- 기능: Accept-Encoding에 따라 gzip 또는 zstd로 응답 본문 압축
+- msgpack, zstandard 패키지는 선택 사항이며, 없으면 해당 형식/압축을 협상하지 않음
+
+"""
+import gzip
+import json
+from datetime import datetime, timedelta
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMAT_JSON = 'application/json'
+FORMAT_COLUMNAR = 'application/vnd.beacon.columnar+json'
+FORMAT_MSGPACK = 'application/x-msgpack'
+COLUMNAR_VERSION = 1
+COMPRESS_MIN_BYTES = 1024      # 이보다 작은 본문은 압축하지 않음
+GZIP_LEVEL = 5
+ZSTD_LEVEL = 3
+
+_EPOCH_START = datetime(1970, 1, 1)
+
+
+def available_formats():
+    formats = [FORMAT_JSON, FORMAT_COLUMNAR]
+    if msgpack is not None:
+        formats.append(FORMAT_MSGPACK)
+    return formats
+
+
+def available_encodings():
+    return ['zstd', 'gzip'] if zstandard is not None else ['gzip']
+
+
+def _parse_header_values(header):
+    """'a;q=0.5, b' 형태의 헤더를 q값이 높은 순서의 값 목록으로 바꿉니다. (q=0 제외)"""
+    values = []
+    for order, part in enumerate((header or '').split(',')):
+        value, *params = [piece.strip() for piece in part.split(';')]
+        if not value:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, number = param.partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            values.append((-quality, order, value.lower()))
+    return [value for _, _, value in sorted(values)]
+
+
+def negotiate_format(accept_header):
+    """Accept 헤더에서 지원하는 응답 형식을 고릅니다. 기본값은 기존 JSON 행 목록입니다."""
+    formats = available_formats()
+    for media_type in _parse_header_values(accept_header):
+        if media_type in formats:
+            return media_type
+    return FORMAT_JSON
+
+
+def negotiate_encoding(accept_encoding_header):
+    """Accept-Encoding 헤더에서 지원하는 압축 방식을 고릅니다. 없으면 None."""
+    encodings = available_encodings()
+    for encoding in _parse_header_values(accept_encoding_header):
+        if encoding in encodings:
+            return encoding
+    return None
+
+
+def encode_location_columns(entries, guild_name_of):
+    """
+    [(사용자 이름, 기록, 거리), ...]를 열 기반 형식으로 바꿉니다.
+    guild_name_of(사용자 이름)은 길드 이름(없으면 빈 문자열)을 반환해야 합니다.
+    {'v', 'zones', 'guilds', 'username', 'zone', 'guild', 'group_size', 'distance', 'updated_at'}
+    zone/guild 열은 zones/guilds 표의 인덱스이고, updated_at은 유닉스 시각(초, UTC)입니다.
+    """
+    zones, zone_ids, guilds, guild_ids = [], {}, [], {}
+    usernames, zone_column, guild_column = [], [], []
+    group_sizes, distances, updated_at = [], [], []
+    for username, record, distance in entries:
+        zone = record['zone']
+        zone_id = zone_ids.get(zone)
+        if zone_id is None:
+            zone_id = zone_ids[zone] = len(zones)
+            zones.append(zone)
+        guild = guild_name_of(username) or ''
+        guild_id = guild_ids.get(guild)
+        if guild_id is None:
+            guild_id = guild_ids[guild] = len(guilds)
+            guilds.append(guild)
+        usernames.append(username)
+        zone_column.append(zone_id)
+        guild_column.append(guild_id)
+        group_sizes.append(record['group_size'])
+        distances.append(distance)
+        updated_at.append(int((record['timestamp'] - _EPOCH_START).total_seconds()))
+    return {'v': COLUMNAR_VERSION, 'zones': zones, 'guilds': guilds, 'username': usernames,
+            'zone': zone_column, 'guild': guild_column, 'group_size': group_sizes,
+            'distance': distances, 'updated_at': updated_at}
+
+
+def decode_location_columns(columns):
+    """열 기반 형식을 기존 JSON 행 목록과 같은 딕셔너리 목록으로 되돌립니다. (클라이언트용)"""
+    zones, guilds = columns['zones'], columns['guilds']
+    clock = {}  # 같은 초에 갱신된 행이 많으므로 시각 문자열을 한 번만 만듦
+    rows = []
+    for username, zone_id, guild_id, group_size, distance, timestamp in zip(
+            columns['username'], columns['zone'], columns['guild'],
+            columns['group_size'], columns['distance'], columns['updated_at']):
+        last_updated = clock.get(timestamp)
+        if last_updated is None:
+            last_updated = clock[timestamp] = \
+                (_EPOCH_START + timedelta(seconds=timestamp)).strftime('%H:%M:%S')
+        rows.append({'username': username, 'guild_name': guilds[guild_id],
+                     'zone': zones[zone_id], 'group_size': group_size,
+                     'distance': distance, 'last_updated': last_updated})
+    return rows
+
+
+def serialize(body, media_type):
+    """응답 본문을 media_type에 맞는 bytes로 직렬화합니다."""
+    if media_type == FORMAT_MSGPACK:
+        return msgpack.packb(body, use_bin_type=True)
+    return json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def deserialize(payload, media_type):
+    if media_type.startswith(FORMAT_MSGPACK):
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload)
+
+
+def compress(payload, encoding):
+    """(본문, 실제 적용한 Content-Encoding 또는 None)을 반환합니다."""
+    if encoding is None or len(payload) < COMPRESS_MIN_BYTES:
+        return payload, None
+    if encoding == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(payload), 'zstd'
+    return gzip.compress(payload, compresslevel=GZIP_LEVEL), 'gzip'
+
+
+def decompress(payload, encoding):
+    if encoding == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(payload)
+    if encoding == 'gzip':
+        return gzip.decompress(payload)
+    return payload
@@ -0,0 +1,270 @@
+"""
+- 2026-10-18 - [추가] - v3.23.0: 컴파일된 맵 데이터 파일과 공용 지역 레지스트리
+- 기능: map_data.json을 빌드 단계에서 바이너리 파일(map_data.bin)로 컴파일
+  (지역 ID 인터닝, CSR 인접 배열, 지역 타입, OCR용 정규화 이름, 홉 거리 테이블 포함)
+- 기능: ZoneRegistry는 이 파일을 mmap으로 열고 배열은 memoryview로 그대로 사용하므로
+  시작 시 JSON 파싱/BFS가 없고, 같은 파일을 여는 프로세스들이 페이지 캐시를 공유
+- 기능: 경로를 모듈 위치 기준으로 계산하여 다른 디렉터리에서 실행해도 동작
+- 기능: 컴파일 파일이 없거나 map_data.json보다 오래되었으면(원본 CRC 불일치) 메모리에서 다시
+  컴파일
+- 빌드: `python tools/build_map_data.py` 또는 `python -m src.core.zone_registry`
+  (map_data.json을 고친 뒤 실행)
+
+파일 형식 (리틀 엔디언)
+- 헤더: 매직 b'BZRG', 형식 버전(u16), 홉 테이블 항목 크기(u16, 1 또는 2), 원본 JSON CRC32(u32),
+  지역 수(u32), 인접 항목 수(u32), 섹션 수(u32)
+- 섹션 목록: 섹션마다 (시작 위치 u32, 길이 u32), 각 섹션은 4바이트 정렬
+- 섹션 순서: 지역 이름('\\0'으로 연결한 UTF-8), 정규화 이름(같은 형식), 타입 이름(같은 형식),
+  지역별 타입 번호(u8, 타입 없음 0xFF), 지역별 플래그(u8, 1 = MAP_CONNECTIONS에 등장),
+  인접 시작 위치(u32, 지역 수 + 1), 인접 지역 ID(u16), 홉 거리 테이블(u8/u16, 지역 수 x 지역 수)
+
+- 2026-10-18 - [수정] - v3.27.1: 불러올 때 map_data.bin을 쓰지 않음
+- 기능: CRC 불일치/파일 손상 시 메모리에서만 컴파일하고, 파일은 빌드 단계에서만 갱신
+"""
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from collections import deque
+
+MAGIC = b'BZRG'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<4sHHIIII')
+_SECTION = struct.Struct('<II')
+_SECTION_COUNT = 8
+_NO_TYPE = 0xFF
+FLAG_CONNECTED = 1
+
+_CORE_DIR = os.path.dirname(os.path.abspath(__file__))
+MAP_DATA_JSON_PATH = os.path.join(_CORE_DIR, 'map_data.json')
+MAP_DATA_BIN_PATH = os.path.join(_CORE_DIR, 'map_data.bin')
+
+
+class RegistryError(ValueError):
+    """컴파일된 맵 데이터 파일이 손상되었거나 형식이 맞지 않을 때 발생합니다."""
+
+
+def normalize_zone_name(name):
+    """OCR 결과 비교용으로 공백을 모두 없애고 소문자로 바꿉니다."""
+    return "".join(name.split()).lower()
+
+
+def build_hop_table(offsets, neighbors, zone_count):
+    """
+    모든 지역에서 BFS를 한 번씩 수행해 (지역 수 x 지역 수) 홉 거리 테이블을 만듭니다.
+    최대 거리가 254 이하이면 uint8('B'), 아니면 uint16('H') 배열이며,
+    도달할 수 없는 쌍은 해당 타입의 최댓값으로 채웁니다.
+    """
+    table = array('H', [0xFFFF]) * (zone_count * zone_count)
+    max_distance = 0
+    for source in range(zone_count):
+        row = source * zone_count
+        table[row + source] = 0
+        queue = deque([source])
+        while queue:
+            current = queue.popleft()
+            next_distance = table[row + current] + 1
+            for neighbor in neighbors[offsets[current]:offsets[current + 1]]:
+                if table[row + neighbor] == 0xFFFF:
+                    table[row + neighbor] = next_distance
+                    max_distance = max(max_distance, next_distance)
+                    queue.append(neighbor)
+    if max_distance < 0xFF:
+        return array('B', (0xFF if d == 0xFFFF else d for d in table))
+    return table
+
+
+def compile_map_data(map_data, source_crc=0):
+    """map_data.json 내용({'ZONE_TYPES', 'MAP_CONNECTIONS'})을 컴파일된 파일 bytes로 만듭니다."""
+    zone_types = map_data.get("ZONE_TYPES", {})
+    connections = map_data.get("MAP_CONNECTIONS", {})
+    adjacency = {}
+    for zone, zone_neighbors in connections.items():
+        adjacency.setdefault(zone, {})
+        for neighbor in zone_neighbors:
+            adjacency.setdefault(neighbor, {})
+            if neighbor != zone:  # 양방향으로 만들고 중복 연결은 하나로
+                adjacency[zone][neighbor] = None
+                adjacency[neighbor][zone] = None
+    names = sorted(set(adjacency) | set(zone_types))
+    ids = {zone: zone_id for zone_id, zone in enumerate(names)}
+    type_names = sorted(set(zone_types.values()))
+    type_ids = {zone_type: type_id for type_id, zone_type in enumerate(type_names)}
+
+    offsets, neighbors = array('I', [0]), array('H')
+    for zone in names:
+        neighbors.extend(sorted(ids[neighbor] for neighbor in adjacency.get(zone, ())))
+        offsets.append(len(neighbors))
+    hops = build_hop_table(offsets, neighbors, len(names))
+    if sys.byteorder != 'little':
+        for values in (offsets, neighbors, hops):
+            values.byteswap()
+
+    sections = [
+        '\0'.join(names).encode('utf-8'),
+        '\0'.join(normalize_zone_name(zone) for zone in names).encode('utf-8'),
+        '\0'.join(type_names).encode('utf-8'),
+        bytes(type_ids[zone_types[zone]] if zone in zone_types else _NO_TYPE for zone in names),
+        bytes(FLAG_CONNECTED if zone in adjacency else 0 for zone in names),
+        offsets.tobytes(), neighbors.tobytes(), hops.tobytes(),
+    ]
+    position = _HEADER.size + _SECTION.size * len(sections)
+    directory, body = [], []
+    for data in sections:
+        padding = -position % 4
+        body.append(b'\0' * padding + data)
+        position += padding
+        directory.append(_SECTION.pack(position, len(data)))
+        position += len(data)
+    header = _HEADER.pack(MAGIC, FORMAT_VERSION, hops.itemsize, source_crc, len(names),
+                          len(neighbors), len(sections))
+    return b''.join([header, *directory, *body])
+
+
+def compile_map_file(json_path=MAP_DATA_JSON_PATH, bin_path=MAP_DATA_BIN_PATH):
+    """빌드 단계: json_path를 컴파일해 bin_path에 원자적으로 저장하고 그 bytes를 반환합니다."""
+    with open(json_path, 'rb') as f:
+        source = f.read()
+    data = compile_map_data(json.loads(source), zlib.crc32(source))
+    temp_path = f"{bin_path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+    os.replace(temp_path, bin_path)
+    return data
+
+
+class ZoneRegistry:
+    """
+    컴파일된 맵 데이터를 읽기 전용으로 제공합니다.
+    - names / ids: 지역 이름 <-> 정수 ID, normalized: ID 순서의 정규화 이름
+    - types: {지역 이름: 타입} (타입이 있는 지역만), zone_type(ID): 타입 또는 None
+    - offsets / adjacency: CSR 인접 배열 (adjacency[offsets[i]:offsets[i + 1]]이 i의 이웃)
+    - hops / unreachable: 홉 거리 테이블 (hops[a * count + b])과 도달 불가 값
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer  # mmap이면 memoryview가 살아 있는 동안 열어 둠
+        view = memoryview(buffer)
+        try:
+            magic, version, hop_size, self.source_crc, count, edge_count, section_count = \
+                _HEADER.unpack_from(view, 0)
+            if magic != MAGIC or version != FORMAT_VERSION or section_count != _SECTION_COUNT:
+                raise RegistryError(f"지원하지 않는 맵 데이터 형식입니다: {magic!r} v{version}")
+            sections = []
+            for index in range(section_count):
+                start, length = _SECTION.unpack_from(view, _HEADER.size + _SECTION.size * index)
+                if start + length > len(view):
+                    raise RegistryError("맵 데이터 파일이 잘려 있습니다.")
+                sections.append(view[start:start + length])
+            names, normalized, type_names, zone_types, flags, offsets, adjacency, hops = sections
+
+            self.count = count
+            self.names = bytes(names).decode('utf-8').split('\0') if count else []
+            self.normalized = bytes(normalized).decode('utf-8').split('\0') if count else []
+            type_names = bytes(type_names).decode('utf-8').split('\0') if len(type_names) else []
+            self.ids = {zone: zone_id for zone_id, zone in enumerate(self.names)}
+            self._type_names = type_names
+            self._zone_types = zone_types
+            self._flags = flags
+            self.types = {zone: type_names[zone_types[zone_id]]
+                          for zone_id, zone in enumerate(self.names)
+                          if zone_types[zone_id] != _NO_TYPE}
+            self.offsets = self._cast(offsets, 'I')
+            self.adjacency = self._cast(adjacency, 'H')
+            self.hops = self._cast(hops, 'B' if hop_size == 1 else 'H')
+        except (struct.error, UnicodeDecodeError, IndexError, TypeError) as e:
+            raise RegistryError(f"맵 데이터 파일을 읽을 수 없습니다: {e}") from e
+        self.unreachable = 0xFF if hop_size == 1 else 0xFFFF
+        if (len(self.names) != count or len(self.normalized) != count
+                or len(self.offsets) != count + 1 or len(self.adjacency) != edge_count
+                or len(self.hops) != count * count):
+            raise RegistryError("맵 데이터 파일의 섹션 크기가 맞지 않습니다.")
+
+    @staticmethod
+    def _cast(view, typecode):
+        if typecode == 'B' or sys.byteorder == 'little':
+            return view.cast(typecode)
+        values = array(typecode, bytes(view))  # 빅 엔디언 환경에서는 복사해서 바이트 순서 변환
+        values.byteswap()
+        return values
+
+    @classmethod
+    def from_file(cls, path):
+        """path를 읽기 전용 mmap으로 엽니다. (빈 파일이면 RegistryError)"""
+        with open(path, 'rb') as f:
+            try:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError as e:
+                raise RegistryError(f"맵 데이터 파일이 비어 있습니다: {path}") from e
+        return cls(buffer)
+
+    def zone_type(self, zone_id):
+        type_id = self._zone_types[zone_id]
+        return None if type_id == _NO_TYPE else self._type_names[type_id]
+
+    def is_connected(self, zone_id):
+        """MAP_CONNECTIONS에 등장하는 지역인지 여부입니다. (이웃이 없어도 True일 수 있음)"""
+        return bool(self._flags[zone_id] & FLAG_CONNECTED)
+
+    def neighbors(self, zone_id):
+        return self.adjacency[self.offsets[zone_id]:self.offsets[zone_id + 1]]
+
+
+def _source_crc(json_path):
+    try:
+        with open(json_path, 'rb') as f:
+            return zlib.crc32(f.read())
+    except OSError:
+        return None
+
+
+def load_zone_registry(bin_path=MAP_DATA_BIN_PATH, json_path=MAP_DATA_JSON_PATH):
+    """
+    컴파일된 파일을 열어 ZoneRegistry를 반환합니다. 파일이 없거나 손상되었거나 map_data.json과
+    맞지 않으면 JSON에서 메모리로만 다시 컴파일합니다. (파일은 쓰지 않음, JSON도 없으면 컴파일된
+    파일만 사용, 둘 다 없으면 빈 레지스트리)
+    """
+    source_crc = _source_crc(json_path)
+    try:
+        registry = ZoneRegistry.from_file(bin_path)
+        if source_crc is None or registry.source_crc == source_crc:
+            return registry
+        print(f"맵 데이터 파일이 map_data.json과 다릅니다. 다시 컴파일합니다: {bin_path}")
+    except FileNotFoundError:
+        pass
+    except (OSError, RegistryError) as e:
+        print(f"맵 데이터 파일을 열 수 없어 다시 컴파일합니다: {e}")
+    if source_crc is None:
+        print("오류: map_data.json 파일을 찾을 수 없거나 파일이 손상되었습니다.")
+        return ZoneRegistry(compile_map_data({}))
+    try:
+        with open(json_path, 'rb') as f:
+            source = f.read()
+        registry = ZoneRegistry(compile_map_data(json.loads(source), zlib.crc32(source)))
+    except (OSError, json.JSONDecodeError):
+        print("오류: map_data.json 파일을 찾을 수 없거나 파일이 손상되었습니다.")
+        return ZoneRegistry(compile_map_data({}))
+    print("메모리에서 컴파일한 맵 데이터를 사용합니다. "
+          "`python tools/build_map_data.py`로 map_data.bin을 갱신하세요.")
+    return registry
+
+
+_registry = None
+
+
+def get_zone_registry():
+    """프로세스 전체가 공유하는 ZoneRegistry입니다. (처음 호출할 때 불러옴)"""
+    global _registry
+    if _registry is None:
+        _registry = load_zone_registry()
+    return _registry
+
+
+if __name__ == '__main__':
+    compiled = compile_map_file()
+    registry = ZoneRegistry(compiled)
+    print(f"{MAP_DATA_BIN_PATH}: {len(compiled)} bytes, 지역 {registry.count}개, "
+          f"인접 항목 {len(registry.adjacency)}개, 홉 테이블 {registry.hops.itemsize}바이트/항목")
@@ -0,0 +1,361 @@
+"""
+- 2026-10-18 - [추가] - v3.13.0: asyncio 서버 모드
+- 기능: /register, /verify, /update-location, /get-locations, /metrics를 이벤트 루프 하나로 처리
+- 기능: 요청마다 스레드를 점유하지 않으므로 한 프로세스가 수천 개의 keep-alive 연결을 유지
+- 기능: 게임 정보 API 조회는 GameInfoClient의 비동기 조회를 기다리고(await),
+  SQLAlchemy DB 작업은 작은 스레드 풀에서 실행하여 이벤트 루프를 막지 않음
+- 실행: `python -m src.server.async_server` (내장 HTTP/1.1 서버)
+  또는 uvicorn이 설치되어 있으면 `uvicorn src.server.async_server:application` (ASGI)
+- 참고: 위치 스트림(/stream-locations)은 기존 Flask 서버에서만 제공
+- 2026-10-18 - [수정] - v3.15.0: 위치 일괄 갱신(/update-locations) 라우트 추가
+- 2026-10-18 - [수정] - v3.16.0: 위치 하트비트(/heartbeat) 라우트 추가
+- 2026-10-18 - [수정] - v3.17.0: /get-locations 응답 형식 협상 및 압축
+- 2026-10-18 - [수정] - v3.19.0: 시작 시 위치 스냅샷 복원, 종료 시 저장
+- 2026-10-18 - [수정] - v3.20.0: 위치 이력 조회(/location-history) 라우트 및 이력 기록 시작/중지
+- 2026-10-18 - [수정] - v3.21.0: 지역 활동 히트맵(/zone-heatmap) 라우트 추가
+- 2026-10-18 - [수정] - v3.22.0: 가중치 경로 탐색(/route) 라우트 추가
+- 2026-10-18 - [수정] - v3.25.0: 요청 제한(429, Retry-After) 적용
+- 2026-10-18 - [수정] - v3.27.0: 길드 정보 주기적 갱신 시작/중지
+- 2026-10-18 - [수정] - v3.27.1: sqlite 위치 저장소를 쓰면 위치 저장소 접근을 스레드 풀에서 실행
+- 2026-10-18 - [수정] - v3.27.1: ASGI 시작 시 DB 마이그레이션을 먼저 적용 (job_state 테이블 보장)
+
+"""
+import asyncio
+import functools
+import json
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+from werkzeug.http import parse_etags
+
+from src.config.settings import (
+    ASYNC_SERVER_HOST, ASYNC_SERVER_PORT, ASYNC_DB_WORKERS, ASYNC_KEEPALIVE_TIMEOUT_SECONDS,
+    ASYNC_MAX_BODY_BYTES, VERIFY_ASYNC_GUILD_LOOKUP, LOCATION_STORE_BACKEND,
+)
+from src.core.wire_format import negotiate_format
+from src.server.database import migrate_database
+from src.server.metrics import REGISTRY, CONTENT_TYPE
+from src.server.run_server import (
+    app, gameinfo_client, verified_users, apply_guild_info, initialize_dummy_users,
+    handle_register, find_verify_target, complete_verification, handle_update_location,
+    handle_update_locations, handle_heartbeat, handle_get_locations, encode_location_response,
+    HTTP_REQUESTS, HTTP_REQUEST_SECONDS, start_location_snapshots, stop_location_snapshots,
+    handle_location_history, start_location_history, stop_location_history, handle_zone_heatmap,
+    handle_route, check_rate_limit, start_guild_refresh, stop_guild_refresh,
+)
+
+JSON_CONTENT_TYPE = 'application/json'
+
+
+class AsyncLocationAPI:
+    """
+    Flask 서버와 같은 처리 로직(run_server.handle_*)을 코루틴으로 감싼 라우터입니다.
+    dispatch()는 (상태 코드, [(헤더 이름, 값)], 본문 bytes)를 반환하며,
+    내장 HTTP 서버(AsyncHTTPServer)와 ASGI 어댑터(application)가 함께 사용합니다.
+    """
+
+    def __init__(self, db_workers=ASYNC_DB_WORKERS):
+        self._db_executor = ThreadPoolExecutor(max_workers=db_workers,
+                                               thread_name_prefix="async-db")
+        self.routes = {
+            '/register': ('POST', self.register),
+            '/verify': ('POST', self.verify),
+            '/update-location': ('POST', self.update_location),
+            '/update-locations': ('POST', self.update_locations),
+            '/heartbeat': ('POST', self.heartbeat),
+            '/get-locations': ('POST', self.get_locations),
+            '/location-history': ('POST', self.location_history),
+            '/zone-heatmap': ('POST', self.zone_heatmap),
+            '/route': ('POST', self.route),
+        }
+
+    async def run_db(self, func, *args):
+        """앱 컨텍스트가 필요한 동기 DB 작업을 스레드 풀에서 실행합니다."""
+        def call():
+            with app.app_context():
+                return func(*args)
+
+        return await asyncio.get_running_loop().run_in_executor(self._db_executor, call)
+
+    async def run_store(self, func, *args, **kwargs):
+        """
+        위치 저장소를 쓰는 처리 함수를 실행합니다. 인메모리 저장소는 바로 호출하고,
+        sqlite 저장소는 파일 I/O로 이벤트 루프를 막지 않도록 스레드 풀에서 실행합니다.
+        """
+        if LOCATION_STORE_BACKEND == 'memory':
+            return func(*args, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._db_executor, functools.partial(func, *args, **kwargs))
+
+    # --- 라우트: (응답 본문, 상태 코드[, 추가 헤더]) 반환 ---
+    async def register(self, data, headers):
+        return await self.run_db(handle_register, data)
+
+    async def verify(self, data, headers):
+        username = data.get('username')
+        server, error = await self.run_db(find_verify_target, data)
+        if error:
+            return error
+        if VERIFY_ASYNC_GUILD_LOOKUP:
+            result = await self.run_db(complete_verification, username, None, True)
+            gameinfo_client.lookup_player_async(
+                username, server, callback=lambda player: apply_guild_info(username, player))
+            return result
+        player_data = await asyncio.wrap_future(
+            gameinfo_client.lookup_player_async(username, server))
+        return await self.run_db(complete_verification, username, player_data)
+
+    async def verified_user(self, username):
+        """인증 사용자 캐시 항목을 반환합니다. 캐시 미스일 때만 DB를 확인합니다. (없으면 False)"""
+        user_info = verified_users.peek(username)
+        if user_info is None and username:
+            # 다른 프로세스에서 인증된 사용자
+            user_info = await self.run_db(verified_users.get, username)
+        return user_info or False
+
+    async def update_location(self, data, headers):
+        verified = await self.verified_user(data.get('username'))
+        return await self.run_store(handle_update_location, data, verified=verified)
+
+    async def heartbeat(self, data, headers):
+        verified = await self.verified_user(data.get('username'))
+        return await self.run_store(handle_heartbeat, data, verified=verified)
+
+    async def update_locations(self, data, headers):
+        updates = data.get('updates')
+        usernames = {update.get('username') for update in updates
+                     if isinstance(update, dict)} if isinstance(updates, list) else set()
+        verified = {username: verified_users.peek(username) for username in usernames}
+        missing = [username for username, user_info in verified.items()
+                   if user_info is None and isinstance(username, str)]
+        if missing:
+            verified.update(await self.run_db(verified_users.get_many, missing))
+        return await self.run_store(handle_update_locations, data, verified=verified)
+
+    async def get_locations(self, data, headers):
+        if_none_match = parse_etags(headers.get('if-none-match'))
+        verified = await self.verified_user(data.get('username'))
+        media_type = negotiate_format(headers.get('accept'))
+        body, status, etag = await self.run_store(handle_get_locations, data, if_none_match,
+                                                  verified=verified, media_type=media_type)
+        if not etag:
+            return body, status
+        etag_headers = [('ETag', f'"{etag}"'), ('Cache-Control', 'private, no-cache')]
+        if status != 200:
+            return body, status, etag_headers
+        payload, response_headers = encode_location_response(body, media_type,
+                                                             headers.get('accept-encoding'))
+        return payload, status, response_headers + etag_headers
+
+    async def zone_heatmap(self, data, headers):
+        verified = await self.verified_user(data.get('username'))
+        return handle_zone_heatmap(data, verified=verified)
+
+    async def route(self, data, headers):
+        verified = await self.verified_user(data.get('username'))
+        return await self.run_store(handle_route, data, verified=verified)
+
+    async def location_history(self, data, headers):
+        # 세그먼트 파일을 읽으므로 이벤트 루프를 막지 않도록 스레드 풀에서 실행
+        verified = await self.verified_user(data.get('username'))
+        return await self.run_db(handle_location_history, data, verified)
+
+    # --- 요청 처리 ---
+    async def dispatch(self, method, path, headers, body, client=None):
+        """client는 요청 제한의 사용자 키로 쓰는 클라이언트 주소입니다. (username이 없을 때)"""
+        started = time.perf_counter()
+        path = path.partition('?')[0]
+        route = path if path in self.routes or path == '/metrics' else 'unmatched'
+        try:
+            status, extra_headers, payload = await self._dispatch(method, path, headers, body,
+                                                                  client)
+        except Exception:
+            traceback.print_exc()
+            status, extra_headers, payload = self._json(
+                {'error': '서버 내부 오류가 발생했습니다.'}, 500)
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route, method)
+        HTTP_REQUESTS.inc(route, method, str(status))
+        return status, extra_headers, payload
+
+    async def _dispatch(self, method, path, headers, body, client=None):
+        if path == '/metrics' and method == 'GET':
+            return 200, [('Content-Type', CONTENT_TYPE)], REGISTRY.render().encode('utf-8')
+        if path not in self.routes:
+            return self._json({'error': '존재하지 않는 경로입니다.'}, 404)
+        allowed_method, handler = self.routes[path]
+        if method != allowed_method:
+            return self._json({'error': '허용되지 않는 메서드입니다.'}, 405,
+                              [('Allow', allowed_method)])
+        try:
+            data = json.loads(body or b'null')
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            return self._json({'error': 'JSON 객체 본문이 필요합니다.'}, 400)
+        limited = check_rate_limit(path, client)
+        if limited is not None:
+            return self._json(*limited)
+
+        result = await handler(data, headers)
+        response_body, status = result[0], result[1]
+        extra_headers = result[2] if len(result) > 2 else []
+        if status == 304:
+            return 304, extra_headers, b''
+        if isinstance(response_body, bytes):  # 이미 직렬화된 본문 (Content-Type 포함)
+            return status, extra_headers, response_body
+        return self._json(response_body, status, extra_headers)
+
+    @staticmethod
+    def _json(body, status, extra_headers=()):
+        payload = json.dumps(body, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        return status, [('Content-Type', JSON_CONTENT_TYPE), *extra_headers], payload
+
+
+class AsyncHTTPServer:
+    """
+    asyncio 스트림 위의 최소 HTTP/1.1 서버입니다. (keep-alive, Content-Length 본문만 지원)
+    연결마다 코루틴 하나만 쓰므로 유휴 연결은 소켓 외의 자원을 거의 차지하지 않습니다.
+    """
+
+    def __init__(self, api, host=ASYNC_SERVER_HOST, port=ASYNC_SERVER_PORT,
+                 keepalive_timeout=ASYNC_KEEPALIVE_TIMEOUT_SECONDS,
+                 max_body_bytes=ASYNC_MAX_BODY_BYTES):
+        self.api = api
+        self.host = host
+        self.port = port
+        self.keepalive_timeout = keepalive_timeout
+        self.max_body_bytes = max_body_bytes
+        self.connections = 0
+        self._server = None
+
+    async def start(self):
+        """서버를 시작하고 실제 포트 번호를 반환합니다. (port=0이면 임의 포트)"""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port,
+                                                  backlog=4096)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _handle_connection(self, reader, writer):
+        self.connections += 1
+        try:
+            while await self._handle_request(reader, writer):
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    async def _handle_request(self, reader, writer):
+        """요청 하나를 처리하고, 연결을 계속 유지할지 여부를 반환합니다."""
+        try:
+            head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), self.keepalive_timeout)
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            return False
+        try:
+            request_line, *header_lines = head.decode('latin-1').split('\r\n')
+            method, target, version = request_line.split(' ', 2)
+            headers = {}
+            for line in header_lines:
+                if line:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            await self._write(writer, 400, [], b'', keep_alive=False)
+            return False
+        if 'transfer-encoding' in headers:
+            await self._write(writer, 411, [], b'', keep_alive=False)
+            return False
+        if length > self.max_body_bytes:
+            await self._write(writer, 413, [], b'', keep_alive=False)
+            return False
+        body = await reader.readexactly(length) if length else b''
+
+        connection = headers.get('connection', '').lower()
+        if version == 'HTTP/1.1':
+            keep_alive = connection != 'close'
+        else:
+            keep_alive = connection == 'keep-alive'
+        peer = writer.get_extra_info('peername')
+        status, extra_headers, payload = await self.api.dispatch(method, target, headers, body,
+                                                                 peer[0] if peer else None)
+        await self._write(writer, status, extra_headers, payload, keep_alive)
+        return keep_alive
+
+    @staticmethod
+    async def _write(writer, status, extra_headers, payload, keep_alive):
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}",
+                 f"Content-Length: {len(payload)}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        lines.extend(f"{name}: {value}" for name, value in extra_headers)
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + payload)
+        await writer.drain()
+
+
+api = AsyncLocationAPI()
+
+
+async def application(scope, receive, send):
+    """ASGI 진입점입니다. (예: uvicorn src.server.async_server:application)"""
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                with app.app_context():
+                    migrate_database()
+                    verified_users.warm()
+                start_location_snapshots()
+                start_location_history()
+                start_guild_refresh()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                stop_location_snapshots()
+                stop_location_history()
+                stop_guild_refresh()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    headers = {name.decode('latin-1').lower(): value.decode('latin-1')
+               for name, value in scope['headers']}
+    client = scope.get('client')
+    status, extra_headers, payload = await api.dispatch(scope['method'], scope['path'], headers,
+                                                        b''.join(chunks),
+                                                        client[0] if client else None)
+    await send({'type': 'http.response.start', 'status': status,
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                            for name, value in extra_headers]})
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+if __name__ == '__main__':
+    initialize_dummy_users()
+    with app.app_context():
+        print(f"인증 사용자 캐시 준비 완료: {verified_users.warm()}명")
+    start_location_snapshots()
+    start_location_history()
+    start_guild_refresh()
+    server = AsyncHTTPServer(api)
+    print(f"asyncio 서버 실행 중: http://{server.host}:{server.port}")
+    try:
+        asyncio.run(server.serve_forever())
+    finally:
+        stop_location_snapshots()
+        stop_location_history()
+        stop_guild_refresh()
@@ -5,9 +5,28 @@
 - 기능: User 모델에 guild_name, guild_id 컬럼 추가
 - 2025-08-09 - [수정] - v1.5.6: 서버 정보 필드 추가
 - 기능: User 모델에 server 컬럼 추가
+- 2026-10-18 - [수정] - v3.26.0: SQLite 튜닝, 대소문자 무시 조회, 일괄 upsert, 스키마 마이그레이션
+- 기능: 연결 풀 설정과 연결마다 WAL 등 PRAGMA 적용 (engine_options, configure_sqlite)
+- 기능: find_user/find_users가 username을 대소문자 구분 없이 (NOCASE 인덱스로) 조회
+- 기능: bulk_register_users/bulk_update_guilds가 여러 사용자의 등록/길드 정보를
+  트랜잭션 하나로 반영
+- 기능: PRAGMA user_version에 적용한 마이그레이션 번호를 기록하고,
+  시작 시 남은 것만 적용 (migrate_database)
+- 2026-10-18 - [수정] - v3.27.0: 백그라운드 작업 진행 상태(job_state) 테이블과 인증 사용자 배치 조회
 
 """
+import json
+import string
+from collections import namedtuple
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, select, text, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from src.config.settings import (
+    SERVER_DB_BUSY_TIMEOUT_SECONDS, SERVER_DB_MAX_OVERFLOW, SERVER_DB_POOL_SIZE,
+    SERVER_DB_POOL_TIMEOUT_SECONDS, SERVER_DB_PRAGMAS,
+)
 
 db = SQLAlchemy()
 
@@ -21,4 +40,203 @@ class User(db.Model):
     server = db.Column(db.String(20), nullable=True) # 예: 'East (Asia)'
 
     def __repr__(self):
-        return f'<User {self.username}>'
\ No newline at end of file
+        return f'<User {self.username}>'
+
+
+# --- v3.26.0 추가: 연결 풀 / PRAGMA ---
+def engine_options(uri):
+    """
+    SQLALCHEMY_ENGINE_OPTIONS로 쓸 연결 풀 설정입니다.
+    파일 SQLite는 스레드 간에 연결을 재사용하는 QueuePool을 쓰고, 메모리 DB는 기본값을 씁니다.
+    """
+    if uri.startswith('sqlite') and (':memory:' in uri or uri.rstrip('/') == 'sqlite:'):
+        return {}
+    options = {'pool_size': SERVER_DB_POOL_SIZE, 'max_overflow': SERVER_DB_MAX_OVERFLOW,
+               'pool_timeout': SERVER_DB_POOL_TIMEOUT_SECONDS}
+    if uri.startswith('sqlite'):
+        options['connect_args'] = {'timeout': SERVER_DB_BUSY_TIMEOUT_SECONDS,
+                                   'check_same_thread': False, 'cached_statements': 256}
+    return options
+
+
+def configure_sqlite(engine, pragmas=SERVER_DB_PRAGMAS):
+    """SQLite 엔진이면 새 연결마다 pragmas를 적용합니다."""
+    if engine.dialect.name != 'sqlite':
+        return
+
+    @event.listens_for(engine, 'connect')
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+
+# --- v3.26.0 추가: 스키마 마이그레이션 (번호, 설명, SQL 문자열 또는 함수(connection)) ---
+MIGRATIONS = [
+    (1, "초기 스키마 (user 테이블)", lambda connection: db.metadata.create_all(connection)),
+    (2, "username 대소문자 무시 인덱스",
+     "CREATE INDEX IF NOT EXISTS ix_user_username_nocase ON user (username COLLATE NOCASE)"),
+    (3, "백그라운드 작업 진행 상태 테이블",
+     "CREATE TABLE IF NOT EXISTS job_state (name VARCHAR(50) PRIMARY KEY, value TEXT NOT NULL)"),
+]
+
+
+def migrate_database(engine=None):
+    """
+    적용되지 않은 마이그레이션을 순서대로 적용하고 현재 스키마 번호를 반환합니다. (앱 컨텍스트 필요)
+    마이그레이션마다 트랜잭션 하나로 실행하며, SQLite가 아니면 create_all만 수행합니다.
+    """
+    engine = engine or db.engine
+    if engine.dialect.name != 'sqlite':
+        db.metadata.create_all(engine)
+        return None
+    with engine.connect() as connection:
+        current = connection.exec_driver_sql("PRAGMA user_version").scalar()
+    for version, description, step in MIGRATIONS:
+        if version <= current:
+            continue
+        with engine.begin() as connection:
+            if callable(step):
+                step(connection)
+            else:
+                connection.exec_driver_sql(step)
+            connection.exec_driver_sql(f"PRAGMA user_version = {version:d}")
+        print(f"DB 마이그레이션 {version} 적용: {description}")
+        current = version
+    return current
+
+
+# --- v3.26.0 추가: 대소문자 무시 조회 / 일괄 반영 ---
+# 캐시(VerifiedUserCache.refresh)에 넘길 수 있는 User 모델의 읽기 전용 사본
+UserRow = namedtuple('UserRow', 'id username is_verified server guild_name guild_id')
+_USER_COLUMNS = (User.id, User.username, User.is_verified, User.server, User.guild_name,
+                 User.guild_id)
+_NOCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+_IN_CHUNK = 500  # IN (...) 하나에 넣는 최대 이름 수
+
+
+def nocase_key(username):
+    """SQLite NOCASE와 같은 규칙(ASCII만 소문자로)으로 비교용 키를 만듭니다."""
+    return username.translate(_NOCASE)
+
+
+def find_user(username, verified=None):
+    """username과 대소문자만 다른 사용자도 찾습니다. (여럿이면 이름이 정확히 같은 사용자 우선)"""
+    if not isinstance(username, str) or not username:
+        return None
+    query = User.query.filter(User.username.collate('NOCASE') == username)
+    if verified is not None:
+        query = query.filter(User.is_verified.is_(verified))
+    return query.order_by((User.username == username).desc()).first()
+
+
+def _select_users(usernames, verified=None):
+    """{정확한 이름: UserRow}와 {NOCASE 키: UserRow}를 함께 반환합니다."""
+    exact, folded = {}, {}
+    usernames = list(dict.fromkeys(name for name in usernames if isinstance(name, str) and name))
+    for start in range(0, len(usernames), _IN_CHUNK):
+        statement = select(*_USER_COLUMNS).where(
+            User.username.collate('NOCASE').in_(usernames[start:start + _IN_CHUNK]))
+        if verified is not None:
+            statement = statement.where(User.is_verified.is_(verified))
+        for row in db.session.execute(statement):
+            user = UserRow(*row)
+            exact[user.username] = user
+            folded.setdefault(nocase_key(user.username), user)
+    return exact, folded
+
+
+def find_users(usernames, verified=None):
+    """{요청한 이름: UserRow}를 찾은 사용자만 담아 반환합니다. (쿼리는 이름 500개당 한 번)"""
+    exact, folded = _select_users(usernames, verified)
+    found = {}
+    for username in usernames:
+        if isinstance(username, str) and username:
+            user = exact.get(username) or folded.get(nocase_key(username))
+            if user is not None:
+                found[username] = user
+    return found
+
+
+def bulk_register_users(registrations):
+    """
+    [(username, server), ...]를 트랜잭션 하나로 등록(upsert)합니다.
+    없는 사용자는 INSERT ... ON CONFLICT DO UPDATE 한 번으로 추가하고, 있는 사용자는 server만
+    일괄 UPDATE합니다. 반환: 입력 순서대로 (UserRow, 새로 만들었는지, 이전 server)
+    같은 사용자가 여러 번 있으면 앞의 것부터 차례로 적용한 것과 같습니다.
+    """
+    exact, folded = _select_users([username for username, _ in registrations])
+    current, created, results = {}, {}, []
+    for username, server in registrations:
+        key = nocase_key(username)
+        user = current.get(key) or exact.get(username) or folded.get(key)
+        if user is None:
+            user = UserRow(None, username, False, server, None, None)
+            created[key] = user
+            results.append((user, True, None))
+        else:
+            results.append((user._replace(server=server), False, user.server))
+            user = user._replace(server=server)
+            if key in created:
+                created[key] = user
+        current[key] = user
+
+    if created:
+        statement = sqlite_insert(User).values([
+            {'username': user.username, 'server': user.server, 'is_verified': False}
+            for user in created.values()])
+        db.session.execute(statement.on_conflict_do_update(
+            index_elements=[User.username], set_={'server': statement.excluded.server}))
+    updates = [{'id': user.id, 'server': user.server}
+               for key, user in current.items() if key not in created]
+    if updates:
+        db.session.execute(update(User), updates)
+    db.session.commit()
+    return results
+
+
+def bulk_update_guilds(guilds, commit=True):
+    """
+    [(username, guild_name, guild_id), ...]로 길드 정보를 트랜잭션 하나로 갱신합니다.
+    반환: 갱신한 사용자의 UserRow 목록 (등록되지 않은 사용자는 건너뜀)
+    commit=False면 같은 트랜잭션에서 다른 변경(예: save_job_state)과 함께 커밋할 수 있습니다.
+    """
+    found = find_users([username for username, _, _ in guilds])
+    updated = {}
+    for username, guild_name, guild_id in guilds:
+        user = found.get(username)
+        if user is not None:
+            updated[user.id] = user._replace(guild_name=guild_name, guild_id=guild_id)
+    if updated:
+        db.session.execute(update(User), [
+            {'id': user.id, 'guild_name': user.guild_name, 'guild_id': user.guild_id}
+            for user in updated.values()])
+        if commit:
+            db.session.commit()
+    return list(updated.values())
+
+
+def verified_users_after(last_id, limit):
+    """id가 last_id보다 큰 인증 사용자를 id 순으로 최대 limit명 UserRow로 반환합니다."""
+    statement = (select(*_USER_COLUMNS)
+                 .where(User.is_verified.is_(True), User.id > last_id)
+                 .order_by(User.id).limit(limit))
+    return [UserRow(*row) for row in db.session.execute(statement)]
+
+
+# --- v3.27.0 추가: 백그라운드 작업 진행 상태 (이름 -> JSON, 재시작 후 이어서 진행) ---
+def load_job_state(name):
+    """저장된 작업 상태(dict)를 반환합니다. 없으면 None."""
+    value = db.session.execute(text("SELECT value FROM job_state WHERE name = :name"),
+                               {'name': name}).scalar()
+    return json.loads(value) if value is not None else None
+
+
+def save_job_state(name, state, commit=True):
+    db.session.execute(
+        text("INSERT INTO job_state (name, value) VALUES (:name, :value) "
+             "ON CONFLICT (name) DO UPDATE SET value = excluded.value"),
+        {'name': name, 'value': json.dumps(state)})
+    if commit:
+        db.session.commit()
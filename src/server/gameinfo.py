@@ -0,0 +1,163 @@
+"""
+- 2026-10-18 - [추가] - v3.6.0: 알비온 게임 정보 API 클라이언트
+- 기능: (서버, 소문자 이름) 기준 TTL + LRU 캐시로 플레이어/길드 조회 결과 재사용
+- 기능: 같은 이름에 대한 동시 조회를 하나의 외부 요청으로 합침(single-flight)
+- 기능: 백그라운드 스레드 풀을 이용한 비동기 조회 제공
+- 2026-10-18 - [수정] - v3.12.0: 캐시 적중/외부 API 지연 지표 기록
+- 2026-10-18 - [수정] - v3.27.1: 조회 수 지표를 클라이언트별로 지정 (lookups=None이면 기록 안 함)
+- 기능: 캐시를 쓰지 않는 길드 갱신용 클라이언트가 캐시 적중률 지표를 낮추지 않도록 함
+- 2026-10-18 - [수정] - v3.27.1: 외부 API 호출마다 출력하던 로그 제거 (지연/결과는 지표로 확인)
+
+"""
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.config.settings import (
+    API_SERVERS, GAMEINFO_TIMEOUT_SECONDS, GAMEINFO_CACHE_TTL_SECONDS,
+    GAMEINFO_CACHE_NEGATIVE_TTL_SECONDS, GAMEINFO_CACHE_MAX_ENTRIES, GAMEINFO_MAX_WORKERS,
+)
+from src.server.metrics import counter, histogram
+
+# result: 'hit'(캐시 적중), 'coalesced'(진행 중인 조회에 합류), 'miss'(외부 API 호출)
+GAMEINFO_LOOKUPS = counter('beacon_gameinfo_lookups_total', "게임 정보 조회 수 (캐시 결과별)",
+                           ('result',))
+GAMEINFO_REQUEST_SECONDS = histogram(
+    'beacon_gameinfo_request_seconds', "게임 정보 API 호출 지연(초)", ('server', 'outcome'))
+
+
+class GameInfoClient:
+    """
+    알비온 게임 정보 API(/search) 조회를 캐시하고 중복 요청을 합치는 클라이언트입니다.
+    API_SERVERS 딕셔너리는 호출 시점에 참조하므로, 테스트에서는 주소를 스텁 서버로 바꿀 수 있습니다.
+    네트워크 오류는 캐시하지 않고, '플레이어 없음' 결과는 짧은 TTL로 캐시합니다.
+    lookups: 캐시 결과별 조회 수를 기록할 카운터 (None이면 기록하지 않음)
+    """
+
+    def __init__(self, api_servers=API_SERVERS, timeout=GAMEINFO_TIMEOUT_SECONDS,
+                 ttl_seconds=GAMEINFO_CACHE_TTL_SECONDS,
+                 negative_ttl_seconds=GAMEINFO_CACHE_NEGATIVE_TTL_SECONDS,
+                 max_entries=GAMEINFO_CACHE_MAX_ENTRIES, max_workers=GAMEINFO_MAX_WORKERS,
+                 lookups=GAMEINFO_LOOKUPS):
+        self.api_servers = api_servers
+        self.lookups = lookups
+        self.timeout = timeout
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(api_servers) or 1, pool_maxsize=max_workers * 2)
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix="gameinfo")
+
+    def lookup_player(self, username, server):
+        """
+        플레이어 정보를 반환합니다.
+        캐시 적중 시 외부 호출을 하지 않고, 같은 키의 조회가 진행 중이면 그 결과를 기다립니다.
+        """
+        key = (server, username.lower())
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                expires_at, player = cached
+                if expires_at > time.monotonic():
+                    self._cache.move_to_end(key)
+                    self._count('hit')
+                    return player
+                del self._cache[key]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+
+        if not owner:
+            self._count('coalesced')
+            return future.result()
+        self._count('miss')
+
+        try:
+            player, cacheable = self._fetch(username, server)
+            if cacheable:
+                self._store(key, player)
+            future.set_result(player)
+            return player
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def lookup_player_async(self, username, server, callback=None):
+        """조회를 백그라운드 스레드에서 실행하고 Future를 반환합니다. (완료 시 callback 호출)"""
+        def run():
+            player = self.lookup_player(username, server)
+            if callback:
+                callback(player)
+            return player
+
+        return self._executor.submit(run)
+
+    def __len__(self):
+        return len(self._cache)
+
+    def hit_ratio(self):
+        """지금까지의 조회 중 외부 API를 호출하지 않은 비율입니다. (조회가 없으면 None)"""
+        if self.lookups is None:
+            return None
+        hits = self.lookups.value('hit') + self.lookups.value('coalesced')
+        total = hits + self.lookups.value('miss')
+        return hits / total if total else None
+
+    def _count(self, result):
+        if self.lookups is not None:
+            self.lookups.inc(result)
+
+    def invalidate(self, username, server):
+        with self._lock:
+            self._cache.pop((server, username.lower()), None)
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _store(self, key, player):
+        ttl = self.ttl_seconds if player else self.negative_ttl_seconds
+        with self._lock:
+            self._cache[key] = (time.monotonic() + ttl, player)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _fetch(self, username, server):
+        """외부 API를 호출해 (플레이어 정보 또는 None, 캐시 가능 여부)를 반환합니다."""
+        base_url = self.api_servers.get(server)
+        if not base_url:
+            return None, False
+        started = time.perf_counter()
+        outcome = 'error'
+        try:
+            response = self._session.get(f"{base_url}/search", params={'q': username},
+                                         timeout=self.timeout)
+            if response.status_code != 200:
+                return None, False
+            data = response.json()
+            outcome = 'ok'
+        except (requests.exceptions.RequestException, ValueError):
+            return None, False
+        finally:
+            GAMEINFO_REQUEST_SECONDS.observe(time.perf_counter() - started, server, outcome)
+        for player in data.get('players', []):
+            if (player.get('Name') or '').lower() == username.lower():
+                return player, True
+        return None, True
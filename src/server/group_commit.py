@@ -0,0 +1,71 @@
+"""
+- 2026-10-18 - [추가] - v3.26.0: 그룹 커밋 (여러 요청의 DB 쓰기를 트랜잭션 하나로 묶음)
+- 기능: 요청 스레드는 항목을 큐에 넣고 결과를 기다리며, 전용 스레드가 큐에 쌓인 항목을
+  한 번에 최대 max_batch개까지 꺼내 apply_batch 한 번(커밋 한 번)으로 반영
+- 기능: 대기 시간을 두지 않으므로 한가할 때는 요청 하나씩 바로 커밋되고, 등록 폭주처럼
+  요청이 몰릴 때만 앞선 커밋이 진행되는 동안 쌓인 요청들이 자연스럽게 한 묶음이 됨
+- 2026-10-18 - [수정] - v3.27.1: 묶음 반영이 실패하면 항목을 하나씩 다시 반영
+- 기능: 잘못된 항목 하나 때문에 같은 묶음의 다른 요청까지 실패하지 않고, 그 항목만 예외를 받음
+
+"""
+import queue
+import threading
+from concurrent.futures import Future
+
+
+class GroupCommitter:
+    """
+    apply_batch(items)는 항목 목록을 받아 같은 순서의 결과 목록을 반환해야 합니다.
+    apply_batch가 예외를 던지면(반영하지 않고 롤백되어야 함) 항목마다 apply_batch([item])로
+    다시 반영하므로, 실패한 항목의 submit 호출만 그 예외를 받습니다.
+    """
+
+    def __init__(self, apply_batch, max_batch, name="group-commit"):
+        self.apply_batch = apply_batch
+        self.max_batch = max_batch
+        self.name = name
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def submit(self, item, timeout=None):
+        """item을 다음 묶음에 넣고, 반영될 때까지 기다려 그 결과를 반환합니다."""
+        if self._thread is None:
+            self._start()
+        future = Future()
+        self._queue.put((item, future))
+        return future.result(timeout)
+
+    def _start(self):
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._apply(batch)
+
+    def _apply(self, batch):
+        try:
+            results = self.apply_batch([item for item, _ in batch])
+        except Exception as e:
+            print(f"{self.name}: {len(batch)}개 항목 반영 실패: {e}")
+            if len(batch) == 1:
+                batch[0][1].set_exception(e)
+                return
+            for entry in batch:
+                self._apply([entry])
+            return
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
@@ -0,0 +1,201 @@
+"""
+- 2026-10-18 - [추가] - v3.27.0: 인증 사용자 길드 정보 주기적 갱신
+- 기능: 인증 사용자를 id 순으로 배치 단위로 읽어 게임 정보 API로 다시 조회하고,
+  길드가 바뀐 사용자만 배치마다 일괄 UPDATE (길드를 떠난 플레이어는 길드 정보를 비움)
+- 기능: 동시 요청 수는 GUILD_REFRESH_CONCURRENCY로, 게임 서버별 요청 속도는 토큰 버킷으로 제한
+- 기능: 요청 처리용 GameInfoClient와 캐시/스레드 풀/연결 풀을 공유하지 않는 전용 클라이언트 사용
+  (갱신 작업이 /verify 조회의 대기열이나 연결을 차지하지 않음)
+- 기능: 배치의 변경 내용과 진행 위치(마지막 사용자 id)를 같은 트랜잭션으로 job_state에 기록하므로
+  재시작하면 마지막으로 반영한 배치 다음부터 이어서 진행
+- 2026-10-18 - [수정] - v3.27.1: 전용 클라이언트의 조회는 게임 정보 캐시 조회 수 지표에 넣지 않음
+  (항상 외부 API를 호출하므로 beacon_gameinfo_cache_hit_ratio를 왜곡함,
+  결과는 GUILD_REFRESH_USERS로 집계)
+- 2026-10-18 - [수정] - v3.27.1: 시계와 대기 함수를 주입할 수 있게 함
+  (테스트에서 실제로 기다리지 않고 서버별 속도 제한 확인)
+
+"""
+import threading
+import time
+from collections import deque
+
+from src.config.settings import (
+    GUILD_REFRESH_BATCH_PAUSE_SECONDS, GUILD_REFRESH_BATCH_SIZE, GUILD_REFRESH_CONCURRENCY,
+    GUILD_REFRESH_INTERVAL_SECONDS, GUILD_REFRESH_RATE_LIMITS,
+)
+from src.server.database import (
+    bulk_update_guilds, db, load_job_state, save_job_state, verified_users_after,
+)
+from src.server.gameinfo import GameInfoClient
+from src.server.metrics import counter
+from src.server.rate_limit import TokenBucket
+
+JOB_NAME = 'guild_refresh'
+
+# result: 'changed'(길드 변경 반영), 'unchanged', 'unavailable'(플레이어 없음/조회 실패, 그대로 둠)
+GUILD_REFRESH_USERS = counter('beacon_guild_refresh_users_total',
+                              "길드 정보 갱신 작업에서 확인한 사용자 수 (결과별)", ('result',))
+
+
+class GuildRefresher:
+    """
+    app: DB 작업에 쓸 Flask 앱, on_update: 길드가 바뀐 UserRow마다 호출
+    (예: run_server.apply_guild_change - 인증 사용자 캐시와 위치 저장소 버전 갱신)
+    client가 없으면 캐시를 쓰지 않는 전용 GameInfoClient를 만듭니다. (항상 최신 정보를 조회)
+    clock: 토큰 버킷에 쓰는 단조 시계, sleep(초): 속도 제한/배치 사이 대기 (중단되면 True 반환,
+    기본은 stop()으로 깨어나는 대기)
+    """
+
+    def __init__(self, app, client=None, on_update=None, batch_size=GUILD_REFRESH_BATCH_SIZE,
+                 concurrency=GUILD_REFRESH_CONCURRENCY, rate_limits=GUILD_REFRESH_RATE_LIMITS,
+                 interval_seconds=GUILD_REFRESH_INTERVAL_SECONDS,
+                 pause_seconds=GUILD_REFRESH_BATCH_PAUSE_SECONDS, clock=time.monotonic,
+                 sleep=None):
+        self.app = app
+        self.client = client or GameInfoClient(ttl_seconds=0, negative_ttl_seconds=0,
+                                               max_entries=0, max_workers=concurrency,
+                                               lookups=None)
+        self.on_update = on_update
+        self.batch_size = batch_size
+        self.rate_limits = rate_limits
+        self.interval_seconds = interval_seconds
+        self.pause_seconds = pause_seconds
+        self._clock = clock
+        self._stop = threading.Event()
+        self._sleep = sleep or self._stop.wait
+        now = clock()
+        self._buckets = {server: TokenBucket(rate, burst, now)
+                         for server, (rate, burst) in rate_limits.items()}
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._thread = None
+
+    @property
+    def running(self):
+        return self._thread is not None
+
+    def state(self):
+        """{'cursor': 다음 배치 시작 전 마지막 사용자 id, 'completed_at': 마지막 완료 유닉스 초}"""
+        with self.app.app_context():
+            return load_job_state(JOB_NAME) or {'cursor': 0, 'completed_at': None}
+
+    def run_pass(self):
+        """
+        저장된 위치부터 전체 인증 사용자를 한 바퀴 갱신합니다.
+        반환: 끝까지 마쳤으면 True, stop()으로 중단됐으면 False
+        (반영하지 못한 배치는 다음 바퀴에서 다시 조회)
+        """
+        state = self.state()
+        cursor = state['cursor']
+        checked = changed = 0
+        started = time.monotonic()
+        while not self._stop.is_set():
+            with self.app.app_context():
+                batch = verified_users_after(cursor, self.batch_size)
+            if not batch:
+                with self.app.app_context():
+                    save_job_state(JOB_NAME, {'cursor': 0, 'completed_at': time.time()})
+                print(f"길드 정보 갱신 완료: {checked}명 확인, {changed}명 변경 "
+                      f"({time.monotonic() - started:.1f}초)")
+                return True
+            players = self._lookup_batch(batch)
+            if players is None:
+                break
+            updated = self._apply_batch(batch, players, batch[-1].id)
+            checked += len(batch)
+            changed += len(updated)
+            cursor = batch[-1].id
+            self._sleep(self.pause_seconds)
+        return False
+
+    def _lookup_batch(self, batch):
+        """
+        {user.id: 플레이어 정보 또는 None}을 반환합니다. 중단되면 None.
+        서버마다 대기열을 두고 토큰이 있는 서버의 사용자부터 요청하므로,
+        한 서버의 속도 제한이 다른 서버의 조회를 막지 않습니다.
+        """
+        pending = {}
+        for user in batch:
+            if user.server in self.client.api_servers:
+                pending.setdefault(user.server, deque()).append(user)
+        futures = []
+        while pending and not self._stop.is_set():
+            now = self._clock()
+            wait = None
+            for server in list(pending):
+                bucket = self._buckets.get(server)
+                delay = bucket.take(now) if bucket is not None else 0.0
+                if delay:
+                    wait = delay if wait is None else min(wait, delay)
+                    continue
+                user = pending[server].popleft()
+                if not pending[server]:
+                    del pending[server]
+                self._slots.acquire()
+                future = self.client.lookup_player_async(user.username, user.server)
+                future.add_done_callback(lambda _: self._slots.release())
+                futures.append((user, future))
+            if wait is not None:
+                self._sleep(wait)
+        players = {}
+        for user, future in futures:
+            try:
+                players[user.id] = future.result()
+            except Exception as e:
+                print(f"길드 정보 갱신: '{user.username}' 조회 실패: {e}")
+                players[user.id] = None
+        return None if self._stop.is_set() else players
+
+    def _apply_batch(self, batch, players, cursor):
+        """바뀐 길드 정보와 진행 위치를 한 트랜잭션으로 기록하고, 바뀐 UserRow 목록을 반환합니다."""
+        changes = []
+        for user in batch:
+            player = players.get(user.id)
+            if player is None:
+                GUILD_REFRESH_USERS.inc('unavailable')
+                continue
+            guild = (player.get('GuildName') or None, player.get('GuildId') or None)
+            if guild == (user.guild_name, user.guild_id):
+                GUILD_REFRESH_USERS.inc('unchanged')
+                continue
+            GUILD_REFRESH_USERS.inc('changed')
+            changes.append((user.username, *guild))
+        with self.app.app_context():
+            state = load_job_state(JOB_NAME) or {'completed_at': None}
+            updated = bulk_update_guilds(changes, commit=False)
+            save_job_state(JOB_NAME, {**state, 'cursor': cursor}, commit=False)
+            db.session.commit()
+        if self.on_update:
+            for user in updated:
+                self.on_update(user)
+        return updated
+
+    # --- 백그라운드 스레드 ---
+    def start(self):
+        """한 바퀴를 마치고 interval_seconds가 지날 때마다 갱신하는 스레드를 시작합니다."""
+        if self.running:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="guild-refresh", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        """진행 중인 조회가 끝나면 멈춥니다. 반영하지 못한 배치는 다음 시작 때 다시 조회합니다."""
+        if not self.running:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                state = self.state()
+                completed_at = state.get('completed_at')
+                if not state['cursor'] and completed_at is not None:
+                    remaining = completed_at + self.interval_seconds - time.time()
+                    if remaining > 0:
+                        self._stop.wait(remaining)
+                        continue
+                self.run_pass()
+            except Exception as e:  # DB 잠금 등은 다음 주기에 다시 시도
+                print(f"길드 정보 갱신 실패: {e}")
+                self._stop.wait(60)
@@ -0,0 +1,558 @@
+"""
+- 2026-10-18 - [추가] - v3.20.0: 위치 이력 로그
+- 기능: 위치 갱신(목격 기록)을 시간 구간별 세그먼트 파일에 덧붙이기만 하는(append-only) 이력 로그
+- 기능: 요청 처리 경로는 메모리 버퍼에 넣기만 하고, 백그라운드 스레드가 모아서 블록 단위로 기록
+- 기능: 세그먼트마다 블록별 (시각 범위, 지역 목록) 색인과 지역 -> 블록 역색인을 두어
+  "지역 X에서 T1~T2 사이의 목격 기록" 조회가 해당 블록만 읽음 (로그 전체를 훑지 않음)
+- 기능: 주기적 압축(compaction) - 보관 기간이 지난 세그먼트 삭제, 닫힌 세그먼트에서
+  같은 위치가 연속된 목격 기록은 처음과 마지막만 남기고, 지역·시각 순으로 다시 써서
+  한 블록에 한 지역만 담기도록 정리
+
+파일 형식 (리틀 엔디언)
+- 세그먼트 seg-{구간 시작 유닉스 초}.log: 블록을 이어 붙인 파일
+- 블록: 헤더(매직 b'BHB1', 본문 길이 u32, 기록 수 u32, 최소/최대 시각 f64) + 본문
+- 본문: 문자열 표(개수 u32, 각 u16 길이 + UTF-8) + 기록마다
+  (시각 f64, 그룹 크기 u32, 지역/사용자/게임 서버의 문자열 표 번호 u32 x 3)
+- 색인 seg-{...}.idx: 블록 목록과 파일 크기를 담은 JSON (크기가 다르면 로그를 다시 읽어 복구)
+- 2026-10-18 - [수정] - v3.27.1: 기록 오류에 대한 내구성, 조회 경로에서 디스크 쓰기 제거
+- 기능: u16 길이를 넘는 문자열은 append에서 버리고, 인코딩할 수 없는 블록은 기록하지 않고 버리며,
+  기록 스레드는 어떤 예외에도 멈추지 않음
+- 기능: 조회는 flush하지 않고, 파일에 기록된 블록과 아직 메모리에 있는 기록
+  (버퍼 + 기록 중)을 함께 읽음
+- 2026-10-18 - [수정] - v3.27.1: 기록 도중 실패한 flush가 남긴 부분 블록 제거
+- 기능: flush가 실패하면 현재 세그먼트를 flush 시작 위치로 잘라낸 뒤 예외를 다시 던짐
+  (재시작 시 recover가 부분 블록에서 잘라 그 뒤의 정상 블록을 잃지 않도록)
+"""
+import heapq
+import json
+import os
+import re
+import struct
+import threading
+import time
+from datetime import datetime, timedelta
+
+from src.config.settings import (
+    LOCATION_HISTORY_SEGMENT_SECONDS, LOCATION_HISTORY_FLUSH_INTERVAL_SECONDS,
+    LOCATION_HISTORY_FLUSH_MAX_RECORDS, LOCATION_HISTORY_BLOCK_MAX_RECORDS,
+    LOCATION_HISTORY_RETENTION_SECONDS, LOCATION_HISTORY_COMPACT_INTERVAL_SECONDS,
+    LOCATION_HISTORY_BUFFER_MAX,
+)
+from src.server.metrics import counter, histogram
+
+MAGIC = b'BHB1'
+INDEX_VERSION = 1
+_BLOCK = struct.Struct('<4sIIdd')
+_COUNT = struct.Struct('<I')
+_LENGTH = struct.Struct('<H')
+_RECORD = struct.Struct('<dIIII')
+_SEGMENT_NAME = re.compile(r'seg-(\d+)\.log')
+_EPOCH_START = datetime(1970, 1, 1)
+_MAX_STRING_BYTES = 0xFFFF
+
+# result: 'written', 'dropped'(버퍼가 가득 차 버림), 'compacted'(압축으로 제거)
+LOCATION_HISTORY_RECORDS = counter('beacon_location_history_records_total',
+                                   "위치 이력 로그 기록 수 (처리 결과별)", ('result',))
+LOCATION_HISTORY_FLUSH_SECONDS = histogram('beacon_location_history_flush_seconds',
+                                           "위치 이력 버퍼를 파일에 기록하는 데 걸린 시간(초)")
+LOCATION_HISTORY_BLOCKS_READ = counter('beacon_location_history_blocks_read_total',
+                                       "이력 조회가 읽은 블록 수")
+
+
+def to_unix_seconds(timestamp):
+    """위치 기록의 시각(UTC 기준 naive datetime)을 유닉스 초로 바꿉니다."""
+    return (timestamp - _EPOCH_START).total_seconds()
+
+
+def from_unix_seconds(seconds):
+    return _EPOCH_START + timedelta(seconds=seconds)
+
+
+# --- 블록 인코딩 ---
+def encode_block(records):
+    """
+    [(시각, 사용자 이름, 지역, 그룹 크기, 게임 서버), ...]를 블록 bytes로 만들고
+    (bytes, 지역 목록)을 반환합니다.
+    """
+    strings, string_ids, packed, zones = [], {}, [], {}
+
+    def intern(value):
+        string_id = string_ids.get(value)
+        if string_id is None:
+            string_id = string_ids[value] = len(strings)
+            strings.append(value)
+        return string_id
+
+    for ts, username, zone, group_size, server in records:
+        zones[zone] = None
+        packed.append(_RECORD.pack(ts, group_size, intern(zone), intern(username),
+                                   intern(server)))
+    table = [_COUNT.pack(len(strings))]
+    for value in strings:
+        data = value.encode('utf-8')
+        table.append(_LENGTH.pack(len(data)) + data)
+    payload = b''.join(table) + b''.join(packed)
+    header = _BLOCK.pack(MAGIC, len(payload), len(records),
+                         min(record[0] for record in records),
+                         max(record[0] for record in records))
+    return header + payload, list(zones)
+
+
+def decode_block(data):
+    """블록 bytes(헤더 포함)를 기록 목록으로 되돌립니다. 형식이 맞지 않으면 ValueError."""
+    magic, length, count, _, _ = _BLOCK.unpack_from(data, 0)
+    if magic != MAGIC or len(data) < _BLOCK.size + length:
+        raise ValueError("이력 블록 형식이 맞지 않습니다.")
+    offset = _BLOCK.size
+    (string_count,) = _COUNT.unpack_from(data, offset)
+    offset += _COUNT.size
+    strings = []
+    for _ in range(string_count):
+        (size,) = _LENGTH.unpack_from(data, offset)
+        offset += _LENGTH.size
+        strings.append(data[offset:offset + size].decode('utf-8'))
+        offset += size
+    records = []
+    for ts, group_size, zone_id, username_id, server_id in _RECORD.iter_unpack(
+            data[offset:offset + count * _RECORD.size]):
+        records.append((ts, strings[username_id], strings[zone_id], group_size,
+                        strings[server_id]))
+    return records
+
+
+class HistoryBlock:
+    __slots__ = ('offset', 'length', 'count', 'min_ts', 'max_ts', 'zones')
+
+    def __init__(self, offset, length, count, min_ts, max_ts, zones):
+        self.offset = offset
+        self.length = length
+        self.count = count
+        self.min_ts = min_ts
+        self.max_ts = max_ts
+        self.zones = zones
+
+    def to_json(self):
+        return [self.offset, self.length, self.count, self.min_ts, self.max_ts, self.zones]
+
+
+class HistorySegment:
+    """세그먼트 파일 하나의 블록 색인과 지역 -> 블록 번호 역색인입니다."""
+
+    def __init__(self, path, window, blocks=(), compacted=False):
+        self.path = path
+        self.window = window
+        self.compacted = compacted
+        self.size = 0
+        self.min_ts = float('inf')
+        self.max_ts = float('-inf')
+        self.blocks = []
+        self.zone_blocks = {}
+        for block in blocks:
+            self.add_block(block)
+
+    @property
+    def index_path(self):
+        return self.path[:-len('.log')] + '.idx'
+
+    def add_block(self, block):
+        block_id = len(self.blocks)
+        self.blocks.append(block)
+        for zone in block.zones:
+            self.zone_blocks.setdefault(zone, []).append(block_id)
+        self.size = max(self.size, block.offset + block.length)
+        self.min_ts = min(self.min_ts, block.min_ts)
+        self.max_ts = max(self.max_ts, block.max_ts)
+
+    def candidate_blocks(self, zone, start, end):
+        """zone(None이면 전체)을 담고 시각 범위가 [start, end]와 겹치는 블록들입니다."""
+        block_ids = self.zone_blocks.get(zone, ()) if zone is not None else range(len(self.blocks))
+        return [self.blocks[block_id] for block_id in block_ids
+                if self.blocks[block_id].max_ts >= start and self.blocks[block_id].min_ts <= end]
+
+    def write_index(self):
+        data = {'version': INDEX_VERSION, 'window': self.window, 'compacted': self.compacted,
+                'size': self.size, 'blocks': [block.to_json() for block in self.blocks]}
+        temp_path = f"{self.index_path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(temp_path, self.index_path)
+
+    @classmethod
+    def load(cls, path, window):
+        """색인 파일을 읽고, 없거나 로그 크기와 맞지 않으면 로그를 훑어 색인을 다시 만듭니다."""
+        segment = cls(path, window)
+        try:
+            with open(segment.index_path, encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == INDEX_VERSION and data['size'] == os.path.getsize(path):
+                return cls(path, window, (HistoryBlock(*block) for block in data['blocks']),
+                           data.get('compacted', False))
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+        return cls.recover(path, window)
+
+    @classmethod
+    def recover(cls, path, window):
+        """로그를 처음부터 읽어 색인을 만들고, 기록 도중 끊긴 마지막 블록은 잘라냅니다."""
+        segment = cls(path, window)
+        with open(path, 'r+b') as f:
+            data = f.read()
+            offset = 0
+            while offset + _BLOCK.size <= len(data):
+                magic, length, count, min_ts, max_ts = _BLOCK.unpack_from(data, offset)
+                end = offset + _BLOCK.size + length
+                if magic != MAGIC or end > len(data):
+                    break
+                try:
+                    records = decode_block(data[offset:end])
+                except (ValueError, struct.error, IndexError, UnicodeDecodeError):
+                    break
+                zones = list(dict.fromkeys(record[2] for record in records))
+                segment.add_block(HistoryBlock(offset, end - offset, count, min_ts, max_ts,
+                                               zones))
+                offset = end
+            if offset < len(data):
+                f.truncate(offset)
+        segment.size = offset
+        segment.write_index()
+        return segment
+
+
+def _fits_string(value):
+    """블록 문자열 표(u16 길이)에 담을 수 있는 문자열인지 여부입니다."""
+    return isinstance(value, str) and len(value.encode('utf-8')) <= _MAX_STRING_BYTES
+
+
+def _write_blocks(f, offset, chunks):
+    """
+    chunks(기록 목록들)를 블록으로 f에 쓰고 HistoryBlock 목록을 반환합니다.
+    인코딩할 수 없는 기록이 섞인 묶음은 쓰지 않고 버립니다. (나머지 블록은 계속 기록)
+    """
+    blocks = []
+    for records in chunks:
+        try:
+            data, zones = encode_block(records)
+        except Exception as e:
+            print(f"위치 이력 블록을 버립니다 (기록 {len(records)}개): {e}")
+            LOCATION_HISTORY_RECORDS.inc('dropped', amount=len(records))
+            continue
+        f.write(data)
+        blocks.append(HistoryBlock(offset, len(data), len(records),
+                                   min(record[0] for record in records),
+                                   max(record[0] for record in records), zones))
+        offset += len(data)
+    return blocks
+
+
+def _chunked(records, size):
+    return [records[i:i + size] for i in range(0, len(records), size)]
+
+
+def drop_repeated_sightings(records):
+    """
+    사용자별로 같은 (지역, 그룹 크기)가 연속된 목격 기록은 처음과 마지막만 남깁니다.
+    머문 구간의 시작과 끝은 남지만 그 사이의 목격 기록은 사라지므로, 압축된 세그먼트에서
+    머문 구간 중간만 포함하는 시각 범위를 조회하면 그 사용자의 기록이 나오지 않을 수 있습니다.
+    """
+    by_user = {}
+    for record in sorted(records, key=lambda record: (record[4], record[1], record[0])):
+        by_user.setdefault((record[4], record[1]), []).append(record)
+    kept = []
+    for user_records in by_user.values():
+        for i, record in enumerate(user_records):
+            previous = user_records[i - 1] if i > 0 else None
+            following = user_records[i + 1] if i + 1 < len(user_records) else None
+            same_as_previous = previous is not None and previous[2:4] == record[2:4]
+            same_as_following = following is not None and following[2:4] == record[2:4]
+            if not (same_as_previous and same_as_following):
+                kept.append(record)
+    return kept
+
+
+class LocationHistory:
+    """
+    append()는 메모리 버퍼에 넣기만 하며, start() 이후에만 기록합니다.
+    기록 하나는 (시각(유닉스 초), 사용자 이름, 지역, 그룹 크기, 게임 서버) 튜플이고,
+    게임 서버는 위치 저장소의 샤드 키입니다. (기본 샤드는 빈 문자열)
+    """
+
+    def __init__(self, directory, segment_seconds=LOCATION_HISTORY_SEGMENT_SECONDS,
+                 flush_interval_seconds=LOCATION_HISTORY_FLUSH_INTERVAL_SECONDS,
+                 flush_max_records=LOCATION_HISTORY_FLUSH_MAX_RECORDS,
+                 block_max_records=LOCATION_HISTORY_BLOCK_MAX_RECORDS,
+                 retention_seconds=LOCATION_HISTORY_RETENTION_SECONDS,
+                 compact_interval_seconds=LOCATION_HISTORY_COMPACT_INTERVAL_SECONDS,
+                 buffer_max=LOCATION_HISTORY_BUFFER_MAX):
+        self.directory = directory
+        self.segment_seconds = segment_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+        self.flush_max_records = flush_max_records
+        self.block_max_records = block_max_records
+        self.retention_seconds = retention_seconds
+        self.compact_interval_seconds = compact_interval_seconds
+        self.buffer_max = buffer_max
+        self._segments = {}            # 구간 시작 -> HistorySegment
+        self._active = None            # 현재 덧붙이는 세그먼트
+        self._active_file = None
+        self._lock = threading.RLock()         # 색인과 세그먼트 파일 교체 보호
+        self._buffer_lock = threading.Lock()
+        self._write_lock = threading.Lock()    # flush/compact 직렬화
+        self._buffer = []
+        self._flushing = []    # 버퍼에서 꺼내 기록 중인 기록 (색인에 반영되면 비움, 조회용)
+        self._running = False
+        self._thread = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._running
+
+    def __len__(self):
+        with self._lock:
+            return sum(block.count for segment in self._segments.values()
+                       for block in segment.blocks)
+
+    def segment_count(self):
+        with self._lock:
+            return len(self._segments)
+
+    # --- 기록 ---
+    def append(self, server, username, zone, group_size, timestamp):
+        """목격 기록 하나를 버퍼에 넣습니다. 기록할 수 없는 형식이면 버립니다."""
+        if not self._running:
+            return
+        server = server or ''
+        if not _fits_string(zone) or not _fits_string(username) or not _fits_string(server) or not (
+                isinstance(group_size, int) and not isinstance(group_size, bool)
+                and 0 <= group_size <= 0xFFFFFFFF):
+            return
+        record = (to_unix_seconds(timestamp), username, zone, group_size, server)
+        with self._buffer_lock:
+            if len(self._buffer) >= self.buffer_max:
+                LOCATION_HISTORY_RECORDS.inc('dropped')
+                return
+            self._buffer.append(record)
+            full = len(self._buffer) >= self.flush_max_records
+        if full:
+            self._wake.set()
+
+    def flush(self, now=None):
+        """버퍼의 기록을 현재 세그먼트에 블록으로 덧붙이고 기록 수를 반환합니다."""
+        with self._write_lock:
+            with self._buffer_lock:
+                records, self._buffer = self._buffer, []
+                self._flushing = records
+            if not records:
+                return 0
+            started = time.perf_counter()
+            start_offset = None
+            try:
+                self._rotate(time.time() if now is None else now)
+                f = self._active_file
+                start_offset = f.tell()
+                blocks = _write_blocks(f, start_offset,
+                                       _chunked(records, self.block_max_records))
+                f.flush()
+            except BaseException:
+                if start_offset is not None:
+                    self._truncate_active(start_offset)
+                with self._buffer_lock:
+                    self._flushing = []
+                LOCATION_HISTORY_RECORDS.inc('dropped', amount=len(records))
+                raise
+            with self._lock:  # 색인 반영과 기록 중 목록 비우기를 조회가 한 번에 보도록
+                for block in blocks:
+                    self._active.add_block(block)
+                with self._buffer_lock:
+                    self._flushing = []
+        LOCATION_HISTORY_RECORDS.inc('written', amount=sum(block.count for block in blocks))
+        LOCATION_HISTORY_FLUSH_SECONDS.observe(time.perf_counter() - started)
+        return len(records)
+
+    def _rotate(self, now):
+        """now가 속한 구간의 세그먼트를 현재 세그먼트로 엽니다. 이전 세그먼트는 닫습니다."""
+        window = int(now // self.segment_seconds * self.segment_seconds)
+        if self._active is not None and self._active.window == window:
+            return
+        self._seal_active()
+        with self._lock:
+            segment = self._segments.get(window)
+            if segment is None:
+                path = os.path.join(self.directory, f"seg-{window:010d}.log")
+                segment = self._segments[window] = HistorySegment(path, window)
+            self._active = segment
+        self._active_file = open(segment.path, 'ab')
+
+    def _truncate_active(self, offset):
+        """실패한 flush가 남긴 부분 블록을 잘라 현재 세그먼트를 offset으로 되돌립니다."""
+        segment, f = self._active, self._active_file
+        self._active, self._active_file = None, None  # 다음 flush에서 _rotate가 다시 엶
+        try:
+            f.close()  # 버퍼에 남은 내용을 쓰다 실패할 수 있음 (아래에서 잘라냄)
+        except OSError:
+            pass
+        try:
+            os.truncate(segment.path, offset)
+        except OSError as e:
+            print(f"위치 이력 세그먼트를 되돌리지 못했습니다 ({segment.path}): {e}")
+
+    def _seal_active(self):
+        if self._active_file is not None:
+            self._active_file.flush()
+            os.fsync(self._active_file.fileno())
+            self._active_file.close()
+            self._active_file = None
+            with self._lock:
+                self._active.write_index()
+        self._active = None
+
+    # --- 압축 ---
+    def compact(self, now=None):
+        """
+        보관 기간이 지난 세그먼트를 지우고, 닫힌 세그먼트를 압축합니다.
+        (삭제한 세그먼트 수, 압축한 세그먼트 수)를 반환합니다.
+        """
+        now = time.time() if now is None else now
+        cutoff = now - self.retention_seconds
+        current_window = now // self.segment_seconds * self.segment_seconds
+        removed = compacted = 0
+        with self._write_lock:
+            with self._lock:  # 현재 구간의 세그먼트는 (재시작 후에도) 다시 덧붙일 수 있으므로 제외
+                segments = [segment for segment in self._segments.values()
+                            if segment is not self._active and segment.window < current_window]
+            for segment in segments:
+                if segment.max_ts < cutoff:
+                    with self._lock:
+                        del self._segments[segment.window]
+                        for path in (segment.path, segment.index_path):
+                            if os.path.exists(path):
+                                os.remove(path)
+                    LOCATION_HISTORY_RECORDS.inc('compacted',
+                                                 amount=sum(b.count for b in segment.blocks))
+                    removed += 1
+                elif not segment.compacted:
+                    self._compact_segment(segment, cutoff)
+                    compacted += 1
+        return removed, compacted
+
+    def _compact_segment(self, segment, cutoff):
+        with open(segment.path, 'rb') as f:
+            data = f.read()
+        records = [record for block in segment.blocks
+                   for record in decode_block(data[block.offset:block.offset + block.length])
+                   if record[0] >= cutoff]
+        kept = drop_repeated_sightings(records)
+        kept.sort(key=lambda record: (record[2], record[0]))
+        chunks = []
+        for start in range(len(kept)):  # 지역마다 블록을 나눔
+            if start == 0 or kept[start][2] != kept[start - 1][2]:
+                chunks.append([])
+            chunks[-1].append(kept[start])
+        chunks = [chunk for zone_chunk in chunks
+                  for chunk in _chunked(zone_chunk, self.block_max_records)]
+        temp_path = f"{segment.path}.tmp"
+        with open(temp_path, 'wb') as f:
+            blocks = _write_blocks(f, 0, chunks)
+            f.flush()
+            os.fsync(f.fileno())
+        compacted = HistorySegment(segment.path, segment.window, blocks, compacted=True)
+        with self._lock:
+            os.replace(temp_path, segment.path)
+            compacted.write_index()
+            self._segments[segment.window] = compacted
+        if len(records) != len(kept):
+            LOCATION_HISTORY_RECORDS.inc('compacted', amount=len(records) - len(kept))
+
+    # --- 조회 ---
+    def query(self, zone=None, start=None, end=None, server=None, limit=1000):
+        """
+        조건에 맞는 목격 기록을 시각 순으로 최대 limit개 반환합니다. ((기록 목록, 잘림 여부))
+        zone, start/end(유닉스 초), server(샤드 키)는 None이면 조건으로 쓰지 않습니다.
+        세그먼트와 블록 색인으로 후보 블록만 읽고, 아직 파일에 기록되지 않은 기록은 메모리에서
+        읽습니다. (조회 경로에서는 파일에 쓰지 않음)
+        """
+        start = float('-inf') if start is None else start
+        end = float('inf') if end is None else end
+        server = None if server is None else server or ''
+
+        def wanted(record):
+            return (start <= record[0] <= end and (zone is None or record[2] == zone)
+                    and (server is None or record[4] == server))
+
+        # 메모리의 기록과 블록 목록을 같은 시점에 잡아 두어, 그 사이에 기록된 블록을 두 번 읽지 않음
+        with self._lock:
+            with self._buffer_lock:
+                pending = self._flushing + self._buffer
+            candidates = [(segment.window, segment, segment.candidate_blocks(zone, start, end))
+                          for segment in sorted(self._segments.values(),
+                                                key=lambda segment: segment.window)
+                          if segment.max_ts >= start and segment.min_ts <= end]
+
+        def matches():
+            yield from filter(wanted, pending)
+            for window, segment, blocks in candidates:
+                with self._lock:
+                    current = self._segments.get(window)
+                    if current is None:
+                        continue
+                    if current is not segment:  # 압축으로 교체됨 (같은 기록을 새 배치로 담음)
+                        blocks = current.candidate_blocks(zone, start, end)
+                    if not blocks:
+                        continue
+                    LOCATION_HISTORY_BLOCKS_READ.inc(amount=len(blocks))
+                    with open(current.path, 'rb') as f:
+                        raw_blocks = []
+                        for block in blocks:
+                            f.seek(block.offset)
+                            raw_blocks.append(f.read(block.length))
+                for raw in raw_blocks:
+                    yield from filter(wanted, decode_block(raw))
+
+        selected = heapq.nsmallest(limit + 1, matches(), key=lambda record: record[0])
+        return selected[:limit], len(selected) > limit
+
+    # --- 백그라운드 스레드 ---
+    def start(self):
+        """디렉터리의 세그먼트 색인을 불러오고 기록 스레드를 시작합니다."""
+        if self._running:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            for name in os.listdir(self.directory):
+                match = _SEGMENT_NAME.fullmatch(name)
+                if match:
+                    window = int(match.group(1))
+                    self._segments[window] = HistorySegment.load(
+                        os.path.join(self.directory, name), window)
+        self._stop.clear()
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="location-history",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """기록 스레드를 멈추고 남은 버퍼를 기록한 뒤 현재 세그먼트를 닫습니다."""
+        if not self._running:
+            return
+        self._running = False
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self.flush()
+        with self._write_lock:
+            self._seal_active()
+
+    def _run(self):
+        next_compaction = time.monotonic() + self.compact_interval_seconds
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval_seconds)
+            self._wake.clear()
+            try:
+                self.flush()
+                if time.monotonic() >= next_compaction:
+                    self.compact()
+                    next_compaction = time.monotonic() + self.compact_interval_seconds
+            except Exception as e:  # 기록 하나의 오류로 이력 기록이 영구히 멈추지 않도록
+                print(f"위치 이력 기록 실패 ({self.directory}): {e}")
+
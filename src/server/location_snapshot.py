@@ -0,0 +1,216 @@
+"""
+- 2026-10-18 - [추가] - v3.19.0: 위치 저장소 스냅샷/복원
+- 기능: 인메모리 위치 저장소의 살아 있는 기록을 주기적으로 작은 바이너리 파일에 저장하고,
+  서버 시작 시 만료되지 않은 기록만 다시 불러와 재시작 직후에도 지도가 비어 있지 않도록 함
+- 기능: 저장은 백그라운드 스레드에서 수행하며, 요청 경로의 잠금은 기록 목록을 복사하는 동안만 잡음
+- 기능: 임시 파일에 쓴 뒤 os.replace로 교체하여 저장 도중 종료되어도 이전 스냅샷이 남음
+
+파일 형식 (리틀 엔디언)
+- 헤더: 매직 b'BCNS', 형식 버전(u16), 저장 시각(f64, 유닉스 초), 샤드 수(u32)
+- 샤드마다: 샤드 키(문자열, 기본 샤드는 길이 0xFFFF), 지역 이름 표(u16 개수 + 문자열),
+  기록 수(u32), 기록마다 (이름 길이 u16, 지역 번호 u16, 그룹 크기 u32,
+  갱신 시각 f64, 만료 시각 f64) + 사용자 이름 UTF-8
+- 끝: 앞부분 전체의 CRC32(u32)
+문자열은 u16 길이 + UTF-8 바이트입니다. 만료 시각은 time.time() 기준의 절대 시각입니다.
+- 2026-10-18 - [수정] - v3.27.1: u16 길이를 넘는 지역/사용자 이름은 건너뛰고, 저장 실패가
+  스냅샷 스레드와 종료 처리를 멈추지 않도록 모든 예외를 기록 후 무시
+
+"""
+import os
+import struct
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+
+from src.server.metrics import counter, histogram
+
+MAGIC = b'BCNS'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<4sHdI')
+_LENGTH = struct.Struct('<H')
+_COUNT = struct.Struct('<I')
+_RECORD = struct.Struct('<HHIdd')
+_CRC = struct.Struct('<I')
+_NO_KEY = 0xFFFF
+_EPOCH_START = datetime(1970, 1, 1)
+
+# operation: 'save', 'load'
+LOCATION_SNAPSHOT_SECONDS = histogram('beacon_location_snapshot_seconds',
+                                      "위치 스냅샷 저장/복원 시간(초)", ('operation',))
+# result: 'saved', 'restored', 'expired'(복원 시점에 이미 만료되어 버림)
+LOCATION_SNAPSHOT_ENTRIES = counter('beacon_location_snapshot_entries_total',
+                                    "위치 스냅샷으로 저장/복원한 기록 수", ('result',))
+
+
+class SnapshotError(ValueError):
+    """스냅샷 파일이 손상되었거나 형식이 맞지 않을 때 발생합니다."""
+
+
+def _is_u32(value):
+    return isinstance(value, int) and not isinstance(value, bool) and 0 <= value <= 0xFFFFFFFF
+
+
+def _pack_string(value):
+    data = value.encode('utf-8')
+    return _LENGTH.pack(len(data)) + data
+
+
+def encode_snapshot(shards, saved_at=None):
+    """{샤드 키: [(사용자 이름, 기록, 만료 시각), ...]}를 스냅샷 bytes로 만듭니다."""
+    saved_at = time.time() if saved_at is None else saved_at
+    parts = [_HEADER.pack(MAGIC, FORMAT_VERSION, saved_at, len(shards))]
+    for key, entries in shards.items():
+        parts.append(_LENGTH.pack(_NO_KEY) if key is None else _pack_string(key))
+        zones, zone_ids, records = [], {}, []
+        for username, record, deadline in entries:
+            # 입력 검증이 느슨한 경로로 들어온 형식 밖의 기록은 저장하지 않음
+            if not isinstance(record['zone'], str) or not _is_u32(record['group_size']):
+                continue
+            name = username.encode('utf-8')
+            if len(name) >= _NO_KEY:
+                continue
+            zone_id = zone_ids.get(record['zone'])
+            if zone_id is None:
+                # 지역 이름 길이와 지역 번호 모두 u16 (0xFFFF는 기본 샤드 표시로 예약)
+                if len(zones) >= _NO_KEY or len(record['zone'].encode('utf-8')) >= _NO_KEY:
+                    continue
+                zone_id = zone_ids[record['zone']] = len(zones)
+                zones.append(record['zone'])
+            updated_at = (record['timestamp'] - _EPOCH_START).total_seconds()
+            records.append(_RECORD.pack(len(name), zone_id, record['group_size'], updated_at,
+                                        deadline) + name)
+        parts.append(_LENGTH.pack(len(zones)))
+        parts.extend(_pack_string(zone) for zone in zones)
+        parts.append(_COUNT.pack(len(records)))
+        parts.extend(records)
+    body = b''.join(parts)
+    return body + _CRC.pack(zlib.crc32(body))
+
+
+def decode_snapshot(data):
+    """
+    스냅샷 bytes를 (저장 시각, {샤드 키: [(사용자 이름, 기록, 만료 시각), ...]})로 되돌립니다.
+    형식이 맞지 않으면 SnapshotError.
+    """
+    if len(data) < _HEADER.size + _CRC.size:
+        raise SnapshotError("스냅샷 파일이 너무 짧습니다.")
+    body, (checksum,) = data[:-_CRC.size], _CRC.unpack_from(data, len(data) - _CRC.size)
+    if zlib.crc32(body) != checksum:
+        raise SnapshotError("스냅샷 체크섬이 일치하지 않습니다.")
+    magic, version, saved_at, shard_count = _HEADER.unpack_from(body, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise SnapshotError(f"지원하지 않는 스냅샷 형식입니다: {magic!r} v{version}")
+    offset = _HEADER.size
+
+    def read_string():
+        nonlocal offset
+        (length,) = _LENGTH.unpack_from(body, offset)
+        offset += _LENGTH.size
+        if length == _NO_KEY:
+            return None
+        value = body[offset:offset + length].decode('utf-8')
+        offset += length
+        return value
+
+    shards = {}
+    try:
+        for _ in range(shard_count):
+            key = read_string()
+            (zone_count,) = _LENGTH.unpack_from(body, offset)
+            offset += _LENGTH.size
+            zones = [read_string() for _ in range(zone_count)]
+            (record_count,) = _COUNT.unpack_from(body, offset)
+            offset += _COUNT.size
+            entries = []
+            for _ in range(record_count):
+                name_length, zone_id, group_size, updated_at, deadline = \
+                    _RECORD.unpack_from(body, offset)
+                offset += _RECORD.size
+                username = body[offset:offset + name_length].decode('utf-8')
+                offset += name_length
+                record = {'zone': zones[zone_id], 'group_size': group_size,
+                          'timestamp': _EPOCH_START + timedelta(seconds=updated_at)}
+                entries.append((username, record, deadline))
+            shards[key] = entries
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise SnapshotError(f"스냅샷을 읽을 수 없습니다: {e}") from e
+    return saved_at, shards
+
+
+def save_snapshot(location_store, path):
+    """ShardedLocationStore의 살아 있는 기록을 path에 원자적으로 저장하고 기록 수를 반환합니다."""
+    started = time.perf_counter()
+    shards = {key: store.snapshot_entries() for key, store in location_store.shards().items()}
+    data = encode_snapshot(shards)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    saved = sum(len(entries) for entries in shards.values())  # 형식 밖의 기록 포함
+    LOCATION_SNAPSHOT_ENTRIES.inc('saved', amount=saved)
+    LOCATION_SNAPSHOT_SECONDS.observe(time.perf_counter() - started, 'save')
+    return saved
+
+
+def load_snapshot(location_store, path):
+    """
+    path의 스냅샷을 ShardedLocationStore에 복원하고 (복원 수, 만료되어 버린 수)를 반환합니다.
+    파일이 없으면 (0, 0). 파일이 손상되었으면 SnapshotError.
+    """
+    started = time.perf_counter()
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return 0, 0
+    _, shards = decode_snapshot(data)
+    restored = total = 0
+    for key, entries in shards.items():
+        total += len(entries)
+        restored += location_store.shard(key).restore_entries(entries)
+    LOCATION_SNAPSHOT_ENTRIES.inc('restored', amount=restored)
+    LOCATION_SNAPSHOT_ENTRIES.inc('expired', amount=total - restored)
+    LOCATION_SNAPSHOT_SECONDS.observe(time.perf_counter() - started, 'load')
+    return restored, total - restored
+
+
+class LocationSnapshotter:
+    """
+    interval_seconds마다 save_snapshot을 호출하는 데몬 스레드입니다.
+    stop()은 스레드를 멈춘 뒤 한 번 더 저장합니다.
+    """
+
+    def __init__(self, location_store, path, interval_seconds):
+        self.location_store = location_store
+        self.path = path
+        self.interval_seconds = interval_seconds
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="location-snapshot", daemon=True)
+        self._thread.start()
+
+    def stop(self, save=True):
+        self._stop.set()
+        if self._thread:
+            self._thread.join()
+        if save:
+            self.save()
+
+    def save(self):
+        try:
+            return save_snapshot(self.location_store, self.path)
+        except Exception as e:  # 디스크 오류나 형식 밖의 기록으로 스레드/종료 처리가 멈추지 않도록
+            print(f"위치 스냅샷 저장 실패 ({self.path}): {e}")
+            return None
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            self.save()
@@ -0,0 +1,501 @@
+"""
+- 2026-10-18 - [추가] - v3.4.0: 지역 기반 위치 저장소
+- 기능: 사용자별 최신 위치와 지역별 사용자 집합(인덱스)을 함께 관리
+- 기능: 특정 지역에서 N홉 이내의 사용자만 조회하는 반경 검색 제공
+- 2026-10-18 - [수정] - v3.5.0: 최소 힙 기반 만료 처리
+- 기능: 만료 시각 최소 힙과 백그라운드 정리 스레드로 오래된 위치를 제거
+- 기능: 조회는 만료되지 않은 항목만 반환하며, 공유 상태를 변경하지 않음
+- 2026-10-18 - [수정] - v3.8.0: 위치 변경 이벤트 구독 기능
+- 기능: 구독자별 큐로 joined/moved/left 이벤트 전달 (구독자 주변 max_distance 이내만)
+- 2026-10-18 - [수정] - v3.9.0: 버전 기반 변경분 조회
+- 기능: 변경마다 단조 증가하는 버전을 부여하고, 특정 버전 이후의 변경/삭제 목록을 반환
+- 2026-10-18 - [수정] - v3.10.0: 저장소 인터페이스 분리
+- 기능: LocationStore 추상 클래스와 인메모리 구현(InMemoryLocationStore)으로 분리
+- 기능: LOCATION_STORE_BACKEND 설정으로 인메모리/SQLite(다중 프로세스) 백엔드 선택
+- 2026-10-18 - [수정] - v3.12.0: 만료 정리 건수 지표 기록
+- 2026-10-18 - [수정] - v3.14.0: 게임 서버별 샤딩
+- 기능: ShardedLocationStore가 게임 서버마다 독립된 저장소(인덱스, 만료, 잠금)를 관리
+- 2026-10-18 - [수정] - v3.15.0: 일괄 갱신(update_many) 추가
+- 2026-10-18 - [수정] - v3.16.0: 하트비트(touch) 추가
+- 기능: 만료 시각만 연장하고 버전/이벤트는 만들지 않음. 같은 위치의 갱신도 이 경로로 처리
+- 2026-10-18 - [수정] - v3.19.0: 스냅샷용 기록 내보내기/복원(snapshot_entries, restore_entries)
+- 2026-10-18 - [수정] - v3.27.1: 기록은 그대로 두고 버전만 올리는 mark_changed 추가
+- 기능: 길드 정보처럼 위치 기록 밖의 목록 행 내용이 바뀌었을 때 ETag/변경분/스트림에 반영
+- 2026-10-18 - [수정] - v3.27.1: 일괄 갱신(update_many)으로 바뀐 기록은 모두 같은 버전 하나를 받음
+
+"""
+import heapq
+import os
+import queue
+import re
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from datetime import datetime
+
+from src.config.settings import (
+    API_SERVERS, LOCATION_TTL_SECONDS, STREAM_QUEUE_SIZE, LOCATION_TOMBSTONE_LIMIT,
+    LOCATION_STORE_BACKEND, LOCATION_STORE_PATH,
+)
+from src.core.map_logic import get_distance, zones_within
+from src.server.metrics import counter
+
+LOCATION_EXPIRATIONS = counter('beacon_location_expirations_total',
+                               "만료 정리 스레드가 제거한 위치 기록 수")
+
+
+class Subscription:
+    """
+    위치 변경 이벤트 구독 정보입니다. events 큐에는 (이벤트 종류, 사용자 이름, 기록)이 쌓입니다.
+    이벤트 종류: 'joined', 'moved', 'left', 'resync'
+    ('resync'는 구독자 본인 이동 또는 큐 넘침으로 전체 목록을 다시 보내야 함을 뜻함)
+    """
+
+    def __init__(self, username, max_distance=None, queue_size=STREAM_QUEUE_SIZE):
+        self.username = username
+        self.max_distance = max_distance
+        self.events = queue.Queue(maxsize=queue_size)
+
+    def push(self, event):
+        try:
+            self.events.put_nowait(event)
+        except queue.Full:
+            # 처리하지 못한 이벤트를 버리고 전체 목록 재전송을 요청
+            with self.events.mutex:
+                self.events.queue.clear()
+            self.events.put_nowait(('resync', self.username, None))
+
+
+class LocationStore(ABC):
+    """
+    위치 저장소 인터페이스입니다.
+    기록은 {'zone', 'group_size', 'timestamp'} 딕셔너리입니다.
+    조회 메서드는 만료되지 않은 항목만 반환합니다.
+    변경(갱신/삭제)마다 version이 1씩 증가하며(update_many는 묶음 전체가 한 번),
+    epoch는 저장소가 새로 만들어질 때마다 바뀌어 이전 저장소의 버전과 구분하는 데 쓰입니다.
+    만료 정리 스레드와 변경 이벤트 구독은 공통으로 이 클래스가 담당합니다.
+    """
+
+    def __init__(self, ttl_seconds=LOCATION_TTL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.RLock()
+        self._reaper = None
+        self._reaper_stop = threading.Event()
+        self._subscribers = set()
+
+    def __contains__(self, username):
+        return self.get(username) is not None
+
+    @abstractmethod
+    def __len__(self): ...
+
+    @abstractmethod
+    def get(self, username):
+        """만료되지 않은 기록만 반환합니다."""
+
+    @abstractmethod
+    def items(self):
+        """만료되지 않은 모든 (사용자 이름, 기록) 쌍의 스냅샷을 반환합니다."""
+
+    @abstractmethod
+    def update(self, username, zone, group_size, timestamp=None): ...
+
+    @abstractmethod
+    def remove(self, username): ...
+
+    @abstractmethod
+    def touch(self, username):
+        """
+        살아 있는 기록의 만료 시각만 연장합니다. (버전, 변경 이벤트 없음)
+        기록이 없거나 이미 만료되었으면 False를 반환합니다.
+        """
+
+    @abstractmethod
+    def mark_changed(self, username):
+        """
+        살아 있는 기록의 내용과 만료 시각은 그대로 두고 새 버전만 부여합니다. (변경 이벤트 전송)
+        목록 행에 함께 나가는 사용자 정보(길드 등)가 바뀌었을 때 호출하며,
+        기록이 없거나 이미 만료되었으면 False를 반환합니다.
+        """
+
+    # --- v3.15.0 추가: 일괄 갱신 ---
+    def update_many(self, entries):
+        """
+        [(사용자 이름, 지역, 그룹 크기, 시각), ...]을 잠금 한 번 안에서 반영합니다.
+        이미 더 최근 시각의 기록이 있는 사용자는 건너뛰고(last-writer-wins),
+        반영된 사용자 이름 목록을 반환합니다.
+        """
+        applied = []
+        with self._lock:
+            for username, zone, group_size, timestamp in entries:
+                current = self.get(username)
+                if current and timestamp and current['timestamp'] > timestamp:
+                    continue
+                if not (_is_unchanged(current, zone, group_size) and self.touch(username)):
+                    self.update(username, zone, group_size, timestamp)
+                applied.append(username)
+        return applied
+
+    @abstractmethod
+    def users_in_zone(self, zone): ...
+
+    @abstractmethod
+    def within(self, zone, max_distance):
+        """zone에서 max_distance 홉 이내의 사용자를 [(이름, 기록, 거리), ...]로 반환합니다."""
+
+    @abstractmethod
+    def expire(self, now=None):
+        """만료 시각이 지난 항목을 제거하고, 제거된 사용자 이름 목록을 반환합니다."""
+
+    @abstractmethod
+    def changes_since(self, since):
+        """
+        since 버전 이후의 변경분을 (현재 버전, 변경, 삭제, 전체 여부)로 반환합니다.
+        변경은 [(사용자 이름, 기록)], 삭제는 [사용자 이름] 목록입니다.
+        since가 보관 중인 삭제 기록보다 오래되었거나 현재 버전보다 크면 전체 여부가 True이고,
+        이때 변경 목록에는 살아 있는 모든 항목이 들어갑니다.
+        """
+
+    @abstractmethod
+    def last_changed(self, username):
+        """사용자 기록이 마지막으로 바뀐 버전을 반환합니다. (없으면 None)"""
+
+    def start_reaper(self, interval_seconds):
+        """interval_seconds마다 expire()를 호출하는 데몬 스레드를 시작합니다. (중복 시작 무시)"""
+        if self._reaper and self._reaper.is_alive():
+            return
+        self._reaper_stop.clear()
+
+        def run():
+            while not self._reaper_stop.wait(interval_seconds):
+                expired = self.expire()
+                if expired:
+                    LOCATION_EXPIRATIONS.inc(amount=len(expired))
+
+        self._reaper = threading.Thread(target=run, name="location-reaper", daemon=True)
+        self._reaper.start()
+
+    def stop_reaper(self):
+        self._reaper_stop.set()
+
+    # --- v3.8.0 추가: 위치 변경 이벤트 구독 ---
+    def subscribe(self, username, max_distance=None):
+        subscription = Subscription(username, max_distance)
+        with self._lock:
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _publish(self, kind, username, record, previous_zone):
+        """
+        변경 이벤트를 관련 구독자에게 전달합니다.
+        구독자 본인의 이동은 주변 목록 전체가 바뀌므로 'resync'로,
+        반경 밖으로 나간 사용자는 'left'로 보냅니다.
+        """
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for subscription in subscribers:
+            if subscription.username == username:
+                subscription.push(('resync', username, None))
+                continue
+            viewer = self._viewer_location(subscription.username)
+            if viewer is None:
+                continue
+            in_range_now = kind != 'left' and self._in_range(subscription, viewer, record['zone'])
+            if in_range_now:
+                subscription.push((kind, username, record))
+            elif previous_zone is not None and self._in_range(subscription, viewer, previous_zone):
+                subscription.push(('left', username, record))
+
+    def _viewer_location(self, username):
+        """이벤트 필터링에 쓰는 구독자 위치입니다. 백엔드가 더 싼 방법이 있으면 재정의합니다."""
+        return self.get(username)
+
+    @staticmethod
+    def _in_range(subscription, viewer, zone):
+        if subscription.max_distance is None:
+            return True
+        distance = get_distance(viewer['zone'], zone)
+        return isinstance(distance, int) and distance <= subscription.max_distance
+
+
+class InMemoryLocationStore(LocationStore):
+    """
+    사용자별 최신 위치 기록과 지역 -> 사용자 집합 인덱스를 함께 유지하는 인메모리 저장소입니다.
+    기록은 갱신 시 새 딕셔너리로 교체됩니다. (단일 프로세스 전용)
+    만료 시각은 (만료 시각, 사용자 이름) 최소 힙으로 관리하며, 갱신으로 무효가 된 힙 항목은
+    꺼낼 때 _deadlines와 비교해 버립니다(lazy deletion).
+    """
+
+    def __init__(self, ttl_seconds=LOCATION_TTL_SECONDS):
+        super().__init__(ttl_seconds)
+        self._locations = {}
+        self._zone_index = {}
+        self._deadlines = {}
+        self._expiry_heap = []
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self._changes = OrderedDict()    # username -> 마지막 변경 버전 (오래된 순)
+        self._tombstones = deque()       # (삭제 버전, username)
+        self._tombstone_floor = 0        # 이 버전 이하의 삭제 기록은 버려졌음
+        self.tombstone_limit = LOCATION_TOMBSTONE_LIMIT
+        self._batch_version = None       # update_many 중이면 이 묶음이 쓰는 버전
+
+    def __len__(self):
+        return len(self._locations)
+
+    def _is_live(self, username, now):
+        return self._deadlines.get(username, 0) > now
+
+    def get(self, username):
+        record = self._locations.get(username)
+        if record is None or not self._is_live(username, time.time()):
+            return None
+        return record
+
+    def items(self):
+        now = time.time()
+        with self._lock:
+            return [(username, record) for username, record in self._locations.items()
+                    if self._is_live(username, now)]
+
+    def update(self, username, zone, group_size, timestamp=None):
+        now = time.time()
+        record = {'zone': zone, 'group_size': group_size,
+                  'timestamp': timestamp or datetime.utcnow()}
+        deadline = now + self.ttl_seconds
+        with self._lock:
+            stale = self._locations.get(username)
+            if stale and stale['zone'] != zone:
+                self._unindex(username, stale['zone'])
+            previous = stale if stale and self._is_live(username, now) else None
+            self._locations[username] = record
+            self._zone_index.setdefault(zone, set()).add(username)
+            self._deadlines[username] = deadline
+            heapq.heappush(self._expiry_heap, (deadline, username))
+            self._record_change(username)
+        if self._subscribers:
+            self._publish('moved' if previous else 'joined', username, record,
+                          previous['zone'] if previous else None)
+        return record
+
+    def touch(self, username):
+        now = time.time()
+        with self._lock:
+            if not self._is_live(username, now):
+                return False
+            deadline = now + self.ttl_seconds
+            self._deadlines[username] = deadline
+            heapq.heappush(self._expiry_heap, (deadline, username))
+        return True
+
+    def update_many(self, entries):
+        """기본 구현과 같고, 반영된 기록은 모두 같은 새 버전 하나를 받습니다. (버전 증가는 한 번)"""
+        with self._lock:
+            self._batch_version = self.version + 1
+            try:
+                return super().update_many(entries)
+            finally:
+                self._batch_version = None
+
+    def mark_changed(self, username):
+        with self._lock:
+            record = self.get(username)
+            if record is None:
+                return False
+            self._record_change(username)
+        if self._subscribers:
+            self._publish('moved', username, record, record['zone'])
+        return True
+
+    def remove(self, username):
+        with self._lock:
+            record = self._locations.pop(username, None)
+            self._deadlines.pop(username, None)
+            if record:
+                self._unindex(username, record['zone'])
+                self._record_removal(username)
+        if record and self._subscribers:
+            self._publish('left', username, record, record['zone'])
+        return record
+
+    def users_in_zone(self, zone):
+        now = time.time()
+        with self._lock:
+            return [(username, self._locations[username])
+                    for username in self._zone_index.get(zone, ())
+                    if self._is_live(username, now)]
+
+    def within(self, zone, max_distance):
+        """반경 안의 지역만 순회하므로 비용은 전체 사용자 수가 아니라 주변 혼잡도에 비례합니다."""
+        now = time.time()
+        result = []
+        with self._lock:
+            for nearby_zone, distance in zones_within(zone, max_distance):
+                for username in self._zone_index.get(nearby_zone, ()):
+                    if self._is_live(username, now):
+                        result.append((username, self._locations[username], distance))
+        return result
+
+    def expire(self, now=None):
+        """힙 앞쪽(가장 이른 만료 시각)부터 꺼내며 제거합니다."""
+        now = time.time() if now is None else now
+        expired = []
+        with self._lock:
+            heap = self._expiry_heap
+            while heap and heap[0][0] <= now:
+                deadline, username = heapq.heappop(heap)
+                if self._deadlines.get(username) == deadline:
+                    self.remove(username)
+                    expired.append(username)
+            # 잦은 갱신으로 무효 항목이 쌓이면 살아 있는 만료 시각만으로 힙을 다시 만든다
+            if len(heap) > 2 * len(self._deadlines) + 1024:
+                self._expiry_heap = [(deadline, username)
+                                     for username, deadline in self._deadlines.items()]
+                heapq.heapify(self._expiry_heap)
+        return expired
+
+    # --- v3.19.0 추가: 스냅샷 저장/복원 (location_snapshot.py) ---
+    def snapshot_entries(self):
+        """
+        살아 있는 [(사용자 이름, 기록, 만료 시각), ...]을 반환합니다.
+        기록은 갱신 시 교체될 뿐 수정되지 않으므로, 잠금은 목록을 복사하는 동안만 잡습니다.
+        """
+        now = time.time()
+        with self._lock:
+            return [(username, record, self._deadlines[username])
+                    for username, record in self._locations.items()
+                    if self._is_live(username, now)]
+
+    def restore_entries(self, entries):
+        """
+        snapshot_entries 형식의 기록을 불러오고 복원한 수를 반환합니다.
+        이미 만료된 기록과 그 사이 새로 들어온 사용자의 기록은 건너뛰며, 이벤트는 보내지 않습니다.
+        """
+        now = time.time()
+        restored = 0
+        with self._lock:
+            for username, record, deadline in entries:
+                if deadline <= now or username in self._locations:
+                    continue
+                deadline = min(deadline, now + self.ttl_seconds)
+                self._locations[username] = record
+                self._zone_index.setdefault(record['zone'], set()).add(username)
+                self._deadlines[username] = deadline
+                self._expiry_heap.append((deadline, username))
+                self._record_change(username)
+                restored += 1
+            heapq.heapify(self._expiry_heap)
+        return restored
+
+    # --- v3.9.0 추가: 버전 기반 변경분 조회 ---
+    def changes_since(self, since):
+        now = time.time()
+        with self._lock:
+            if since is None or since < self._tombstone_floor or since > self.version:
+                return self.version, self.items(), [], True
+            changed, removed = [], []
+            for username in reversed(self._changes):
+                if self._changes[username] <= since:
+                    break
+                if self._is_live(username, now):
+                    changed.append((username, self._locations[username]))
+                else:
+                    removed.append(username)
+            changed_names = {username for username, _ in changed}
+            for removed_version, username in reversed(self._tombstones):
+                if removed_version <= since:
+                    break
+                if username not in changed_names:
+                    removed.append(username)
+            return self.version, changed, list(dict.fromkeys(removed)), False
+
+    def last_changed(self, username):
+        return self._changes.get(username)
+
+    def _record_change(self, username):
+        self.version = self._batch_version or self.version + 1
+        self._changes[username] = self.version
+        self._changes.move_to_end(username)
+
+    def _record_removal(self, username):
+        self.version += 1
+        self._changes.pop(username, None)
+        self._tombstones.append((self.version, username))
+        while len(self._tombstones) > self.tombstone_limit:
+            self._tombstone_floor = self._tombstones.popleft()[0]
+
+    def _unindex(self, username, zone):
+        members = self._zone_index.get(zone)
+        if members is not None:
+            members.discard(username)
+            if not members:
+                del self._zone_index[zone]
+
+
+def _is_unchanged(record, zone, group_size):
+    """기존 기록과 지역/그룹 크기가 같으면 하트비트(touch)로 처리할 수 있습니다."""
+    return record is not None and record['zone'] == zone and record['group_size'] == group_size
+
+
+# --- v3.14.0 추가: 게임 서버별 샤딩 ---
+class ShardedLocationStore:
+    """
+    게임 서버(User.server)마다 독립된 LocationStore를 두는 묶음입니다.
+    서로 다른 게임 서버의 사용자는 만날 수 없으므로, 요청은 요청자 샤드 하나만 조회/변경합니다.
+    샤드마다 지역 인덱스, 만료 힙(정리 스레드), 잠금, 버전(epoch)이 따로 있어
+    한 서버의 갱신이 다른 서버의 조회를 막지 않고, 이후 샤드별 프로세스 분리도 가능합니다.
+    shard_keys에 없는 서버 값(잘못된 입력 등)은 모두 DEFAULT_SHARD 하나로 모읍니다.
+    """
+    DEFAULT_SHARD = None
+
+    def __init__(self, factory, shard_keys=tuple(API_SERVERS)):
+        self._factory = factory
+        self._shards = {key: factory(key) for key in (*shard_keys, self.DEFAULT_SHARD)}
+
+    def __len__(self):
+        return sum(len(store) for store in self._shards.values())
+
+    def shard(self, server):
+        """server에 해당하는 샤드를 반환합니다."""
+        store = self._shards.get(server)
+        return store if store is not None else self._shards[self.DEFAULT_SHARD]
+
+    def shards(self):
+        """{샤드 키: 저장소} 딕셔너리를 반환합니다."""
+        return dict(self._shards)
+
+    def start_reaper(self, interval_seconds):
+        for store in self._shards.values():
+            store.start_reaper(interval_seconds)
+
+    def stop_reaper(self):
+        for store in self._shards.values():
+            store.stop_reaper()
+
+
+def shard_path(path, key):
+    """SQLite 샤드 파일 경로입니다. (예: locations.db -> locations.east_asia.db)"""
+    root, ext = os.path.splitext(path)
+    slug = re.sub(r'[^a-z0-9]+', '_', key.lower()).strip('_') if key else 'default'
+    return f"{root}.{slug}{ext}"
+
+
+# --- v3.10.0 추가: 설정에 따른 저장소 생성 ---
+def create_location_store(backend=LOCATION_STORE_BACKEND, path=LOCATION_STORE_PATH):
+    """
+    게임 서버별 샤드로 나뉜 저장소(ShardedLocationStore)를 만듭니다.
+    'memory': 단일 프로세스용 인메모리 저장소
+    'sqlite': 여러 워커 프로세스가 공유하는 SQLite(WAL) 저장소 (샤드마다 파일 하나)
+    """
+    if backend == 'memory':
+        return ShardedLocationStore(lambda key: InMemoryLocationStore())
+    if backend == 'sqlite':
+        from src.server.sqlite_location_store import SQLiteLocationStore
+        return ShardedLocationStore(lambda key: SQLiteLocationStore(shard_path(path, key)))
+    raise ValueError(f"알 수 없는 위치 저장소 백엔드입니다: {backend}")
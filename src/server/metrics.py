@@ -0,0 +1,198 @@
+"""
+- 2026-10-18 - [추가] - v3.12.0: 서버 지표 수집
+- 기능: 카운터/히스토그램/게이지를 프로세스 메모리에 모아 Prometheus 텍스트 형식으로 출력
+- 기능: 게이지는 /metrics 조회 시점에만 콜백으로 계산하여 요청 처리 경로에 비용을 더하지 않음
+
+"""
+import threading
+import time
+from bisect import bisect_left
+
+from sqlalchemy import event
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5,
+                   10)
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Metric:
+    """
+    이름, 설명, 레이블 이름을 가진 지표의 공통 부분입니다.
+    레이블 값은 labelnames 순서대로 위치 인자로 넘깁니다. (예: observe(0.01, '/verify', 'POST'))
+    """
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self):
+        return []
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def value(self, *labelvalues):
+        return self._values.get(labelvalues, 0)
+
+    def _samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in values]
+
+
+class Histogram(Metric):
+    """구간별 개수는 누적하지 않고 저장하고, 출력할 때만 누적 합(le)으로 바꿉니다."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+
+    def observe(self, value, *labelvalues):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def _samples(self):
+        with self._lock:
+            snapshot = sorted((key, list(counts), total)
+                              for key, (counts, total) in self._series.items())
+        lines = []
+        bounds = self.buckets + (float('inf'),)
+        for key, counts, total in snapshot:
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge(Metric):
+    """
+    조회 시점에 callback()으로 값을 계산하는 게이지입니다.
+    레이블이 있으면 callback은 {레이블 값 튜플: 값} 딕셔너리를 반환해야 합니다.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, callback, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def _samples(self):
+        try:
+            values = self.callback()
+        except Exception:  # 지표 하나의 실패로 /metrics 전체가 실패하지 않도록 함
+            return []
+        if values is None:
+            return []
+        if not self.labelnames:
+            values = {(): values}
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"이미 등록된 지표입니다: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, name):
+        with self._lock:
+            self._metrics.pop(name, None)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def counter(name, documentation, labelnames=()):
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def histogram(name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def gauge(name, documentation, callback, labelnames=()):
+    return REGISTRY.register(Gauge(name, documentation, callback, labelnames))
+
+
+# --- 여러 모듈이 함께 쓰는 지표 ---
+SQLITE_QUERY_SECONDS = histogram(
+    'beacon_sqlite_query_seconds', "SQLite 쿼리 실행 시간(초)", ('database',))
+
+
+def instrument_sqlalchemy(engine, database='users'):
+    """SQLAlchemy 엔진의 쿼리마다 실행 시간을 SQLITE_QUERY_SECONDS에 기록합니다."""
+    @event.listens_for(engine, 'before_cursor_execute')
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+    @event.listens_for(engine, 'after_cursor_execute')
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info['query_started'].pop()
+        SQLITE_QUERY_SECONDS.observe(time.perf_counter() - started, database)
+
+    @event.listens_for(engine, 'handle_error')
+    def handle_error(context):
+        conn = context.connection
+        if conn is not None and conn.info.get('query_started'):
+            conn.info['query_started'].pop()
@@ -0,0 +1,135 @@
+"""
+- 2026-10-18 - [추가] - v3.25.0: 토큰 버킷 기반 요청 제한 (admission control)
+- 기능: 경로 묶음(update/read/auth)마다 사용자별 버킷과 전체(global) 버킷을 두고,
+  둘 다 토큰이 있을 때만 요청을 받아들임. 사용자별 버킷은 한 클라이언트의 폭주를,
+  전체 버킷은 위치 저장소/SQLite가 감당할 수 있는 총 처리량을 넘는 부하를 막음
+- 기능: 거절은 저장소/DB에 닿기 전에 O(1)로 결정하고, 다시 시도할 수 있는 시각(Retry-After)을 계산
+- 기능: 버킷은 (토큰 수, 마지막 갱신 시각) 두 값만 저장하며, 가득 찰 만큼 오래 쉰 버킷은
+  새 버킷과 같으므로 주기적으로 지워 메모리를 제한 (최대 개수를 넘으면 가장 오래된 것부터 제거)
+
+"""
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from src.config.settings import RATE_LIMIT_MAX_BUCKETS, RATE_LIMITS
+from src.server.metrics import counter
+
+GLOBAL_SCOPE = 'global'
+USER_SCOPE = 'user'
+
+# route_class: 'update', 'read', 'auth' / scope: 'user', 'global'
+RATE_LIMITED_REQUESTS = counter('beacon_rate_limited_requests_total',
+                                "요청 제한으로 거절한 요청 수 (429)", ('route_class', 'scope'))
+
+
+class TokenBucket:
+    """초당 rate개씩 최대 burst개까지 채워지는 토큰 버킷입니다. (잠금은 호출하는 쪽에서 담당)"""
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate, burst, now):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = now
+
+    def refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def take(self, now, cost=1):
+        """cost개를 꺼내고 0을, 모자라면 꺼내지 않고 토큰이 찰 때까지 기다릴 초를 반환합니다."""
+        self.refill(now)
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        if cost > self.burst or self.rate <= 0:
+            return math.inf
+        return (cost - self.tokens) / self.rate
+
+    def idle_full(self, now):
+        """지금 가득 차 있을 만큼 오래 쉬었는지 여부입니다. (지워도 새 버킷과 같음)"""
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+class RateLimiter:
+    """
+    policies: {경로 묶음: {'user': (초당 토큰, 버킷 크기), 'global': (초당 토큰, 버킷 크기)}}
+    한쪽 범위가 없으면 그 범위는 제한하지 않습니다.
+    """
+
+    def __init__(self, policies=RATE_LIMITS, max_buckets=RATE_LIMIT_MAX_BUCKETS,
+                 clock=time.monotonic):
+        self.policies = policies
+        self.max_buckets = max_buckets
+        self._clock = clock
+        now = clock()
+        self._global = {route_class: TokenBucket(*policy[GLOBAL_SCOPE], now)
+                        for route_class, policy in policies.items() if GLOBAL_SCOPE in policy}
+        self._buckets = OrderedDict()  # (경로 묶음, 사용자 키) -> TokenBucket, 오래 안 쓴 순
+        self._next_sweep = now
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def admit(self, route_class, key, cost=1):
+        """
+        요청 하나를 받아들일지 결정합니다.
+        반환: (허용 여부, 다시 시도까지 기다릴 초, 거절한 범위 'user'/'global' 또는 None)
+        사용자 버킷을 먼저 확인하므로 한 사용자의 폭주가 전체 버킷을 비우지 못하고,
+        전체 버킷에서 거절되면 사용자 버킷에서 꺼낸 토큰을 돌려줍니다.
+        """
+        policy = self.policies.get(route_class)
+        if policy is None:
+            return True, 0.0, None
+        with self._lock:
+            now = self._clock()
+            user_bucket = None
+            if USER_SCOPE in policy and key is not None:
+                user_bucket = self._user_bucket(route_class, key, policy[USER_SCOPE], now)
+                wait = user_bucket.take(now, cost)
+                if wait:
+                    RATE_LIMITED_REQUESTS.inc(route_class, USER_SCOPE)
+                    return False, wait, USER_SCOPE
+            global_bucket = self._global.get(route_class)
+            if global_bucket is not None:
+                wait = global_bucket.take(now, cost)
+                if wait:
+                    if user_bucket is not None:
+                        user_bucket.tokens += cost
+                    RATE_LIMITED_REQUESTS.inc(route_class, GLOBAL_SCOPE)
+                    return False, wait, GLOBAL_SCOPE
+            return True, 0.0, None
+
+    def _user_bucket(self, route_class, key, limits, now):
+        bucket_key = (route_class, key)
+        bucket = self._buckets.get(bucket_key)
+        if bucket is None:
+            if now >= self._next_sweep:
+                self._sweep(now)
+            bucket = self._buckets[bucket_key] = TokenBucket(*limits, now)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(bucket_key)
+        return bucket
+
+    def _sweep(self, now):
+        """
+        가득 찰 만큼 쉰 버킷을 지웁니다. (새 버킷을 만들 때 1초에 한 번)
+        오래 안 쓴 순서로 보다가 처음으로 덜 찬 버킷에서 멈추므로 비용은 지운 개수에 비례합니다.
+        """
+        self._next_sweep = now + 1.0
+        while self._buckets:
+            bucket_key, bucket = next(iter(self._buckets.items()))
+            if not bucket.idle_full(now):
+                break
+            del self._buckets[bucket_key]
+
+
+def retry_after_header(wait_seconds):
+    """Retry-After 헤더 값(정수 초, 최소 1)입니다."""
+    return str(max(1, math.ceil(min(wait_seconds, 3600))))
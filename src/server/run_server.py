@@ -18,37 +18,302 @@
 - 기능: 서버 시작 시 가상 사용자 생성, 본인 거리 0으로 수정, DB 조회 최적화
 - 2025-08-09 - [수정] - v1.6.4: 가상 사용자 위치를 블랙존으로 변경
 - 기능: 테스트를 위해 가상 사용자들이 블랙존에 위치하도록 수정
+- 2026-10-18 - [수정] - v3.4.0: 지역 인덱스 기반 위치 저장소 도입
+- 기능: 전역 locations 딕셔너리를 LocationStore로 교체
+- 기능: /get-locations에 max_distance 반경 조회 파라미터 추가
+- 2026-10-18 - [수정] - v3.5.0: 위치 만료를 백그라운드 정리 스레드로 이전
+- 기능: /get-locations의 전체 순회 필터링/삭제 제거, TTL은 LOCATION_TTL_SECONDS 설정 사용
+- 2026-10-18 - [수정] - v3.6.0: 게임 정보 API 조회 캐시 및 비동기 길드 조회
+- 기능: GameInfoClient(캐시 + single-flight)로 조회
+- 기능: VERIFY_ASYNC_GUILD_LOOKUP 설정 시 /verify 후 길드 정보를 백그라운드에서 채움
+- 2026-10-18 - [수정] - v3.7.0: 인증 사용자 캐시 적용
+- 기능: /update-location 인증 확인과 /get-locations 길드 이름을 SQL 대신 VerifiedUserCache로 처리
+- 2026-10-18 - [추가] - v3.8.0: 위치 스트림(SSE) 엔드포인트
+- 기능: /stream-locations 구독 시 전체 목록(snapshot) 전송 후 주변 사용자 변경 이벤트를 푸시
+- 2026-10-18 - [수정] - v3.9.0: /get-locations 변경분(delta) 응답 및 ETag 지원
+- 기능: since 커서 이후 바뀐 사용자/삭제된 사용자만 반환하고, 변경이 없으면 304 Not Modified
+- 2026-10-18 - [수정] - v3.10.0: 위치 저장소 백엔드 선택
+- 기능: LOCATION_STORE_BACKEND='sqlite'이면 여러 워커 프로세스가 위치 정보를 공유
+- 2026-10-18 - [수정] - v3.11.0: DB 주소를 설정(SERVER_DATABASE_URI)에서 읽도록 수정
+- 2026-10-18 - [추가] - v3.12.0: /metrics 지표 엔드포인트
+- 기능: 경로별 요청 수/지연 히스토그램, 위치 저장소 크기, 만료 건수, 거리 조회 수,
+  게임 정보 API 지연/캐시 적중률, SQLite 쿼리 시간을 Prometheus 텍스트 형식으로 제공
+- 2026-10-18 - [수정] - v3.13.0: 라우트 처리 로직을 handle_* 함수로 분리
+- 기능: asyncio 서버 모드(async_server.py)와 같은 로직을 공유
+- 2026-10-18 - [수정] - v3.14.0: 게임 서버별 위치 저장소 샤딩
+- 기능: 요청은 요청자의 게임 서버 샤드만 조회/변경하고, ETag·커서·스트림도 샤드 단위로 동작
+- 2026-10-18 - [추가] - v3.15.0: 위치 일괄 갱신(/update-locations) 엔드포인트
+- 기능: 여러 사용자의 갱신을 한 요청으로 받아 사용자별로 최신 ts만 남기고(coalescing)
+  인증 확인을 한 번에 처리한 뒤, 샤드마다 저장소 연산 한 번으로 반영
+- 2026-10-18 - [추가] - v3.16.0: 위치 하트비트(/heartbeat)
+- 기능: TTL만 연장하고 새 버전을 만들지 않아 변경분/스트림 구독자에게 전파되지 않음
+- 기능: /update-location도 지역과 그룹 크기가 그대로면 같은 하트비트 경로로 처리
+- 2026-10-18 - [수정] - v3.17.0: /get-locations 응답 형식 협상 및 압축
+- 기능: Accept에 따라 JSON 행 목록 / 열 기반 JSON / MessagePack, Accept-Encoding에 따라 gzip/zstd
+- 2026-10-18 - [수정] - v3.18.0: /get-locations 서버 측 필터/정렬/상위 K개 선택
+- 기능: guild, min_group_size, max_group_size로 거르고 sort(distance/group_size/recency)로 정렬
+- 기능: limit이 있으면 전체 목록을 정렬하지 않고 크기 K의 힙(heapq.nsmallest)으로 상위 K개만 선택
+- 2026-10-18 - [추가] - v3.19.0: 인메모리 위치 저장소 스냅샷/복원
+- 기능: 서버 시작 시 스냅샷에서 만료되지 않은 위치를 복원하고, 실행 중에는 주기적으로 저장
+- 2026-10-18 - [추가] - v3.20.0: 위치 이력 로그 및 조회(/location-history) 엔드포인트
+- 기능: 받아들인 위치 갱신을 이력 로그 버퍼에 넣고(기록은 백그라운드), 지역/시각 범위로 조회
+- 2026-10-18 - [추가] - v3.21.0: 지역 활동 히트맵(/zone-heatmap) 엔드포인트
+- 기능: 위치 갱신과 하트비트마다 지역/길드별 슬라이딩 윈도우(1분/5분/60분) 카운터를 갱신하고,
+  히트맵은 집계된 카운터만 읽어 지역 수에 비례하는 비용으로 응답
+- 2026-10-18 - [추가] - v3.22.0: 가중치 경로 탐색(/route) 엔드포인트
+- 기능: 로얄 대륙/블랙존을 오가는 경로도 포털을 거쳐 최소 이동 비용 경로와 비용을 반환
+- 2026-10-18 - [수정] - v3.24.0: /get-locations 거리 계산을 요청당 한 번의 일괄 조회로 변경
+- 기능: 사용자마다 get_distance를 호출하지 않고, 다른 사용자들이 있는 지역 집합을 모아
+  map_logic.distances_from으로 한 번에 조회 (출발 지역별 캐시 사용)
+- 2026-10-18 - [추가] - v3.25.0: 토큰 버킷 요청 제한
+- 기능: 위치/조회/인증 경로마다 사용자별·전체 토큰 버킷을 확인하여, 넘치는 요청은 처리 로직과
+  저장소/DB에 닿기 전에 429와 Retry-After로 거절
+- 2026-10-18 - [수정] - v3.26.0: DB 연결 풀/PRAGMA 적용, /register 그룹 커밋, 대소문자 무시 조회
+- 기능: 동시에 들어온 /register 요청들을 GroupCommitter로 모아 일괄 upsert와 커밋 한 번으로 처리
+- 기능: /register·/verify는 대소문자만 다른 이름도 기존 사용자로 찾고, 응답에 저장된 이름을 포함
+- 기능: 시작 시 create_all 대신 스키마 마이그레이션(migrate_database) 적용
+- 2026-10-18 - [추가] - v3.27.0: 인증 사용자 길드 정보 주기적 갱신 (서버 실행 진입점에서 시작)
+- 2026-10-18 - [수정] - v3.27.1: 위치 보고의 zone/group_size 검증
+- 기능: /update-location, /update-locations는 zone이 빈 문자열이 아닌 제한 길이 이하 문자열이고
+  group_size가 0 이상의 정수일 때만 받아들이고, 아니면 400
+- 기능: /get-locations ETag에 요청자, max_distance, 응답 형식을 포함하여
+  다른 조건의 요청이 이전 ETag로 304를 받지 않도록 수정
+- 기능: /get-locations 그룹 크기 정렬/필터는 group_size가 정수가 아닌 기록
+  (검증 이전에 저장된 값)을 정렬에서는 맨 뒤로 보내고 필터에서는 제외
+- 기능: /register는 server가 API_SERVERS에 있는 서버 이름일 때만 받아들이고, 아니면 400
+- 기능: 요청 제한의 사용자별 버킷을 본문의 username 대신 클라이언트 IP로 구분
+  (이름을 바꿔 가며 보내 제한을 피하거나, 남의 이름으로 보내 그 사용자를 막을 수 없도록)
+- 기능: 위치/조회/스트림 요청도 대소문자만 다른 이름을 기존 인증 사용자로 찾고,
+  위치 저장소에는 DB에 저장된 표기로 기록 (/register·/verify와 같은 규칙)
+- 기능: 길드 정보 갱신(주기적 갱신, 비동기 길드 조회)으로 길드가 바뀐 사용자는 위치 저장소 버전을
+  올려(mark_changed) /get-locations ETag와 변경분, 스트림에 바뀐 길드 이름이 반영되도록 수정
 
 """
+import atexit
+import heapq
+import json
+import os
+import queue
 import random  # random 임포트 추가
-from datetime import datetime, timedelta
+import time
+import zlib
+from datetime import datetime, timezone
 
-import requests
-from flask import Flask, request, jsonify
+from flask import Flask, Response, g, request, jsonify
 
-from src.server.database import db, User
-from src.config.settings import API_SERVERS
-from src.core.map_logic import get_distance
+from src.server.database import (
+    db, User, bulk_register_users, bulk_update_guilds, configure_sqlite, engine_options,
+    find_user, migrate_database,
+)
+from src.config.settings import (
+    LOCATION_REAP_INTERVAL_SECONDS, VERIFY_ASYNC_GUILD_LOOKUP, STREAM_KEEPALIVE_SECONDS,
+    SERVER_DATABASE_URI, LOCATION_BATCH_MAX_UPDATES, LOCATION_QUERY_MAX_LIMIT,
+    LOCATION_STORE_BACKEND, LOCATION_SNAPSHOT_PATH, LOCATION_SNAPSHOT_INTERVAL_SECONDS,
+    LOCATION_HISTORY_DIR, LOCATION_HISTORY_QUERY_MAX_LIMIT, ZONE_ACTIVITY_WINDOWS,
+    RATE_LIMIT_ENABLED, RATE_LIMIT_ROUTE_CLASSES, REGISTER_BATCH_MAX, GUILD_REFRESH_ENABLED,
+    LOCATION_ZONE_MAX_LENGTH, API_SERVERS,
+)
+from src.core.map_logic import ZONE_IDS, distances_from, get_distance, zones_within
+from src.core.routing import find_route
+from src.core.wire_format import (
+    FORMAT_JSON, encode_location_columns, negotiate_encoding, negotiate_format, serialize, compress,
+)
+from src.server.gameinfo import GameInfoClient
+from src.server.group_commit import GroupCommitter
+from src.server.guild_refresh import GuildRefresher
+from src.server.location_store import create_location_store
+from src.server.location_snapshot import LocationSnapshotter, SnapshotError, load_snapshot
+from src.server.location_history import LocationHistory, from_unix_seconds, to_unix_seconds
+from src.server.zone_activity import ShardedZoneActivity
+from src.server.rate_limit import RateLimiter, retry_after_header
+from src.server.metrics import (
+    REGISTRY, CONTENT_TYPE, counter, gauge, histogram, instrument_sqlalchemy,
+)
+from src.server.user_cache import VerifiedUserCache
 
 
 # ... (create_app, app, locations은 이전과 동일) ...
 def create_app():
     app = Flask(__name__)
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///beacon.db'
+    app.config['SQLALCHEMY_DATABASE_URI'] = SERVER_DATABASE_URI
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # --- v3.26.0 추가: 연결 풀과 연결마다 적용하는 PRAGMA(WAL 등) ---
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(SERVER_DATABASE_URI)
     db.init_app(app)
+    with app.app_context():
+        configure_sqlite(db.engine)
+        instrument_sqlalchemy(db.engine)
     return app
 
 
 app = create_app()
-locations = {}
+location_store = create_location_store()
+location_store.start_reaper(LOCATION_REAP_INTERVAL_SECONDS)
+gameinfo_client = GameInfoClient()
+verified_users = VerifiedUserCache()
+location_snapshotter = None
+location_history = LocationHistory(LOCATION_HISTORY_DIR)
+zone_activity = ShardedZoneActivity()
+rate_limiter = RateLimiter() if RATE_LIMIT_ENABLED else None
+
+
+def apply_guild_change(user):
+    """
+    길드가 바뀐 사용자(UserRow)를 인증 사용자 캐시에 반영하고, 위치 기록이 있으면 버전을 올려
+    이전 ETag의 304나 변경분 응답에서 바뀐 길드 이름이 빠지지 않도록 합니다.
+    """
+    verified_users.refresh(user)
+    location_store.shard(user.server).mark_changed(user.username)
+
+
+guild_refresher = GuildRefresher(app, on_update=apply_guild_change)
+
+
+# --- v3.19.0 추가: 인메모리 저장소 스냅샷 (서버 실행 진입점에서 호출) ---
+def start_location_snapshots(path=LOCATION_SNAPSHOT_PATH,
+                             interval_seconds=LOCATION_SNAPSHOT_INTERVAL_SECONDS):
+    """
+    스냅샷에서 만료되지 않은 위치를 복원한 뒤 주기적 저장을 시작하고, 종료 시 한 번 더 저장합니다.
+    sqlite 백엔드는 이미 파일에 저장되므로 인메모리 백엔드이고 path가 있을 때만 동작합니다.
+    """
+    global location_snapshotter
+    if LOCATION_STORE_BACKEND != 'memory' or not path or location_snapshotter is not None:
+        return location_snapshotter
+    try:
+        restored, expired = load_snapshot(location_store, path)
+        print(f"위치 스냅샷 복원 완료: {restored}명 (만료되어 제외: {expired}명)")
+    except SnapshotError as e:
+        print(f"위치 스냅샷을 무시합니다 ({path}): {e}")
+    location_snapshotter = LocationSnapshotter(location_store, path, interval_seconds)
+    location_snapshotter.start()
+    atexit.register(stop_location_snapshots)
+    return location_snapshotter
+
+
+def stop_location_snapshots():
+    global location_snapshotter
+    if location_snapshotter is not None:
+        location_snapshotter.stop(save=True)
+        location_snapshotter = None
+
+
+# --- v3.20.0 추가: 위치 이력 로그 (서버 실행 진입점에서 호출) ---
+def start_location_history():
+    """LOCATION_HISTORY_DIR이 있으면 이력 로그 기록을 시작하고, 종료 시 남은 기록을 씁니다."""
+    if LOCATION_HISTORY_DIR and not location_history.running:
+        location_history.start()
+        atexit.register(stop_location_history)
+
+
+def stop_location_history():
+    location_history.stop()
+
+
+# --- v3.27.0 추가: 길드 정보 주기적 갱신 (서버 실행 진입점에서 마이그레이션 후 호출) ---
+def start_guild_refresh():
+    """GUILD_REFRESH_ENABLED이면 갱신 스레드를 시작합니다. (중단된 바퀴는 이어서 진행)"""
+    if GUILD_REFRESH_ENABLED and not guild_refresher.running:
+        guild_refresher.start()
+        atexit.register(stop_guild_refresh)
+
+
+def stop_guild_refresh():
+    guild_refresher.stop(timeout=10)
+
+
+# --- v3.12.0 추가: 지표 정의 (게이지는 /metrics 조회 시점에만 계산) ---
+HTTP_REQUESTS = counter('beacon_http_requests_total', "경로별 요청 수",
+                        ('route', 'method', 'status'))
+HTTP_REQUEST_SECONDS = histogram('beacon_http_request_seconds', "경로별 요청 처리 시간(초)",
+                                 ('route', 'method'))
+# result: 'applied'(반영), 'coalesced'(같은 요청의 더 최근 갱신에 합쳐짐),
+#         'stale'(저장소에 더 최근 기록이 있음), 'rejected'(잘못된 항목/미인증 사용자)
+LOCATION_BATCH_UPDATES = counter('beacon_location_batch_updates_total',
+                                 "일괄 위치 갱신 항목 수 (처리 결과별)", ('result',))
+# kind: 'explicit'(/heartbeat), 'implicit'(변경 없는 /update-location)
+LOCATION_HEARTBEATS = counter('beacon_location_heartbeats_total',
+                              "TTL만 연장한 위치 하트비트 수", ('kind',))
+# kind: 'pair'(두 지역 간 거리), 'radius'(반경 안의 지역 목록),
+#       'multi'(요청자 지역에서 여러 지역까지 일괄 조회, v3.24.0), 'route'(가중치 경로, v3.22.0)
+DISTANCE_LOOKUPS = counter('beacon_distance_lookups_total', "지역 간 거리 조회 수", ('kind',))
+gauge('beacon_location_store_size', "만료되지 않은 위치 기록 수",
+      lambda: {(key or 'default',): len(store) for key, store in location_store.shards().items()},
+      ('shard',))
+gauge('beacon_location_store_version', "위치 저장소 변경 버전",
+      lambda: {(key or 'default',): store.version
+               for key, store in location_store.shards().items()},
+      ('shard',))
+gauge('beacon_verified_users_cached', "인증 사용자 캐시 항목 수", lambda: len(verified_users))
+gauge('beacon_gameinfo_cache_entries', "게임 정보 캐시 항목 수", lambda: len(gameinfo_client))
+gauge('beacon_location_history_segments', "위치 이력 세그먼트 파일 수",
+      lambda: location_history.segment_count())
+gauge('beacon_zone_activity_tracked', "지역 활동 집계가 추적 중인 (지역, 사용자) 쌍 수",
+      lambda: {(key or 'default', label): count
+               for key, activity in zone_activity.shards().items()
+               for label, count in activity.tracked().items()},
+      ('shard', 'window'))
+gauge('beacon_rate_limit_buckets', "요청 제한용 사용자별 토큰 버킷 수",
+      lambda: len(rate_limiter) if rate_limiter is not None else 0)
+gauge('beacon_gameinfo_cache_hit_ratio', "게임 정보 조회 중 외부 API를 호출하지 않은 비율",
+      lambda: gameinfo_client.hit_ratio())
+
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+
+# --- v3.25.0 추가: 요청 제한 (Flask와 asyncio 서버가 공유) ---
+def check_rate_limit(path, client=None):
+    """
+    path(라우트 규칙 문자열)의 요청 제한을 확인하여, 넘었으면 (응답 본문, 429, 헤더 목록)을,
+    아니면 None을 반환합니다. 사용자별 버킷 키는 클라이언트 IP입니다.
+    (본문의 username은 인증 전 값이므로 키로 쓰지 않음, IP를 모르면 전체 버킷만 확인)
+    """
+    route_class = RATE_LIMIT_ROUTE_CLASSES.get(path)
+    if rate_limiter is None or route_class is None:
+        return None
+    key = f"ip:{client}" if client else None
+    allowed, wait, scope = rate_limiter.admit(route_class, key)
+    if allowed:
+        return None
+    message = '요청이 너무 많습니다.' if scope == 'user' else '서버 요청이 많습니다.'
+    return ({'error': f'{message} 잠시 후 다시 시도하세요.'}, 429,
+            [('Retry-After', retry_after_header(wait))])
+
+
+@app.before_request
+def enforce_rate_limit():
+    if request.url_rule is None:
+        return None
+    limited = check_rate_limit(request.url_rule.rule, request.remote_addr)
+    if limited is None:
+        return None
+    body, status, headers = limited
+    return jsonify(body), status, headers
+
+
+@app.after_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # 경로 변수나 잘못된 주소로 레이블이 늘어나지 않도록 URL 규칙 문자열을 사용
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, route, request.method)
+        HTTP_REQUESTS.inc(route, request.method, str(response.status_code))
+    return response
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
 
 
 # --- v1.6.4 수정: 가상 사용자 위치 변경 ---
 def initialize_dummy_users():
     """서버 시작 시 테스트용 가상 사용자를 생성합니다."""
     with app.app_context():
-        db.create_all()
+        migrate_database()
 
         dummy_users = {
             "BraveWarrior": {"server": "West (Americas)", "guild_name": "Warriors of Light", "zone": "Sandrift Steppe"},
@@ -65,120 +330,819 @@ def initialize_dummy_users():
                 db.session.add(new_user)
                 print(f"가상 사용자 '{username}' 생성.")
 
-            locations[username] = {
-                'zone': info["zone"],
-                'group_size': random.randint(5, 50),
-                'timestamp': datetime.utcnow()
-            }
+            location_store.shard(info["server"]).update(username, info["zone"],
+                                                        random.randint(5, 50))
 
         db.session.commit()
         print("가상 사용자 초기화 완료.")
 
 
 # ... (나머지 모든 함수는 이전과 동일합니다) ...
+# --- v3.13.0 수정: Flask 라우트와 asyncio 서버(async_server.py)가 공유하도록 처리 로직 분리 ---
+# handle_* 함수는 (응답 본문, 상태 코드)를 반환하며, DB를 쓰는 함수는 앱 컨텍스트가 필요합니다.
+# --- v3.26.0 추가: 동시에 들어온 등록을 모아 일괄 upsert + 커밋 한 번으로 반영 ---
+def apply_registrations(registrations):
+    with app.app_context():
+        return bulk_register_users(registrations)
+
+
+registration_committer = GroupCommitter(apply_registrations, REGISTER_BATCH_MAX,
+                                        name="register-commit")
+
+
+def handle_register(data):
+    username, server = data.get('username'), data.get('server')
+    if not isinstance(username, str) or not username or not server:
+        return {'error': '사용자 이름과 서버 정보가 필요합니다.'}, 400
+    # 잘못된 값은 그룹 커밋 묶음에 넣기 전에 거절 (같은 묶음의 다른 등록이 실패하지 않도록)
+    if not isinstance(server, str) or server not in API_SERVERS:
+        return {'error': '알 수 없는 서버입니다.'}, 400
+    user, created, previous_server = registration_committer.submit((username, server))
+    if created:
+        return {'message': f'{username} 사용자가 성공적으로 등록되었습니다.',
+                'username': user.username}, 201
+    verified_users.refresh(user)
+    if previous_server != server:
+        # 이전 게임 서버 샤드에 남은 위치는 새 서버의 사용자에게 보이면 안 되므로 제거
+        location_store.shard(previous_server).remove(user.username)
+    return {'message': f'기존 사용자 {user.username}의 서버 정보가 업데이트되었습니다.',
+            'username': user.username}, 200
+
+
 @app.route('/register', methods=['POST'])
 def register():
-    data = request.get_json()
-    username, server = data.get('username'), data.get('server')
-    if not username or not server: return jsonify({'error': '사용자 이름과 서버 정보가 필요합니다.'}), 400
-    user = User.query.filter_by(username=username).first()
-    if user:
-        user.server = server
-        db.session.commit()
-        return jsonify({'message': f'기존 사용자 {username}의 서버 정보가 업데이트되었습니다.'}), 200
-    else:
-        new_user = User(username=username, server=server)
-        db.session.add(new_user)
-        db.session.commit()
-        return jsonify({'message': f'{username} 사용자가 성공적으로 등록되었습니다.'}), 201
+    body, status = handle_register(request.get_json())
+    return jsonify(body), status
 
 
+# --- v3.6.0 수정: 캐시/single-flight를 거치는 GameInfoClient로 위임 ---
 def get_player_info_from_api(username, server):
-    print(f"[{server} 서버 API] '{username}'의 정보 요청 중...")
-    base_url = API_SERVERS.get(server)
-    if not base_url: return None
-    url = f"{base_url}/search?q={username}"
-    try:
-        response = requests.get(url, timeout=5)
-        if response.status_code == 200:
-            data = response.json()
-            for player in data.get('players', []):
-                if player.get('Name').lower() == username.lower(): return player
-            return None
-        return None
-    except requests.exceptions.RequestException:
-        return None
+    return gameinfo_client.lookup_player(username, server)
 
 
-@app.route('/verify', methods=['POST'])
-def verify_user():
-    data = request.get_json()
-    username = data.get('username')
-    user = User.query.filter_by(username=username).first()
-    if not user: return jsonify({'error': '등록되지 않은 사용자입니다.'}), 404
-    if not user.server: return jsonify({'error': '서버 정보가 등록되지 않았습니다.'}), 400
+def apply_guild_info(username, player_data):
+    """비동기 길드 조회가 끝난 뒤 백그라운드 스레드에서 사용자 길드 정보를 저장합니다."""
+    if not player_data or not player_data.get('GuildName'):
+        return
+    with app.app_context():
+        for user in bulk_update_guilds([(username, player_data['GuildName'],
+                                         player_data['GuildId'])]):
+            apply_guild_change(user)
+
+
+def find_verify_target(data):
+    """인증할 사용자의 게임 서버를 반환합니다. 인증할 수 없으면 (None, (오류 본문, 상태 코드))."""
+    user = find_user(data.get('username'))
+    if not user: return None, ({'error': '등록되지 않은 사용자입니다.'}, 404)
+    if not user.server: return None, ({'error': '서버 정보가 등록되지 않았습니다.'}, 400)
+    return user.server, None
+
+
+def complete_verification(username, player_data=None, guild_lookup_pending=False):
+    """사용자를 인증 상태로 기록하고, 조회된 길드 정보가 있으면 함께 저장합니다."""
+    user = find_user(username)
     user.is_verified = True
-    player_data = get_player_info_from_api(username, user.server)
     if player_data and player_data.get('GuildName'):
         user.guild_name = player_data['GuildName']
         user.guild_id = player_data['GuildId']
     db.session.commit()
-    return jsonify({'message': '서버에 인증 상태가 성공적으로 기록되었습니다.'}), 200
+    verified_users.refresh(user)
+    body = {'message': '서버에 인증 상태가 성공적으로 기록되었습니다.', 'username': user.username}
+    if guild_lookup_pending:
+        body['guild_lookup'] = 'pending'
+    return body, 200
+
+
+@app.route('/verify', methods=['POST'])
+def verify_user():
+    data = request.get_json()
+    username = data.get('username')
+    server, error = find_verify_target(data)
+    if error:
+        return jsonify(error[0]), error[1]
+    if VERIFY_ASYNC_GUILD_LOOKUP:
+        body, status = complete_verification(username, guild_lookup_pending=True)
+        gameinfo_client.lookup_player_async(
+            username, server, callback=lambda player: apply_guild_info(username, player))
+        return jsonify(body), status
+    body, status = complete_verification(username, get_player_info_from_api(username, server))
+    return jsonify(body), status
+
+
+# --- v3.14.0 추가: 게임 서버별 샤드 선택 ---
+def location_shard(user_info):
+    """인증 사용자 캐시 항목(없으면 None)의 게임 서버에 해당하는 위치 저장소 샤드를 반환합니다."""
+    return location_store.shard(user_info['server'] if user_info else None)
+
+
+# --- v3.27.1 추가: 위치 보고 값 검증 (저장소, 이력 로그, 스냅샷, 정렬/필터가 이 형식을 가정) ---
+def location_value_error(zone, group_size):
+    """zone과 group_size가 올바르면 None, 아니면 오류 메시지를 반환합니다."""
+    if not isinstance(zone, str) or not zone or len(zone) > LOCATION_ZONE_MAX_LENGTH:
+        return f'zone은 {LOCATION_ZONE_MAX_LENGTH}자 이하의 지역 이름이어야 합니다.'
+    if isinstance(group_size, bool) or not isinstance(group_size, int) or group_size < 0:
+        return 'group_size는 0 이상의 정수여야 합니다.'
+    return None
+
+
+def handle_update_location(data, verified=None):
+    """
+    verified(인증 사용자 캐시 항목 또는 False)가 주어지면 캐시 조회를 생략합니다.
+    (asyncio 서버가 미리 확인한 경우)
+    """
+    username = data.get('username')
+    zone, group_size = data.get('zone'), data.get('group_size')
+    error = location_value_error(zone, group_size)
+    if error:
+        return {'error': error}, 400
+    user_info = verified if verified is not None else verified_users.get(username)
+    if not user_info:
+        return {'error': '인증되지 않은 사용자입니다.'}, 403
+    username = user_info['username']
+    store = location_shard(user_info)
+    # --- v3.16.0 추가: 지역/그룹 크기가 그대로면 새 버전 없이 TTL만 연장 ---
+    current = store.get(username)
+    if (current and current['zone'] == zone and current['group_size'] == group_size
+            and store.touch(username)):
+        LOCATION_HEARTBEATS.inc('implicit')
+        timestamp = datetime.utcnow()
+    else:
+        timestamp = store.update(username, zone, group_size)['timestamp']
+    record_sighting(user_info, username, zone, group_size, timestamp)
+    return {'message': '위치가 업데이트되었습니다.'}, 200
+
+
+def record_sighting(user_info, username, zone, group_size, timestamp):
+    """받아들인 위치 보고를 이력 로그(v3.20.0)와 지역 활동 집계(v3.21.0)에 반영합니다."""
+    location_history.append(user_info['server'], username, zone, group_size, timestamp)
+    zone_activity.shard(user_info['server']).observe(username, zone, group_size,
+                                                     user_info['guild_name'],
+                                                     to_unix_seconds(timestamp))
 
 
 @app.route('/update-location', methods=['POST'])
 def update_location():
-    data = request.get_json()
+    body, status = handle_update_location(request.get_json())
+    return jsonify(body), status
+
+
+# --- v3.16.0 추가: 위치 하트비트 ---
+def handle_heartbeat(data, verified=None):
+    """
+    위치가 그대로인 사용자의 TTL만 연장합니다. (verified는 handle_update_location과 같음)
+    살아 있는 위치가 없으면 404를 반환하므로, 클라이언트는 전체 위치를 다시 보내야 합니다.
+    """
+    username = data.get('username')
+    user_info = verified if verified is not None else verified_users.get(username)
+    if not user_info:
+        return {'error': '인증되지 않은 사용자입니다.'}, 403
+    username = user_info['username']
+    store = location_shard(user_info)
+    if not store.touch(username):
+        return {'error': '연장할 위치 정보가 없습니다. 위치를 다시 보내주세요.'}, 404
+    LOCATION_HEARTBEATS.inc('explicit')
+    record = store.get(username)
+    if record:  # 하트비트도 그 지역에 머물러 있다는 목격이므로 활동 집계에 반영 (이력 로그 제외)
+        zone_activity.shard(user_info['server']).observe(username, record['zone'],
+                                                         record['group_size'],
+                                                         user_info['guild_name'])
+    return {'message': '위치 유지 시간이 연장되었습니다.'}, 200
+
+
+@app.route('/heartbeat', methods=['POST'])
+def heartbeat():
+    body, status = handle_heartbeat(request.get_json())
+    return jsonify(body), status
+
+
+# --- v3.15.0 추가: 위치 일괄 갱신 ---
+def coalesce_location_updates(updates):
+    """
+    갱신 목록을 사용자별 최신 항목 {username: (ts, zone, group_size)}로 합칩니다.
+    ts(유닉스 시각, 초)가 같으면 뒤에 온 항목이, ts가 없으면 수신 시각이 쓰입니다.
+    클라이언트 시계 오차로 미래 시각이 오면 현재 시각으로 제한합니다.
+    (합친 결과, 잘못된 항목 오류 목록, 유효 항목 수)를 반환합니다.
+    zone/group_size는 여기서 확인하지 않으므로 invalid_location_updates로 먼저 확인합니다.
+    """
+    now = time.time()
+    latest, rejected, valid = {}, [], 0
+    for index, update in enumerate(updates):
+        username = update.get('username') if isinstance(update, dict) else None
+        ts = update.get('ts', now) if username else None
+        if not username or not isinstance(username, str):
+            rejected.append({'index': index, 'error': '사용자 이름이 필요합니다.'})
+            continue
+        if isinstance(ts, bool) or not isinstance(ts, (int, float)) or ts < 0:
+            rejected.append({'index': index, 'username': username,
+                             'error': 'ts는 유닉스 시각(초)이어야 합니다.'})
+            continue
+        valid += 1
+        ts = min(ts, now)
+        current = latest.get(username)
+        if current is None or ts >= current[0]:
+            latest[username] = (ts, update.get('zone'), update.get('group_size'))
+    return latest, rejected, valid
+
+
+def invalid_location_updates(updates):
+    """zone/group_size가 잘못된 항목의 [{'index', 'error'}, ...] 목록입니다."""
+    invalid = []
+    for index, update in enumerate(updates):
+        if isinstance(update, dict):
+            error = location_value_error(update.get('zone'), update.get('group_size'))
+            if error:
+                invalid.append({'index': index, 'error': error})
+    return invalid
+
+
+def handle_update_locations(data, verified=None):
+    """
+    {'updates': [{'username', 'zone', 'group_size', 'ts'}, ...]}를 처리합니다.
+    verified({username: 인증 사용자 캐시 항목})가 주어지면 캐시/DB 확인을 생략합니다.
+    미인증 사용자나 잘못된 항목은 rejected로 돌려주고 나머지는 반영합니다.
+    """
+    updates = data.get('updates')
+    if not isinstance(updates, list):
+        return {'error': 'updates 배열이 필요합니다.'}, 400
+    if len(updates) > LOCATION_BATCH_MAX_UPDATES:
+        error = f'한 번에 최대 {LOCATION_BATCH_MAX_UPDATES}개까지 갱신할 수 있습니다.'
+        return {'error': error}, 413
+    invalid = invalid_location_updates(updates)
+    if invalid:
+        return {'error': '잘못된 위치 항목이 있습니다.', 'invalid': invalid}, 400
+
+    latest, rejected, valid = coalesce_location_updates(updates)
+    if verified is None:
+        verified = verified_users.get_many(latest)
+    # 대소문자만 다른 이름은 저장된 이름 하나로 다시 합침 (ts가 같으면 뒤에 온 항목)
+    accepted_by_user, merged = {}, 0
+    for username, (ts, zone, group_size) in latest.items():
+        user_info = verified.get(username)
+        if not user_info:
+            rejected.append({'username': username, 'error': '인증되지 않은 사용자입니다.'})
+            continue
+        current = accepted_by_user.get(user_info['username'])
+        merged += current is not None
+        if current is None or ts >= current[1]:
+            accepted_by_user[user_info['username']] = (user_info, ts, zone, group_size)
+    entries_by_shard = {}
+    for username, (user_info, ts, zone, group_size) in accepted_by_user.items():
+        entries_by_shard.setdefault(user_info['server'], []).append(
+            (username, zone, group_size, datetime.utcfromtimestamp(ts)))
+
+    applied = 0
+    for server, entries in entries_by_shard.items():
+        applied_usernames = set(location_store.shard(server).update_many(entries))
+        applied += len(applied_usernames)
+        for username, zone, group_size, timestamp in entries:
+            if username in applied_usernames:
+                record_sighting(accepted_by_user[username][0], username, zone, group_size,
+                                timestamp)
+    accepted = len(accepted_by_user)
+    result = {'applied': applied, 'coalesced': valid - len(latest) + merged,
+              'stale': accepted - applied, 'rejected': rejected}
+    for key in ('applied', 'coalesced', 'stale'):
+        if result[key]:
+            LOCATION_BATCH_UPDATES.inc(key, amount=result[key])
+    if rejected:
+        LOCATION_BATCH_UPDATES.inc('rejected', amount=len(rejected))
+    return result, 200
+
+
+@app.route('/update-locations', methods=['POST'])
+def update_locations():
+    body, status = handle_update_locations(request.get_json())
+    return jsonify(body), status
+
+
+# --- v3.21.0 추가: 지역 활동 히트맵 ---
+def handle_zone_heatmap(data, verified=None):
+    """
+    {'username', 'window'?, 'zone'?, 'max_distance'?}로 요청자 게임 서버의 지역/길드별
+    윈도우 집계({'groups': 서로 다른 보고자 수, 'players': 그룹 크기 합})를 반환합니다.
+    zone이 있으면 zone에서 max_distance(기본 0) 홉 이내의 지역만 담고, 그 합을 around에 넣습니다.
+    (around의 groups는 지역별 값의 합이므로 윈도우 안에서 지역을 옮긴 사용자는 중복 집계됨)
+    """
+    username = data.get('username')
+    user_info = verified if verified is not None else verified_users.get(username)
+    if not user_info:
+        return {'error': '인증되지 않은 사용자입니다.'}, 403
+    window = data.get('window')
+    if window is not None and window not in ZONE_ACTIVITY_WINDOWS:
+        return {'error': f"window는 {', '.join(ZONE_ACTIVITY_WINDOWS)} 중 하나여야 합니다."}, 400
+    zone = data.get('zone')
+    if zone is not None and not isinstance(zone, str):
+        return {'error': 'zone은 문자열이어야 합니다.'}, 400
+    try:
+        max_distance = parse_max_distance(data.get('max_distance'))
+    except ValueError as e:
+        return {'error': str(e)}, 400
+
+    zones = None
+    if zone is not None:
+        zones = [nearby_zone for nearby_zone, _ in zones_within(zone, max_distance or 0)]
+        DISTANCE_LOOKUPS.inc('radius')
+    activity = zone_activity.shard(user_info['server'])
+    body = activity.heatmap([window] if window else None, zones)
+    body['windows'] = {label: ZONE_ACTIVITY_WINDOWS[label] for label in body['zones']}
+    if zone is not None:
+        body['around'] = {label: {'groups': sum(c['groups'] for c in counts.values()),
+                                  'players': sum(c['players'] for c in counts.values())}
+                          for label, counts in body['zones'].items()}
+    return body, 200
+
+
+@app.route('/zone-heatmap', methods=['POST'])
+def zone_heatmap():
+    body, status = handle_zone_heatmap(request.get_json())
+    return jsonify(body), status
+
+
+# --- v3.22.0 추가: 가중치 경로 탐색 ---
+def handle_route(data, verified=None):
+    """
+    {'username', 'from'?, 'to'}로 from에서 to까지의 최소 이동 비용 경로를 반환합니다.
+    from이 없으면 요청자의 현재 위치에서 출발합니다. (verified는 handle_update_location과 같음)
+    응답: {'from', 'to', 'path', 'cost', 'hops', 'portal_transitions'}
+    """
     username = data.get('username')
-    user = User.query.filter_by(username=username, is_verified=True).first()
-    if not user: return jsonify({'error': '인증되지 않은 사용자입니다.'}), 403
-    locations[username] = {'zone': data.get('zone'), 'group_size': data.get('group_size'),
-                           'timestamp': datetime.utcnow()}
-    return jsonify({'message': '위치가 업데이트되었습니다.'}), 200
+    user_info = verified if verified is not None else verified_users.get(username)
+    if not user_info:
+        return {'error': '인증되지 않은 사용자입니다.'}, 403
+    start_zone, end_zone = data.get('from'), data.get('to')
+    if start_zone is None:
+        current = location_shard(user_info).get(user_info['username'])
+        if not current:
+            return {'error': '현재 위치 정보가 없습니다. from을 지정하세요.'}, 404
+        start_zone = current['zone']
+    for name, zone in (('from', start_zone), ('to', end_zone)):
+        if not isinstance(zone, str) or zone not in ZONE_IDS:
+            return {'error': f'{name}: 알 수 없는 지역입니다.'}, 400
+    route = find_route(start_zone, end_zone)
+    DISTANCE_LOOKUPS.inc('route')
+    if route is None:
+        return {'error': '두 지역을 잇는 경로가 없습니다.'}, 404
+    return {'from': start_zone, 'to': end_zone, **route}, 200
+
+
+@app.route('/route', methods=['POST'])
+def route_between_zones():
+    body, status = handle_route(request.get_json())
+    return jsonify(body), status
+
+
+# --- v3.20.0 추가: 위치 이력 조회 ---
+def parse_history_time(value, name):
+    """유닉스 시각(초) 또는 ISO 8601 문자열(시간대가 없으면 UTC)을 유닉스 초로 바꿉니다."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            pass
+        else:
+            if parsed.tzinfo is not None:
+                parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+            return to_unix_seconds(parsed)
+    raise ValueError(f'{name}는 유닉스 시각(초) 또는 ISO 8601 문자열이어야 합니다.')
+
+
+def handle_location_history(data, verified=None):
+    """
+    {'username', 'zone'?, 'start'?, 'end'?, 'limit'?}로 요청자 게임 서버의 목격 기록을 조회합니다.
+    결과는 시각 순이며, limit을 넘으면 앞쪽 limit개와 truncated=True를 반환합니다.
+    (verified는 handle_update_location과 같음)
+    """
+    username = data.get('username')
+    user_info = verified if verified is not None else verified_users.get(username)
+    if not user_info:
+        return {'error': '인증되지 않은 사용자입니다.'}, 403
+    if not location_history.running:
+        return {'error': '위치 이력 기록이 꺼져 있습니다.'}, 503
+    zone = data.get('zone')
+    if zone is not None and not isinstance(zone, str):
+        return {'error': 'zone은 문자열이어야 합니다.'}, 400
+    try:
+        start = parse_history_time(data.get('start'), 'start')
+        end = parse_history_time(data.get('end'), 'end')
+        limit = _parse_query_int(data, 'limit', 1, LOCATION_HISTORY_QUERY_MAX_LIMIT)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    if start is not None and end is not None and start > end:
+        return {'error': 'start는 end보다 늦을 수 없습니다.'}, 400
+
+    records, truncated = location_history.query(zone, start, end, server=user_info['server'],
+                                                limit=limit or 1000)
+    sightings = [{'username': record_username, 'zone': record_zone, 'group_size': group_size,
+                  'timestamp': from_unix_seconds(ts).isoformat(timespec='seconds')}
+                 for ts, record_username, record_zone, group_size, _ in records]
+    return {'sightings': sightings, 'truncated': truncated}, 200
+
+
+@app.route('/location-history', methods=['POST'])
+def location_history_route():
+    body, status = handle_location_history(request.get_json())
+    return jsonify(body), status
+
+
+# --- v3.8.0 수정: /get-locations와 /stream-locations가 공유하는 응답 행 생성 로직 분리 ---
+def parse_max_distance(value):
+    """max_distance 파라미터(JSON 정수 또는 쿼리 문자열)를 검증합니다. 잘못된 값이면 ValueError."""
+    if value is None:
+        return None
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise ValueError('max_distance는 0 이상의 정수여야 합니다.')
+    return value
+
+
+def build_location_row(username, user_location_data, distance):
+    user_info = verified_users.peek(username)
+    return {
+        'username': username,
+        'guild_name': user_info['guild_name'] if user_info else "",
+        'zone': user_location_data['zone'],
+        'group_size': user_location_data['group_size'],
+        'distance': distance,
+        'last_updated': user_location_data['timestamp'].strftime('%H:%M:%S')
+    }
+
+
+def guild_name_of(username):
+    user_info = verified_users.peek(username)
+    return user_info['guild_name'] if user_info else ""
+
+
+# --- v3.17.0 수정: 목록 수집과 응답 형식 변환(행 목록 / 열 기반)을 분리 ---
+def encode_location_rows(entries):
+    """[(사용자 이름, 기록, 거리), ...]를 기존 JSON 행 목록으로 바꿉니다."""
+    return [build_location_row(username, record, distance)
+            for username, record, distance in entries]
+
+
+def encode_location_columnar(entries):
+    return encode_location_columns(entries, guild_name_of)
+
+
+def location_encoder(media_type):
+    return encode_location_rows if media_type == FORMAT_JSON else encode_location_columnar
+
+
+def build_location_rows(store, requesting_user_name, max_distance=None):
+    """요청자 샤드(store) 기준 활성 사용자 행 목록을 만듭니다."""
+    return encode_location_rows(
+        collect_location_entries(store, requesting_user_name, max_distance))
+
+
+# --- v3.18.0 추가: 서버 측 필터/정렬/상위 K개 선택 ---
+def _group_size_or_none(record):
+    """기록의 group_size가 정수이면 그 값을, 아니면 None을 반환합니다."""
+    group_size = record['group_size']
+    if isinstance(group_size, bool) or not isinstance(group_size, int):
+        return None
+    return group_size
+
+
+def _group_size_sort_key(entry):
+    """큰 그룹 순. 그룹 크기를 정수로 알 수 없는 기록은 맨 뒤로 보냅니다."""
+    group_size = _group_size_or_none(entry[1])
+    return (-group_size if group_size is not None else float('inf'), entry[0])
+
+
+LOCATION_SORT_KEYS = {
+    # 모두 오름차순 키 (같으면 사용자 이름 순). 거리를 숫자로 알 수 없는 사용자는 맨 뒤로
+    'distance': lambda entry: (entry[2] if isinstance(entry[2], int) else float('inf'), entry[0]),
+    'group_size': lambda entry: _group_size_sort_key(entry),
+    'recency': lambda entry: (-entry[1]['timestamp'].timestamp(), entry[0]),
+}
+
+
+def _parse_query_int(data, name, minimum, maximum=None):
+    value = data.get(name)
+    if value is None:
+        return None
+    if isinstance(value, str) and value.isdigit():
+        value = int(value)
+    if (not isinstance(value, int) or isinstance(value, bool) or value < minimum
+            or (maximum is not None and value > maximum)):
+        upper = f" {maximum} 이하" if maximum is not None else ""
+        raise ValueError(f'{name}는 {minimum} 이상{upper}의 정수여야 합니다.')
+    return value
+
+
+def parse_location_query(data):
+    """
+    /get-locations의 필터/정렬/개수 파라미터를 검증하여 딕셔너리로 반환합니다.
+    {'guild', 'min_group_size', 'max_group_size', 'sort', 'limit'} (주어지지 않은 값은 None)
+    잘못된 값이면 ValueError.
+    """
+    guild = data.get('guild')
+    if guild is not None and not isinstance(guild, str):
+        raise ValueError('guild는 문자열이어야 합니다.')
+    sort = data.get('sort')
+    if sort is not None and sort not in LOCATION_SORT_KEYS:
+        raise ValueError(f"sort는 {', '.join(LOCATION_SORT_KEYS)} 중 하나여야 합니다.")
+    query = {
+        'guild': guild,
+        'min_group_size': _parse_query_int(data, 'min_group_size', 0),
+        'max_group_size': _parse_query_int(data, 'max_group_size', 0),
+        'sort': sort,
+        'limit': _parse_query_int(data, 'limit', 1, LOCATION_QUERY_MAX_LIMIT),
+    }
+    if query['limit'] is not None and sort is None:
+        query['sort'] = 'distance'  # 개수만 주어지면 가까운 순으로 자름
+    return query
+
+
+def location_filter(query):
+    """query의 필터 조건으로 (사용자 이름, 기록) -> bool 함수를 만듭니다. 조건이 없으면 None."""
+    if not query:
+        return None
+    guild = query['guild'].casefold() if query['guild'] is not None else None
+    min_group_size, max_group_size = query['min_group_size'], query['max_group_size']
+    if guild is None and min_group_size is None and max_group_size is None:
+        return None
+
+    def matches(username, record):
+        group_size = _group_size_or_none(record)
+        if group_size is None and (min_group_size is not None or max_group_size is not None):
+            return False
+        if min_group_size is not None and group_size < min_group_size:
+            return False
+        if max_group_size is not None and group_size > max_group_size:
+            return False
+        return guild is None or guild_name_of(username).casefold() == guild
+    return matches
+
+
+def location_query_tag(query, requester=None, max_distance=None, media_type=FORMAT_JSON):
+    """
+    같은 저장소 버전이라도 결과가 달라지는 요청 조건(요청자, 반경, 응답 형식,
+    필터/정렬/개수)마다 ETag가 달라지도록 붙이는 꼬리표입니다.
+    since는 넣지 않습니다. (저장소 버전이 같으면 클라이언트가 병합해 둔 목록이 그대로 최신)
+    """
+    canonical = json.dumps({'query': query, 'requester': requester, 'max_distance': max_distance,
+                            'media_type': media_type},
+                           sort_keys=True, ensure_ascii=False, default=str)
+    return f":{zlib.crc32(canonical.encode('utf-8')):08x}"
+
+
+def select_location_entries(entries, query):
+    """
+    entries(이터러블)를 query의 sort/limit에 따라 고릅니다.
+    limit이 있으면 전체를 정렬하지 않고 크기 limit의 힙으로 상위 항목만 남깁니다. (O(n log K))
+    """
+    if not query or query['sort'] is None:
+        return list(entries)
+    key = LOCATION_SORT_KEYS[query['sort']]
+    if query['limit'] is not None:
+        return heapq.nsmallest(query['limit'], entries, key=key)
+    return sorted(entries, key=key)
+
+
+def collect_location_entries(store, requesting_user_name, max_distance=None, query=None):
+    """
+    요청자 샤드(store) 기준 활성 사용자를 [(사용자 이름, 기록, 거리), ...]로 모읍니다.
+    요청자의 위치가 없으면 빈 목록을 반환합니다.
+    query(parse_location_query 결과)가 있으면 필터/정렬/개수를 적용하며,
+    요청자 본인 행은 필터와 개수에 관계없이 항상 맨 앞에 포함합니다.
+    """
+    if not requesting_user_name:
+        return []
+    requesting_user_location = store.get(requesting_user_name)
+    if not requesting_user_location:
+        return []
+    requesting_user_zone = requesting_user_location['zone']
+
+    # 저장소는 만료되지 않은 항목만 반환하므로 별도의 시간 필터링이 필요 없음
+    if max_distance is None:
+        active_users = [(uname, data, None) for uname, data in store.items()]
+    else:
+        active_users = store.within(requesting_user_zone, max_distance)
+        DISTANCE_LOOKUPS.inc('radius')
+    matches = location_filter(query)
+
+    # --- v3.24.0 수정: 사용자마다 거리를 구하지 않고 요청자 지역에서 지역 집합까지 한 번에 조회 ---
+    distances = None
+    if max_distance is None and active_users:
+        distances = distances_from(requesting_user_zone,
+                                   {record['zone'] for _, record, _ in active_users})
+        DISTANCE_LOOKUPS.inc('multi')
+    candidates = [
+        (username, user_location_data,
+         distances[user_location_data['zone']] if distance is None else distance)
+        for username, user_location_data, distance in active_users
+        if username != requesting_user_name
+        and (matches is None or matches(username, user_location_data))
+    ]
+
+    return ([(requesting_user_name, requesting_user_location, 0)]
+            + select_location_entries(candidates, query))
+
+
+def handle_get_locations(data, if_none_match=None, verified=None, media_type=FORMAT_JSON):
+    """
+    (응답 본문, 상태 코드, ETag)를 반환합니다.
+    if_none_match(werkzeug ETags)에 현재 ETag가 있으면 본문 없이 304를 반환합니다.
+    verified는 handle_update_location과 같습니다.
+    media_type이 FORMAT_JSON이 아니면 사용자 목록을 열 기반 형식으로 만듭니다.
+    """
+    requesting_user_name = data.get('username')
+
+    # --- v3.4.0 추가: max_distance가 주어지면 반경 안의 지역만 순회 ---
+    try:
+        max_distance = parse_max_distance(data.get('max_distance'))
+        query = parse_location_query(data)  # v3.18.0 추가: 필터/정렬/개수
+    except ValueError as e:
+        return {'error': str(e)}, 400, None
+
+    # --- v3.14.0 추가: 요청자의 게임 서버 샤드만 조회 ---
+    user_info = verified if verified is not None else verified_users.get(requesting_user_name)
+    if user_info:
+        requesting_user_name = user_info['username']
+    store = location_shard(user_info)
+
+    # --- v3.9.0 추가: 저장소 버전을 ETag로 사용하여 변경이 없으면 본문 없이 304 응답 ---
+    # --- v3.27.1 수정: 요청자, 반경, 응답 형식도 꼬리표에 포함 ---
+    etag = location_store_cursor(store) + location_query_tag(
+        query, requesting_user_name, max_distance, media_type)
+    if if_none_match is not None and if_none_match.contains(etag):
+        return None, 304, etag
+
+    encode = location_encoder(media_type)
+    if 'since' in data:
+        body = build_location_delta(store, requesting_user_name, data.get('since'), max_distance,
+                                    encode, query)
+    else:
+        body = encode(collect_location_entries(store, requesting_user_name, max_distance, query))
+    return body, 200, etag
+
+
+def encode_location_response(body, media_type, accept_encoding):
+    """/get-locations 본문을 직렬화/압축하여 (bytes, [(헤더 이름, 값)])로 반환합니다."""
+    payload, content_encoding = compress(serialize(body, media_type),
+                                         negotiate_encoding(accept_encoding))
+    headers = [('Content-Type', media_type), ('Vary', 'Accept, Accept-Encoding')]
+    if content_encoding:
+        headers.append(('Content-Encoding', content_encoding))
+    return payload, headers
 
 
 @app.route('/get-locations', methods=['POST'])
 def get_locations():
-    requesting_user_data = request.get_json()
-    requesting_user_name = requesting_user_data.get('username')
+    media_type = negotiate_format(request.headers.get('Accept'))
+    body, status, etag = handle_get_locations(request.get_json(), request.if_none_match,
+                                              media_type=media_type)
+    if status == 304:
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    if status != 200:
+        return jsonify(body), status
+    payload, headers = encode_location_response(body, media_type,
+                                                request.headers.get('Accept-Encoding'))
+    response = Response(payload, status=status, headers=headers)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
 
-    if not requesting_user_name or requesting_user_name not in locations:
-        return jsonify([]), 200
 
-    requesting_user_zone = locations[requesting_user_name]['zone']
-    active_users_response = []
-    five_minutes_ago = datetime.utcnow() - timedelta(minutes=5)
+# --- v3.9.0 추가: since 커서 기반 변경분 응답 ---
+def location_store_cursor(store, version=None):
+    """
+    '{epoch}:{version}' 형태의 커서를 만듭니다. epoch가 다르면 서버가 재시작되었거나
+    다른 샤드(게임 서버)의 커서입니다.
+    """
+    return f"{store.epoch}:{store.version if version is None else version}"
 
-    active_usernames = [uname for uname, data in locations.items() if data['timestamp'] > five_minutes_ago]
-    users_from_db = User.query.filter(User.username.in_(active_usernames)).all()
-    user_db_dict = {user.username: user for user in users_from_db}
 
-    for username in active_usernames:
-        user_location_data = locations[username]
-        user_db_info = user_db_dict.get(username)
+def parse_location_cursor(store, cursor):
+    """현재 epoch의 커서면 버전 정수를, 아니면(첫 요청, 재시작, 잘못된 값) None을 반환합니다."""
+    if not isinstance(cursor, str):
+        return None
+    epoch, _, version = cursor.partition(':')
+    if epoch != store.epoch or not version.isdigit():
+        return None
+    return int(version)
+
 
+def build_location_delta(store, requesting_user_name, since, max_distance=None,
+                         encode=encode_location_rows, query=None):
+    """
+    {'cursor', 'full', 'users', 'removed'} 형태의 변경분 응답을 만듭니다.
+    요청자 본인이 이동했다면 모든 거리가 바뀌므로 전체 목록(full)을 보냅니다.
+    max_distance가 있으면 반경 밖으로 나간 사용자는 removed에 넣습니다.
+    users는 encode(행 목록 또는 열 기반 형식 변환 함수)로 만듭니다.
+    query에 정렬/개수가 있으면 상위 목록이 통째로 바뀔 수 있으므로 항상 전체 목록을 보내고,
+    필터만 있으면 조건에서 벗어난 사용자를 removed에 넣습니다.
+    """
+    requesting_user_location = store.get(requesting_user_name)
+    if not requesting_user_location:
+        return {'cursor': location_store_cursor(store), 'full': True, 'users': encode([]),
+                'removed': []}
+    since_version = parse_location_cursor(store, since)
+    requester_version = store.last_changed(requesting_user_name) or 0
+    if since_version is not None and requester_version > since_version:
+        since_version = None
+    if query and query['sort'] is not None:
+        since_version = None
+
+    version, changed, removed, full = store.changes_since(since_version)
+    if full:
+        return {'cursor': location_store_cursor(store, version), 'full': True,
+                'users': encode(collect_location_entries(store, requesting_user_name,
+                                                         max_distance, query)),
+                'removed': []}
+
+    requesting_user_zone = requesting_user_location['zone']
+    matches = location_filter(query)
+    if changed:
+        distances = distances_from(requesting_user_zone,
+                                   {record['zone'] for _, record in changed})
+        DISTANCE_LOOKUPS.inc('multi')
+    entries = []
+    for username, user_location_data in changed:
         if username == requesting_user_name:
             distance = 0
         else:
-            distance = get_distance(requesting_user_zone, user_location_data['zone'])
+            if matches is not None and not matches(username, user_location_data):
+                removed.append(username)
+                continue
+            distance = distances[user_location_data['zone']]
+            in_range = isinstance(distance, int) and distance <= (max_distance or 0)
+            if max_distance is not None and not in_range:
+                removed.append(username)
+                continue
+        entries.append((username, user_location_data, distance))
+    return {'cursor': location_store_cursor(store, version), 'full': False,
+            'users': encode(entries), 'removed': removed}
 
-        active_users_response.append({
-            'username': username,
-            'guild_name': user_db_info.guild_name if user_db_info else "",
-            'zone': user_location_data['zone'],
-            'group_size': user_location_data['group_size'],
-            'distance': distance,
-            'last_updated': user_location_data['timestamp'].strftime('%H:%M:%S')
-        })
 
-    all_known_users = list(locations.keys())
-    for username in all_known_users:
-        if locations[username]['timestamp'] <= five_minutes_ago:
-            del locations[username]
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
 
-    return jsonify(active_users_response), 200
+
+@app.route('/stream-locations', methods=['GET'])
+def stream_locations():
+    """
+    위치 변경 이벤트를 Server-Sent Events로 전달합니다.
+    - snapshot: 전체 목록 (구독 직후, 본인 이동 시, 이벤트 큐가 넘쳤을 때)
+    - joined / moved: 사용자 한 명의 목록 행
+    - left: {'username': ...}
+    """
+    username = request.args.get('username')
+    user_info = verified_users.get(username) if username else None
+    if not user_info:
+        return jsonify({'error': '인증되지 않은 사용자입니다.'}), 403
+    username = user_info['username']
+    try:
+        max_distance = parse_max_distance(request.args.get('max_distance'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    store = location_shard(user_info)
+    subscription = store.subscribe(username, max_distance)
+
+    def generate():
+        try:
+            yield format_sse('snapshot', build_location_rows(store, username, max_distance))
+            while True:
+                try:
+                    kind, other, record = subscription.events.get(timeout=STREAM_KEEPALIVE_SECONDS)
+                except queue.Empty:
+                    yield ": keep-alive\n\n"
+                    continue
+                if kind == 'resync':
+                    yield format_sse('snapshot', build_location_rows(store, username,
+                                                                     max_distance))
+                elif kind == 'left':
+                    yield format_sse('left', {'username': other})
+                else:
+                    viewer = store.get(username)
+                    if viewer is None:
+                        continue
+                    distance = get_distance(viewer['zone'], record['zone'])
+                    DISTANCE_LOOKUPS.inc('pair')
+                    yield format_sse(kind, build_location_row(other, record, distance))
+        finally:
+            store.unsubscribe(subscription)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 
 if __name__ == '__main__':
     initialize_dummy_users()
+    with app.app_context():
+        print(f"인증 사용자 캐시 준비 완료: {verified_users.warm()}명")
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':  # 리로더 감시 프로세스에서는 저장하지 않음
+        start_location_snapshots()
+        start_location_history()
+        start_guild_refresh()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
@@ -0,0 +1,336 @@
+"""
+- 2026-10-18 - [추가] - v3.10.0: SQLite 기반 공유 위치 저장소
+- 기능: 여러 워커 프로세스(gunicorn 등)가 하나의 SQLite(WAL) 파일로 위치 정보를 공유
+- 기능: 만료 시각/지역/버전 인덱스로 만료 정리, 반경 조회, 변경분 조회를 처리
+- 기능: 다른 프로세스의 변경도 구독자에게 전달되도록 구독자가 있을 때만 변경분을 폴링
+- 2026-10-18 - [수정] - v3.12.0: 연결 사용 시간을 쿼리 시간 지표로 기록
+- 2026-10-18 - [수정] - v3.15.0: 일괄 갱신을 트랜잭션 하나로 처리
+- 2026-10-18 - [수정] - v3.16.0: 하트비트(touch)는 expires_at만 갱신
+- 2026-10-18 - [수정] - v3.27.1: mark_changed는 version만 갱신 (구독자에게는 폴링으로 전달)
+- 2026-10-18 - [수정] - v3.27.1: 일괄 갱신으로 바뀐 기록은 모두 같은 version 하나를 받음
+
+"""
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+
+from src.config.settings import (
+    LOCATION_TTL_SECONDS, LOCATION_TOMBSTONE_LIMIT, STREAM_POLL_INTERVAL_SECONDS,
+)
+from src.core.map_logic import zones_within
+from src.server.location_store import LocationStore
+from src.server.metrics import SQLITE_QUERY_SECONDS
+
+_EPOCH_START = datetime(1970, 1, 1)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS locations (
+    username   TEXT PRIMARY KEY,
+    zone       TEXT,
+    group_size INTEGER,
+    updated_at REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    version    INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_locations_zone ON locations (zone, expires_at);
+CREATE INDEX IF NOT EXISTS ix_locations_expires_at ON locations (expires_at);
+CREATE INDEX IF NOT EXISTS ix_locations_version ON locations (version);
+CREATE TABLE IF NOT EXISTS tombstones (
+    version  INTEGER PRIMARY KEY,
+    username TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value
+);
+"""
+
+UPSERT_LOCATION = (
+    "INSERT INTO locations (username, zone, group_size, updated_at, expires_at, version) "
+    "VALUES (?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (username) DO UPDATE SET zone = excluded.zone, "
+    "group_size = excluded.group_size, updated_at = excluded.updated_at, "
+    "expires_at = excluded.expires_at, version = excluded.version"
+)
+
+
+def _to_epoch(timestamp):
+    return (timestamp - _EPOCH_START).total_seconds()
+
+
+def _record(zone, group_size, updated_at):
+    return {'zone': zone, 'group_size': group_size,
+            'timestamp': datetime.utcfromtimestamp(updated_at)}
+
+
+class SQLiteLocationStore(LocationStore):
+    """
+    SQLite(WAL 모드) 파일 하나를 여러 프로세스가 공유하는 위치 저장소입니다.
+    - expires_at 인덱스가 인메모리 구현의 만료 최소 힙 역할을 합니다.
+    - version은 meta 테이블의 카운터로, 모든 프로세스에서 함께 단조 증가합니다.
+    - epoch는 DB 파일을 처음 만들 때 정해지므로 모든 워커가 같은 커서를 공유합니다.
+    - 연결은 스레드 간에 재사용하는 작은 풀로 관리합니다.
+    """
+
+    def __init__(self, path, ttl_seconds=LOCATION_TTL_SECONDS,
+                 tombstone_limit=LOCATION_TOMBSTONE_LIMIT,
+                 poll_interval=STREAM_POLL_INTERVAL_SECONDS):
+        super().__init__(ttl_seconds)
+        self.path = path
+        self.tombstone_limit = tombstone_limit
+        self.poll_interval = poll_interval
+        self._pool = queue.LifoQueue()
+        self._poller = None
+        self._seen_version = None
+        self._seen_zones = {}
+        with self._connection() as conn:
+            conn.executescript(SCHEMA)
+        with self._transaction() as conn:
+            conn.executemany("INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)",
+                             [('epoch', uuid.uuid4().hex[:8]), ('version', 0),
+                              ('tombstone_floor', 0)])
+            self.epoch = self._meta(conn, 'epoch')
+
+    # --- 연결 관리 ---
+    def _open(self):
+        conn = sqlite3.connect(self.path, timeout=5, isolation_level=None,
+                               check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        return conn
+
+    @contextmanager
+    def _connection(self):
+        """풀에서 연결을 빌려 줍니다. 빌린 동안의 시간(쿼리 + 잠금 대기)을 지표로 기록합니다."""
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        started = time.perf_counter()
+        try:
+            yield conn
+        finally:
+            SQLITE_QUERY_SECONDS.observe(time.perf_counter() - started, 'locations')
+            self._pool.put(conn)
+
+    @contextmanager
+    def _transaction(self, write=True):
+        """쓰기는 BEGIN IMMEDIATE로 잠금을 먼저 잡고, 읽기는 일관된 스냅샷을 위해 BEGIN을 씁니다."""
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def _meta(conn, key):
+        return conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()[0]
+
+    @staticmethod
+    def _next_version(conn):
+        return conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version' "
+                            "RETURNING value").fetchone()[0]
+
+    @property
+    def version(self):
+        with self._connection() as conn:
+            return self._meta(conn, 'version')
+
+    # --- 조회 ---
+    def __len__(self):
+        with self._connection() as conn:
+            return conn.execute("SELECT COUNT(*) FROM locations WHERE expires_at > ?",
+                                (time.time(),)).fetchone()[0]
+
+    def get(self, username):
+        with self._connection() as conn:
+            row = conn.execute("SELECT zone, group_size, updated_at FROM locations "
+                               "WHERE username = ? AND expires_at > ?",
+                               (username, time.time())).fetchone()
+        return _record(*row) if row else None
+
+    def items(self):
+        with self._connection() as conn:
+            rows = conn.execute("SELECT username, zone, group_size, updated_at FROM locations "
+                                "WHERE expires_at > ?", (time.time(),)).fetchall()
+        return [(username, _record(zone, group_size, updated_at))
+                for username, zone, group_size, updated_at in rows]
+
+    def users_in_zone(self, zone):
+        with self._connection() as conn:
+            rows = conn.execute("SELECT username, zone, group_size, updated_at FROM locations "
+                                "WHERE zone = ? AND expires_at > ?",
+                                (zone, time.time())).fetchall()
+        return [(username, _record(zone, group_size, updated_at))
+                for username, zone, group_size, updated_at in rows]
+
+    def within(self, zone, max_distance):
+        distances = dict(zones_within(zone, max_distance))
+        placeholders = ",".join("?" * len(distances))
+        with self._connection() as conn:
+            rows = conn.execute("SELECT username, zone, group_size, updated_at FROM locations "
+                                f"WHERE zone IN ({placeholders}) AND expires_at > ?",
+                                (*distances, time.time())).fetchall()
+        return [(username, _record(zone, group_size, updated_at), distances[zone])
+                for username, zone, group_size, updated_at in rows]
+
+    def last_changed(self, username):
+        with self._connection() as conn:
+            row = conn.execute("SELECT version FROM locations WHERE username = ?",
+                               (username,)).fetchone()
+        return row[0] if row else None
+
+    def changes_since(self, since):
+        now = time.time()
+        with self._transaction(write=False) as conn:
+            version = self._meta(conn, 'version')
+            floor = self._meta(conn, 'tombstone_floor')
+            if since is None or since < floor or since > version:
+                rows = conn.execute("SELECT username, zone, group_size, updated_at "
+                                    "FROM locations WHERE expires_at > ?", (now,)).fetchall()
+                return version, [(u, _record(z, g, t)) for u, z, g, t in rows], [], True
+            changed, removed = [], []
+            for username, zone, group_size, updated_at, expires_at in conn.execute(
+                    "SELECT username, zone, group_size, updated_at, expires_at FROM locations "
+                    "WHERE version > ? ORDER BY version", (since,)):
+                if expires_at > now:
+                    changed.append((username, _record(zone, group_size, updated_at)))
+                else:
+                    removed.append(username)
+            changed_names = {username for username, _ in changed}
+            for (username,) in conn.execute("SELECT username FROM tombstones WHERE version > ?",
+                                            (since,)):
+                if username not in changed_names:
+                    removed.append(username)
+        return version, changed, list(dict.fromkeys(removed)), False
+
+    # --- 변경 ---
+    def update(self, username, zone, group_size, timestamp=None):
+        now = time.time()
+        updated_at = _to_epoch(timestamp) if timestamp else now
+        with self._transaction() as conn:
+            version = self._next_version(conn)
+            conn.execute(UPSERT_LOCATION, (username, zone, group_size, updated_at,
+                                           now + self.ttl_seconds, version))
+        return _record(zone, group_size, updated_at)
+
+    def update_many(self, entries):
+        """
+        트랜잭션 하나로 반영합니다. 살아 있는 기록이 더 최근이면 건너뜁니다.
+        바뀐 기록은 모두 같은 version 하나를 받습니다.
+        """
+        now = time.time()
+        applied, version = [], None
+        with self._transaction() as conn:
+            for username, zone, group_size, timestamp in entries:
+                updated_at = _to_epoch(timestamp) if timestamp else now
+                current = conn.execute("SELECT updated_at, zone, group_size FROM locations "
+                                       "WHERE username = ? AND expires_at > ?",
+                                       (username, now)).fetchone()
+                if current and current[0] > updated_at:
+                    continue
+                applied.append(username)
+                if current and current[1:] == (zone, group_size):
+                    conn.execute("UPDATE locations SET expires_at = ? WHERE username = ?",
+                                 (now + self.ttl_seconds, username))
+                    continue
+                if version is None:
+                    version = self._next_version(conn)
+                conn.execute(UPSERT_LOCATION, (username, zone, group_size, updated_at,
+                                               now + self.ttl_seconds, version))
+        return applied
+
+    def touch(self, username):
+        now = time.time()
+        with self._connection() as conn:
+            cursor = conn.execute("UPDATE locations SET expires_at = ? "
+                                  "WHERE username = ? AND expires_at > ?",
+                                  (now + self.ttl_seconds, username, now))
+        return cursor.rowcount > 0
+
+    def mark_changed(self, username):
+        with self._transaction() as conn:
+            live = conn.execute("SELECT 1 FROM locations WHERE username = ? AND expires_at > ?",
+                                (username, time.time())).fetchone()
+            if live:
+                conn.execute("UPDATE locations SET version = ? WHERE username = ?",
+                             (self._next_version(conn), username))
+        return live is not None
+
+    def remove(self, username):
+        with self._transaction() as conn:
+            row = conn.execute("SELECT zone, group_size, updated_at FROM locations "
+                               "WHERE username = ?", (username,)).fetchone()
+            if row:
+                self._delete(conn, username)
+        return _record(*row) if row else None
+
+    def expire(self, now=None):
+        """expires_at 인덱스 앞쪽부터 만료된 항목을 지우고, 오래된 삭제 기록을 정리합니다."""
+        now = time.time() if now is None else now
+        with self._transaction() as conn:
+            expired = [username for (username,) in conn.execute(
+                "SELECT username FROM locations WHERE expires_at <= ?", (now,))]
+            for username in expired:
+                self._delete(conn, username)
+            cutoff = conn.execute("SELECT version FROM tombstones ORDER BY version DESC "
+                                  "LIMIT 1 OFFSET ?", (self.tombstone_limit,)).fetchone()
+            if cutoff:
+                conn.execute("DELETE FROM tombstones WHERE version <= ?", cutoff)
+                conn.execute("UPDATE meta SET value = ? WHERE key = 'tombstone_floor'", cutoff)
+        return expired
+
+    def _delete(self, conn, username):
+        version = self._next_version(conn)
+        conn.execute("DELETE FROM locations WHERE username = ?", (username,))
+        conn.execute("INSERT INTO tombstones (version, username) VALUES (?, ?)",
+                     (version, username))
+
+    # --- 구독: 다른 프로세스의 변경도 전달하기 위해 변경분을 폴링 ---
+    def subscribe(self, username, max_distance=None):
+        subscription = super().subscribe(username, max_distance)
+        with self._lock:
+            if not (self._poller and self._poller.is_alive()):
+                self._seen_version, changed, _, _ = self.changes_since(None)
+                self._seen_zones = {name: record['zone'] for name, record in changed}
+                self._poller = threading.Thread(target=self._poll_changes,
+                                                name="location-poller", daemon=True)
+                self._poller.start()
+        return subscription
+
+    def _viewer_location(self, username):
+        zone = self._seen_zones.get(username)
+        return {'zone': zone} if zone is not None else None
+
+    def _poll_changes(self):
+        while True:
+            time.sleep(self.poll_interval)
+            with self._lock:
+                if not self._subscribers:
+                    self._poller = None
+                    return
+            version, changed, removed, full = self.changes_since(self._seen_version)
+            if full:
+                self._seen_zones = {name: record['zone'] for name, record in changed}
+                for subscription in list(self._subscribers):
+                    subscription.push(('resync', subscription.username, None))
+            else:
+                for username, record in changed:
+                    previous_zone = self._seen_zones.get(username)
+                    self._seen_zones[username] = record['zone']
+                    self._publish('moved' if previous_zone else 'joined', username, record,
+                                  previous_zone)
+                for username in removed:
+                    previous_zone = self._seen_zones.pop(username, None)
+                    if previous_zone is not None:
+                        self._publish('left', username, {'zone': previous_zone}, previous_zone)
+            self._seen_version = version
@@ -0,0 +1,102 @@
+"""
+- 2026-10-18 - [추가] - v3.7.0: 인증 사용자 캐시
+- 기능: 인증된 사용자의 서버/길드 정보를 프로세스 메모리에 보관하여 요청마다의 SQL 조회를 생략
+- 기능: 서버 시작 시 DB에서 미리 채우고(warm), /register·/verify에서 갱신
+- 2026-10-18 - [수정] - v3.15.0: 여러 사용자 일괄 확인(get_many) 추가
+- 2026-10-18 - [수정] - v3.27.1: 대소문자 무시 조회
+- 기능: find_user/find_users(NOCASE)와 같은 규칙으로 캐시 키를 만들고 캐시 미스도 같은 조회로 확인
+- 기능: 캐시 항목에 저장된 이름(username)을 담아 요청 처리에서 이름을 저장된 표기로 통일
+
+"""
+import threading
+
+from src.server.database import User, find_user, find_users, nocase_key
+
+
+class VerifiedUserCache:
+    """
+    username -> {'username', 'server', 'guild_name', 'guild_id'} 형태로 인증된 사용자만 보관합니다.
+    키는 대소문자를 무시하며(nocase_key), 항목의 username은 DB에 저장된 표기입니다.
+    캐시에 없는 사용자는 DB에서 한 번 확인하고, 인증된 경우에만 캐시에 추가합니다.
+    (다른 프로세스에서 인증된 사용자도 이 경로로 반영됩니다.)
+    DB 조회가 필요한 메서드는 Flask 앱 컨텍스트 안에서 호출해야 합니다.
+    """
+
+    def __init__(self):
+        self._users = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, username):
+        return _key(username) in self._users
+
+    def __len__(self):
+        return len(self._users)
+
+    def warm(self):
+        """DB의 모든 인증 사용자를 불러와 캐시를 다시 채웁니다."""
+        users = {nocase_key(user.username): self._entry(user)
+                 for user in User.query.filter_by(is_verified=True).all()}
+        with self._lock:
+            self._users = users
+        return len(users)
+
+    def get(self, username):
+        """인증된 사용자면 캐시 항목을, 아니면 None을 반환합니다. (캐시 미스 시 DB 확인)"""
+        key = _key(username)
+        if key is None:
+            return None
+        entry = self._users.get(key)
+        if entry is not None:
+            return entry
+        user = find_user(username, verified=True)
+        if user:
+            return self.refresh(user)
+        return None
+
+    def get_many(self, usernames):
+        """
+        {username: 캐시 항목}을 인증된 사용자만 담아 반환합니다. (키는 요청한 이름 그대로)
+        캐시 미스인 사용자들은 DB 쿼리 한 번으로 확인합니다.
+        """
+        found, missing = {}, []
+        for username in usernames:
+            key = _key(username)
+            entry = self._users.get(key) if key is not None else None
+            if entry is not None:
+                found[username] = entry
+            elif key is not None:
+                missing.append(username)
+        if missing:
+            for username, user in find_users(missing, verified=True).items():
+                found[username] = self.refresh(user)
+        return found
+
+    def peek(self, username):
+        """DB를 조회하지 않고 캐시에 있는 항목만 반환합니다."""
+        key = _key(username)
+        return self._users.get(key) if key is not None else None
+
+    def refresh(self, user):
+        """User 객체의 현재 상태로 캐시를 갱신합니다. 인증되지 않은 사용자는 캐시에서 제거합니다."""
+        key = nocase_key(user.username)
+        with self._lock:
+            if user.is_verified:
+                entry = self._entry(user)
+                self._users[key] = entry
+                return entry
+            self._users.pop(key, None)
+        return None
+
+    def invalidate(self, username):
+        key = _key(username)
+        with self._lock:
+            self._users.pop(key, None)
+
+    @staticmethod
+    def _entry(user):
+        return {'username': user.username, 'server': user.server,
+                'guild_name': user.guild_name, 'guild_id': user.guild_id}
+
+
+def _key(username):
+    return nocase_key(username) if isinstance(username, str) and username else None
@@ -0,0 +1,132 @@
+"""
+- 2026-10-18 - [추가] - v3.21.0: 지역/길드별 활동 집계 (슬라이딩 윈도우)
+- 기능: 위치 보고가 들어올 때마다 지역별·길드별로 최근 1분/5분/60분 동안 보인
+  서로 다른 사용자 수(그룹 수)와 그 그룹 크기 합(플레이어 수)을 증분 갱신
+- 기능: 윈도우마다 (키, 사용자) -> 마지막으로 보인 시각과 (시각, 키, 사용자) 최소 힙을 두고,
+  힙 앞쪽부터 꺼내며 윈도우를 벗어난 항목만 빼는 방식(그 사이 다시 보였으면 재예약)
+- 기능: 조회는 집계된 카운터를 그대로 복사하므로 비용이 사용자 수가 아니라 지역 수에 비례
+- 기능: 게임 서버별 샤드마다 독립된 집계를 유지
+
+"""
+import heapq
+import threading
+import time
+
+from src.config.settings import API_SERVERS, ZONE_ACTIVITY_WINDOWS
+
+
+class SlidingWindowCounter:
+    """
+    key(지역 또는 길드)별로 최근 window_seconds 동안 보인 서로 다른 사용자 수(groups)와
+    각 사용자의 마지막 그룹 크기 합(players)을 유지합니다. (잠금은 호출하는 쪽에서 담당)
+    """
+
+    def __init__(self, window_seconds):
+        self.window_seconds = window_seconds
+        self.groups = {}
+        self.players = {}
+        self._last_seen = {}   # (key, username) -> [마지막으로 보인 시각, 그룹 크기]
+        self._heap = []        # (시각, key, username), 쌍마다 항목 하나
+
+    def __len__(self):
+        return len(self._last_seen)
+
+    def observe(self, key, username, group_size, seen_at):
+        pair = (key, username)
+        entry = self._last_seen.get(pair)
+        if entry is None:
+            self._last_seen[pair] = [seen_at, group_size]
+            heapq.heappush(self._heap, (seen_at, key, username))
+            self.groups[key] = self.groups.get(key, 0) + 1
+            self.players[key] = self.players.get(key, 0) + group_size
+        elif seen_at >= entry[0]:
+            self.players[key] += group_size - entry[1]
+            entry[0], entry[1] = seen_at, group_size
+
+    def expire(self, now):
+        cutoff = now - self.window_seconds
+        heap = self._heap
+        while heap and heap[0][0] <= cutoff:
+            _, key, username = heapq.heappop(heap)
+            pair = (key, username)
+            seen_at, group_size = self._last_seen[pair]
+            if seen_at > cutoff:  # 그 사이 다시 보였으면 마지막 시각으로 재예약
+                heapq.heappush(heap, (seen_at, key, username))
+                continue
+            del self._last_seen[pair]
+            self.groups[key] -= 1
+            self.players[key] -= group_size
+            if not self.groups[key]:
+                del self.groups[key]
+                del self.players[key]
+
+    def counts(self, keys=None):
+        """{key: {'groups', 'players'}}를 반환합니다. keys가 있으면 그 키만 담습니다."""
+        keys = self.groups if keys is None else [key for key in keys if key in self.groups]
+        return {key: {'groups': self.groups[key], 'players': self.players[key]} for key in keys}
+
+
+class ZoneActivity:
+    """게임 서버 샤드 하나의 윈도우별 지역/길드 카운터입니다."""
+
+    def __init__(self, windows=ZONE_ACTIVITY_WINDOWS):
+        self.windows = dict(windows)
+        self._zones = {label: SlidingWindowCounter(seconds) for label, seconds in windows.items()}
+        self._guilds = {label: SlidingWindowCounter(seconds)
+                        for label, seconds in windows.items()}
+        self._lock = threading.Lock()
+
+    def observe(self, username, zone, group_size, guild_name, seen_at=None):
+        """
+        위치 보고 하나를 반영합니다. seen_at(유닉스 초)이 없으면 현재 시각입니다.
+        지역이 문자열이 아니거나 그룹 크기가 0 이상의 정수가 아니면 무시합니다.
+        """
+        if not isinstance(zone, str) or isinstance(group_size, bool) or \
+                not isinstance(group_size, int) or group_size < 0:
+            return
+        now = time.time()
+        seen_at = now if seen_at is None else min(seen_at, now)
+        guild_name = guild_name or ''
+        with self._lock:
+            for label, window_seconds in self.windows.items():
+                self._zones[label].expire(now)
+                self._guilds[label].expire(now)
+                if seen_at <= now - window_seconds:
+                    continue
+                self._zones[label].observe(zone, username, group_size, seen_at)
+                self._guilds[label].observe(guild_name, username, group_size, seen_at)
+
+    def heatmap(self, labels=None, zones=None):
+        """
+        {'zones': {윈도우: {지역: {'groups', 'players'}}}, 'guilds': {윈도우: {길드: ...}}}
+        labels(윈도우 이름 목록)와 zones(지역 목록)가 있으면 그것만 담습니다.
+        길드 이름이 없는 사용자는 빈 문자열 길드로 집계합니다.
+        """
+        now = time.time()
+        labels = list(self.windows) if labels is None else labels
+        with self._lock:
+            for label in labels:
+                self._zones[label].expire(now)
+                self._guilds[label].expire(now)
+            return {'zones': {label: self._zones[label].counts(zones) for label in labels},
+                    'guilds': {label: self._guilds[label].counts() for label in labels}}
+
+    def tracked(self):
+        """윈도우별로 추적 중인 (지역, 사용자) 쌍 수입니다."""
+        with self._lock:
+            return {label: len(counter) for label, counter in self._zones.items()}
+
+
+class ShardedZoneActivity:
+    """ShardedLocationStore와 같은 샤드 키(게임 서버 + 기본 샤드)로 나눈 ZoneActivity 묶음입니다."""
+    DEFAULT_SHARD = None
+
+    def __init__(self, shard_keys=tuple(API_SERVERS), windows=ZONE_ACTIVITY_WINDOWS):
+        self._shards = {key: ZoneActivity(windows) for key in (*shard_keys, self.DEFAULT_SHARD)}
+
+    def shard(self, server):
+        activity = self._shards.get(server)
+        return activity if activity is not None else self._shards[self.DEFAULT_SHARD]
+
+    def shards(self):
+        return dict(self._shards)
@@ -0,0 +1,75 @@
+"""
+pytest 공통 설정
+- run_server를 import하기 전에 임시 DB, 요청 제한/길드 갱신 비활성화 환경 변수를 지정
+- tools/stub_gameinfo.py 스텁 서버를 띄우고 API_SERVERS 주소를 스텁으로 바꾸는 fixture 제공
+- 인증 사용자를 만들고 테스트가 끝나면 사용자/위치를 지우는 fixture 제공
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'tools'))
+
+DB_DIR = tempfile.mkdtemp(prefix="beacon_tests_")
+os.environ['BEACON_DATABASE_URI'] = f"sqlite:///{os.path.join(DB_DIR, 'beacon.db')}"
+os.environ['BEACON_RATE_LIMIT_ENABLED'] = '0'
+os.environ['BEACON_GUILD_REFRESH_ENABLED'] = '0'
+
+from sqlalchemy import delete, update  # noqa: E402
+
+from src.config.settings import API_SERVERS  # noqa: E402
+from src.server import run_server  # noqa: E402
+from src.server.database import User, bulk_register_users, db, migrate_database  # noqa: E402
+from stub_gameinfo import start_stub_server  # noqa: E402
+
+
+@pytest.fixture
+def start_stub(monkeypatch):
+    """
+    start_stub(latency=..., guild_count=...)로 스텁 서버를 띄우고,
+    모든 게임 서버 주소를 스텁으로 바꿉니다. (테스트가 끝나면 원래 주소로 되돌림)
+    """
+    servers = []
+
+    def start(**options):
+        server, base_url = start_stub_server(**options)
+        servers.append(server)
+        for name in API_SERVERS:
+            monkeypatch.setitem(API_SERVERS, name, base_url)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def verified_user():
+    """
+    verified_user(이름, 서버, 길드)로 인증 사용자를 만듭니다.
+    테스트가 끝나면 만든 사용자의 위치 기록, 인증 사용자 캐시 항목, DB 행을 지웁니다.
+    """
+    created = []
+
+    def create(username, server=list(API_SERVERS)[0], guild_name='Lions'):
+        with run_server.app.app_context():
+            migrate_database()
+            bulk_register_users([(username, server)])
+            db.session.execute(update(User).where(User.username == username).values(
+                is_verified=True, guild_name=guild_name, guild_id=f"g-{guild_name.lower()}"))
+            db.session.commit()
+        created.append((username, server))
+        return username
+
+    yield create
+    for username, server in created:
+        run_server.location_store.shard(server).remove(username)
+        run_server.verified_users.invalidate(username)
+    with run_server.app.app_context():
+        db.session.execute(delete(User).where(User.username.in_([u for u, _ in created])))
+        db.session.commit()
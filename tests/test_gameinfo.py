@@ -0,0 +1,115 @@
+"""GameInfoClient: TTL 캐시 적중/만료, single-flight, /verify 후 길드 정보 비동기 채움"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import delete
+
+from src.config.settings import API_SERVERS
+from src.server import run_server
+from src.server.database import User, db, find_user, migrate_database
+from src.server.gameinfo import GAMEINFO_LOOKUPS, GameInfoClient
+
+SERVER = list(API_SERVERS)[0]
+
+
+def lookups():
+    return {result: GAMEINFO_LOOKUPS.value(result) for result in ('hit', 'coalesced', 'miss')}
+
+
+def test_cache_hit_until_ttl_expires(start_stub):
+    stub = start_stub()
+    client = GameInfoClient(ttl_seconds=0.3, negative_ttl_seconds=0.3, max_entries=10)
+    before = lookups()
+
+    player = client.lookup_player('Alice', SERVER)
+    assert player['Name'] == 'Alice'
+    assert client.lookup_player('ALICE', SERVER) == player
+    assert stub.request_count == 1
+    assert lookups()['hit'] - before['hit'] == 1
+
+    time.sleep(0.35)
+    assert client.lookup_player('alice', SERVER)['GuildName'] == player['GuildName']
+    assert stub.request_count == 2
+    assert lookups()['miss'] - before['miss'] == 2
+
+
+def test_missing_player_uses_negative_ttl(start_stub):
+    stub = start_stub()
+    client = GameInfoClient(ttl_seconds=60, negative_ttl_seconds=0.2, max_entries=10)
+
+    assert client.lookup_player('missingBob', SERVER) is None
+    assert client.lookup_player('missingBob', SERVER) is None
+    assert stub.request_count == 1
+    time.sleep(0.25)
+    assert client.lookup_player('missingBob', SERVER) is None
+    assert stub.request_count == 2
+
+
+def test_cache_evicts_least_recently_used(start_stub):
+    stub = start_stub()
+    client = GameInfoClient(ttl_seconds=60, max_entries=2)
+
+    for name in ('Ann', 'Ben', 'Ann', 'Cid'):
+        client.lookup_player(name, SERVER)
+    assert len(client) == 2
+    assert stub.request_count == 3
+    client.lookup_player('Ann', SERVER)
+    assert stub.request_count == 3
+    client.lookup_player('Ben', SERVER)
+    assert stub.request_count == 4
+
+
+def test_concurrent_misses_share_one_request(start_stub):
+    stub = start_stub(latency=0.2)
+    client = GameInfoClient(ttl_seconds=60, max_entries=10)
+    callers = 8
+    barrier = threading.Barrier(callers)
+    before = lookups()
+
+    def lookup(_):
+        barrier.wait()
+        return client.lookup_player('Carol', SERVER)
+
+    with ThreadPoolExecutor(max_workers=callers) as executor:
+        players = list(executor.map(lookup, range(callers)))
+    assert stub.request_count == 1
+    assert all(player == players[0] and player['Name'] == 'Carol' for player in players)
+    assert lookups()['miss'] - before['miss'] == 1
+    assert lookups()['coalesced'] - before['coalesced'] == callers - 1
+
+
+@pytest.fixture
+def async_verify(monkeypatch):
+    monkeypatch.setattr(run_server, 'VERIFY_ASYNC_GUILD_LOOKUP', True)
+    run_server.gameinfo_client.clear()
+    with run_server.app.app_context():
+        migrate_database()
+    yield run_server.app.test_client()
+    run_server.gameinfo_client.clear()
+    with run_server.app.app_context():
+        db.session.execute(delete(User))
+        db.session.commit()
+
+
+def test_verify_fills_guild_asynchronously(start_stub, async_verify):
+    stub = start_stub(latency=0.3)
+    response = async_verify.post('/register', json={'username': 'Dana', 'server': SERVER})
+    assert response.status_code == 201
+
+    response = async_verify.post('/verify', json={'username': 'Dana'})
+    assert response.status_code == 200
+    assert response.get_json()['guild_lookup'] == 'pending'
+    with run_server.app.app_context():
+        user = find_user('Dana')
+    assert user.is_verified and user.guild_name is None
+
+    deadline = time.monotonic() + 5
+    while user.guild_name is None and time.monotonic() < deadline:
+        time.sleep(0.05)
+        with run_server.app.app_context():
+            user = find_user('Dana')
+    assert stub.request_count == 1
+    assert user.guild_name.startswith('Stub Guild ')
+    assert run_server.verified_users.peek('Dana')['guild_name'] == user.guild_name
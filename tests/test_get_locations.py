@@ -0,0 +1,72 @@
+"""/get-locations ETag(304)과 since 커서 변경분"""
+import json
+
+import pytest
+
+from src.config.settings import API_SERVERS
+from src.core.wire_format import FORMAT_COLUMNAR, FORMAT_JSON
+from src.server import run_server
+
+SERVER = list(API_SERVERS)[0]
+
+
+@pytest.fixture
+def client(verified_user):
+    """같은 게임 서버의 인증 사용자 셋(Alice, Bob, Carol)이 위치를 보고한 상태"""
+    store = run_server.location_store.shard(SERVER)
+    for name, zone in (('Alice', 'Sandrift Steppe'), ('Bob', 'Sandrift Coast'),
+                       ('Carol', 'Sandrift Steppe')):
+        verified_user(name)
+        store.update(name, zone, 2)
+    return run_server.app.test_client()
+
+
+def get_locations(client, etag=None, accept=None, **data):
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if accept:
+        headers['Accept'] = accept
+    return client.post('/get-locations', json={'username': 'Alice', **data}, headers=headers)
+
+
+def test_unchanged_store_returns_304(client):
+    first = get_locations(client)
+    assert first.status_code == 200 and first.headers['ETag']
+    second = get_locations(client, etag=first.headers['ETag'])
+    assert second.status_code == 304 and second.data == b''
+
+
+def test_etag_changes_after_an_update(client):
+    etag = get_locations(client).headers['ETag']
+    run_server.location_store.shard(SERVER).update('Bob', 'Sandrift Steppe', 5)
+    response = get_locations(client, etag=etag)
+    assert response.status_code == 200 and response.headers['ETag'] != etag
+
+
+@pytest.mark.parametrize('other', [
+    {'username': 'Bob'},
+    {'max_distance': 0},
+    {'accept': FORMAT_COLUMNAR},
+])
+def test_etag_depends_on_requester_radius_and_format(client, other):
+    etag = get_locations(client).headers['ETag']
+    response = get_locations(client, etag=etag, **other)
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_delta_contains_updated_and_removed_users(client):
+    store = run_server.location_store.shard(SERVER)
+    cursor = json.loads(get_locations(client, since=None).data)['cursor']
+    store.update('Bob', 'Sandrift Steppe', 7)
+    store.remove('Carol')
+
+    delta = json.loads(get_locations(client, since=cursor, accept=FORMAT_JSON).data)
+    assert delta['full'] is False
+    assert [(row['username'], row['group_size']) for row in delta['users']] == [('Bob', 7)]
+    assert delta['removed'] == ['Carol']
+    assert delta['cursor'] != cursor
+
+    unchanged = json.loads(get_locations(client, since=delta['cursor']).data)
+    assert unchanged['full'] is False and unchanged['users'] == [] and unchanged['removed'] == []
@@ -0,0 +1,198 @@
+"""GuildRefresher: 동시 요청 제한, 서버별 속도 제한, job_state 재개, 길드 일괄 갱신"""
+import threading
+import zlib
+from concurrent.futures import Future
+
+import pytest
+from sqlalchemy import delete, text, update
+
+from src.config.settings import API_SERVERS
+from src.server.database import (
+    User, bulk_register_users, bulk_update_guilds, db, find_users, load_job_state,
+    migrate_database,
+)
+from src.server.guild_refresh import JOB_NAME, GuildRefresher
+from src.server.run_server import (
+    app, apply_guild_change, handle_get_locations, location_store, location_store_cursor,
+    verified_users,
+)
+
+SERVERS = list(API_SERVERS)
+FAST = (1000.0, 1000)
+
+
+@pytest.fixture
+def users():
+    """인증 사용자를 만드는 함수를 반환하고, 테스트가 끝나면 사용자와 작업 상태를 지웁니다."""
+    with app.app_context():
+        migrate_database()
+
+    def create(names, servers=SERVERS):
+        with app.app_context():
+            bulk_register_users([(name, servers[i % len(servers)])
+                                 for i, name in enumerate(names)])
+            db.session.execute(update(User).where(User.username.in_(names)).values(
+                is_verified=True, guild_name='Old Guild', guild_id='old'))
+            db.session.commit()
+        return names
+
+    yield create
+    with app.app_context():
+        db.session.execute(delete(User))
+        db.session.execute(text("DELETE FROM job_state"))
+        db.session.commit()
+
+
+def stub_guild(name, seed=0, guild_count=50):
+    key = name.lower() if not seed else f"{seed}:{name.lower()}"
+    guild_no = zlib.crc32(key.encode()) % guild_count
+    return f"Stub Guild {guild_no}", f"guild-{guild_no}"
+
+
+def guilds():
+    with app.app_context():
+        return {user.username: (user.guild_name, user.guild_id) for user in User.query.all()}
+
+
+def refresher(**options):
+    options.setdefault('rate_limits', {server: FAST for server in SERVERS})
+    options.setdefault('concurrency', 8)
+    options.setdefault('batch_size', 100)
+    return GuildRefresher(app, interval_seconds=0, pause_seconds=0, **options)
+
+
+def test_bulk_update_guilds_updates_registered_users_only(users):
+    users(['Alpha', 'Bravo'])
+    with app.app_context():
+        updated = bulk_update_guilds([('alpha', 'New Guild', 'g1'), ('Nobody', 'X', 'x'),
+                                      ('Bravo', None, None)])
+        assert sorted(user.username for user in updated) == ['Alpha', 'Bravo']
+        found = find_users(['Alpha', 'Bravo'])
+    assert (found['Alpha'].guild_name, found['Alpha'].guild_id) == ('New Guild', 'g1')
+    assert (found['Bravo'].guild_name, found['Bravo'].guild_id) == (None, None)
+
+
+def test_run_pass_writes_changed_guilds_in_bulk(users, start_stub):
+    stub = start_stub()
+    names = users([f"missing{i}" if i % 5 == 0 else f"Player{i}" for i in range(30)])
+    found = [name for name in names if not name.startswith('missing')]
+    changed = []
+
+    assert refresher(on_update=changed.append).run_pass()
+    current = guilds()
+    assert stub.request_count == len(names)
+    assert all(current[name] == stub_guild(name) for name in found)
+    assert all(current[name] == ('Old Guild', 'old') for name in names if name not in found)
+    assert sorted(user.username for user in changed) == sorted(found)
+
+    changed.clear()
+    assert refresher(on_update=changed.append).run_pass()
+    assert changed == []
+    assert guilds() == current
+
+
+def test_concurrent_lookups_are_bounded(users, start_stub):
+    stub = start_stub(latency=0.05)
+    users([f"Player{i}" for i in range(24)])
+
+    assert refresher(concurrency=3).run_pass()
+    assert stub.request_count == 24
+    assert 1 < stub.max_active <= 3
+
+
+class FakeClock:
+    """sleep()으로만 흐르는 시계입니다."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        # 부동소수점 오차로 남는 아주 작은 대기도 시계가 실제로 흐르도록 최소 1µs
+        self.now += max(seconds, 1e-6)
+        return False
+
+
+class RecordingClient:
+    """외부 API 대신 (서버, 요청 시각)을 기록하고 곧바로 '플레이어 없음'으로 끝나는 클라이언트"""
+
+    def __init__(self, clock):
+        self.api_servers = dict(API_SERVERS)
+        self.clock = clock
+        self.requests = []
+
+    def lookup_player_async(self, username, server):
+        self.requests.append((server, self.clock.now))
+        future = Future()
+        future.set_result(None)
+        return future
+
+
+def test_rate_limit_is_per_server(users):
+    users([f"Player{i}" for i in range(40)], servers=SERVERS[:2])
+    clock = FakeClock()
+    client = RecordingClient(clock)
+    rate, burst = 20.0, 2
+
+    assert refresher(client=client, rate_limits={server: (rate, burst) for server in SERVERS},
+                     clock=clock.time, sleep=clock.sleep).run_pass()
+    assert len(client.requests) == 40
+    for server in SERVERS[:2]:
+        times = [at for name, at in client.requests if name == server]
+        assert len(times) == 20
+        # 어느 시각까지의 요청 수도 burst + rate * 경과 시간을 넘지 않음
+        assert all(count <= burst + rate * at + 1e-9 for count, at in enumerate(times, 1))
+    # 두 서버가 서로의 토큰을 기다리지 않으므로 한 서버 몫의 시간(18 / 20초)에 끝남
+    assert clock.now == pytest.approx((20 - burst) / rate, abs=1e-3)
+
+
+def test_interrupted_pass_resumes_from_job_state(users, start_stub):
+    stub = start_stub()
+    names = users([f"Player{i:02d}" for i in range(25)])
+    stub.guild_seed = 7
+    stopped = threading.Event()
+    first = refresher(batch_size=10)
+    first.on_update = lambda user: (stopped.set(), first._stop.set())
+
+    assert not first.run_pass()
+    assert stopped.is_set()
+    with app.app_context():
+        cursor = load_job_state(JOB_NAME)['cursor']
+        remaining = User.query.filter(User.is_verified.is_(True), User.id > cursor).count()
+    assert remaining == len(names) - 10
+
+    before = stub.request_count
+    assert refresher(batch_size=10).run_pass()
+    assert stub.request_count - before == remaining
+    current = guilds()
+    assert all(current[name] == stub_guild(name, 7) for name in names)
+    with app.app_context():
+        assert load_job_state(JOB_NAME)['cursor'] == 0
+
+
+def test_guild_change_invalidates_location_etag(users, start_stub):
+    start_stub()
+    names = users(['missingWatcher', 'Mover'], servers=SERVERS[:1])  # 요청자의 길드는 그대로
+    store = location_store.shard(SERVERS[0])
+    for name in names:
+        store.update(name, 'Sandrift Steppe', 1)
+    with app.app_context():
+        verified_users.warm()
+        _, status, etag = handle_get_locations({'username': 'missingWatcher'})
+        cursor = location_store_cursor(store)
+    assert status == 200
+
+    try:
+        assert refresher(on_update=apply_guild_change).run_pass()
+        with app.app_context():
+            _, status, new_etag = handle_get_locations({'username': 'missingWatcher'})
+            delta, _, _ = handle_get_locations({'username': 'missingWatcher', 'since': cursor})
+    finally:
+        for name in names:
+            store.remove(name)
+            verified_users.invalidate(name)
+    assert status == 200 and new_etag != etag
+    rows = {row['username']: row['guild_name'] for row in delta['users']}
+    assert not delta['full'] and rows['Mover'] == stub_guild('Mover')[0]
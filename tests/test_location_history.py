@@ -0,0 +1,57 @@
+"""위치 이력 로그 (기록 도중 실패한 flush)"""
+import os
+from datetime import datetime
+
+import pytest
+
+from src.server import location_history
+from src.server.location_history import LocationHistory
+
+NOW = datetime(2026, 10, 18, 12, 0, 0)
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = LocationHistory(str(tmp_path), flush_interval_seconds=3600, flush_max_records=10**6)
+    history.start()
+    yield history
+    history.stop()
+
+
+def _append(history, username, zone):
+    history.append('', username, zone, 1, NOW)
+
+
+def test_failed_flush_truncates_the_partial_block(history, monkeypatch):
+    _append(history, 'Alice', 'Lymhurst')
+    history.flush()
+    segment_path = history._active.path
+    intact_size = os.path.getsize(segment_path)
+
+    real_write_blocks = location_history._write_blocks
+
+    def fail_partway(f, offset, chunks):
+        f.write(b'BHB1 partial block')
+        f.flush()
+        raise OSError("disk full")
+
+    monkeypatch.setattr(location_history, '_write_blocks', fail_partway)
+    _append(history, 'Bob', 'Sunfall')
+    with pytest.raises(OSError):
+        history.flush()
+    assert os.path.getsize(segment_path) == intact_size
+
+    monkeypatch.setattr(location_history, '_write_blocks', real_write_blocks)
+    _append(history, 'Carol', 'Sunfall')
+    assert history.flush() == 1
+    history.stop()
+    os.remove(segment_path[:-len('.log')] + '.idx')  # 색인 없이 재시작 (recover 경로)
+
+    restarted = LocationHistory(history.directory)
+    restarted.start()
+    try:
+        assert len(restarted) == 2
+        records, _ = restarted.query(zone='Sunfall')
+        assert [record[1] for record in records] == ['Carol']
+    finally:
+        restarted.stop()
@@ -0,0 +1,55 @@
+"""위치 저장소 (인메모리/SQLite 백엔드 공통 동작)"""
+from datetime import datetime
+
+import pytest
+
+from src.server.location_store import InMemoryLocationStore
+from src.server.sqlite_location_store import SQLiteLocationStore
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return InMemoryLocationStore()
+    return SQLiteLocationStore(str(tmp_path / 'locations.db'))
+
+
+def test_mark_changed_bumps_version_without_touching_the_record(store):
+    store.update('Alice', 'Sandrift Steppe', 2)
+    before, record = store.version, store.get('Alice')
+
+    assert store.mark_changed('Alice')
+    assert store.version == before + 1
+    assert store.get('Alice') == record
+    version, changed, removed, full = store.changes_since(before)
+    assert [username for username, _ in changed] == ['Alice'] and not removed and not full
+
+
+def test_mark_changed_ignores_missing_records(store):
+    before = store.version
+    assert not store.mark_changed('Nobody')
+    assert store.version == before
+
+
+def test_update_many_skips_older_entries_and_bumps_version_once(store):
+    store.update('Alice', 'Sandrift Steppe', 2, datetime(2026, 10, 18, 12, 0, 0))
+    before = store.version
+
+    applied = store.update_many([
+        ('Alice', 'Sandrift Coast', 5, datetime(2026, 10, 18, 11, 0, 0)),
+        ('Bob', 'Sandrift Coast', 1, datetime(2026, 10, 18, 12, 0, 0)),
+        ('Carol', 'Sandrift Steppe', 3, datetime(2026, 10, 18, 12, 0, 0)),
+    ])
+    assert applied == ['Bob', 'Carol']
+    assert store.get('Alice')['zone'] == 'Sandrift Steppe'
+    assert store.version == before + 1
+    assert store.last_changed('Bob') == store.last_changed('Carol') == before + 1
+    _, changed, _, _ = store.changes_since(before)
+    assert sorted(username for username, _ in changed) == ['Bob', 'Carol']
+
+
+def test_update_many_without_changes_keeps_version(store):
+    store.update('Alice', 'Sandrift Steppe', 2, datetime(2026, 10, 18, 12, 0, 0))
+    before = store.version
+    assert store.update_many([('Alice', 'Sandrift Steppe', 2, datetime(2026, 10, 18, 12, 0, 5))])
+    assert store.version == before
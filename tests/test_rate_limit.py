@@ -0,0 +1,34 @@
+"""요청 제한: 사용자별 버킷은 본문의 username이 아니라 클라이언트 IP로 구분"""
+import pytest
+
+from src.server import run_server
+from src.server.rate_limit import RateLimiter
+
+BURST = 3
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """update 경로에 IP별 버킷(토큰이 다시 차지 않는 시계)만 둔 제한기로 바꾼 테스트 클라이언트"""
+    limiter = RateLimiter(policies={'update': {'user': (1.0, BURST)}}, clock=lambda: 0.0)
+    monkeypatch.setattr(run_server, 'rate_limiter', limiter)
+    return run_server.app.test_client()
+
+
+def heartbeat(client, username, ip):
+    return client.post('/heartbeat', json={'username': username},
+                       environ_base={'REMOTE_ADDR': ip})
+
+
+def test_rotating_usernames_share_the_client_bucket(client):
+    statuses = [heartbeat(client, f"Flood{i}", '10.0.0.1').status_code
+                for i in range(BURST + 2)]
+    assert 429 not in statuses[:BURST]
+    assert statuses[BURST:] == [429, 429]
+
+
+def test_spoofed_username_does_not_limit_the_real_user(client):
+    for _ in range(BURST + 2):
+        heartbeat(client, 'Victim', '10.0.0.66')
+    assert heartbeat(client, 'Victim', '10.0.0.66').status_code == 429
+    assert heartbeat(client, 'Victim', '10.0.0.7').status_code != 429
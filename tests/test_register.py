@@ -0,0 +1,74 @@
+"""/register 입력 검증과 GroupCommitter 묶음 실패 처리"""
+import threading
+
+import pytest
+from sqlalchemy import delete
+
+from src.config.settings import API_SERVERS
+from src.server.database import User, db, find_user, migrate_database
+from src.server.group_commit import GroupCommitter
+from src.server.run_server import app, handle_register
+
+SERVER = list(API_SERVERS)[0]
+
+
+@pytest.fixture
+def clean_users():
+    with app.app_context():
+        migrate_database()
+    yield
+    with app.app_context():
+        db.session.execute(delete(User))
+        db.session.commit()
+
+
+@pytest.mark.parametrize('server', [['x'], {'name': SERVER}, 7, 'Atlantis'])
+def test_register_rejects_unknown_server(clean_users, server):
+    body, status = handle_register({'username': 'Eve', 'server': server})
+    assert status == 400
+    with app.app_context():
+        assert find_user('Eve') is None
+
+
+def test_register_accepts_known_server(clean_users):
+    assert handle_register({'username': 'Eve', 'server': SERVER})[1] == 201
+    with app.app_context():
+        assert find_user('eve').server == SERVER
+
+
+def test_failed_batch_only_fails_bad_items():
+    entered, release = threading.Event(), threading.Event()
+    batches = []
+
+    def apply_batch(items):
+        entered.set()
+        release.wait(5)
+        batches.append(list(items))
+        if any(item < 0 for item in items):
+            raise ValueError('bad item')
+        return [item * 10 for item in items]
+
+    committer = GroupCommitter(apply_batch, max_batch=10, name="test-commit")
+    results, errors = {}, {}
+
+    def submit(item):
+        try:
+            results[item] = committer.submit(item, timeout=5)
+        except ValueError as e:
+            errors[item] = e
+
+    # 첫 항목을 반영하는 동안 나머지를 큐에 쌓아 다음 묶음 하나가 되도록 함
+    threads = [threading.Thread(target=submit, args=(item,)) for item in (0, 1, -2, 3)]
+    threads[0].start()
+    assert entered.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    while committer._queue.qsize() < 3:
+        release.wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == {0: 0, 1: 10, 3: 30}
+    assert list(errors) == [-2]
+    assert sorted(batches[1]) == [-2, 1, 3]
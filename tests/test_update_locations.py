@@ -0,0 +1,83 @@
+"""/update-locations: 항목별 검증, 사용자별 병합(last-writer-wins), 오래된 항목 무시"""
+import time
+from datetime import datetime
+
+from src.config.settings import API_SERVERS
+from src.server import run_server
+
+SERVER = list(API_SERVERS)[0]
+
+
+def update_locations(updates):
+    with run_server.app.app_context():
+        return run_server.handle_update_locations({'updates': updates})
+
+
+def shard():
+    return run_server.location_store.shard(SERVER)
+
+
+def test_mixed_batch_applies_valid_entries_and_rejects_the_rest(verified_user):
+    verified_user('Alice')
+    body, status = update_locations([
+        {'username': 'Alice', 'zone': 'Sandrift Steppe', 'group_size': 3},
+        {'username': 'Stranger', 'zone': 'Sandrift Steppe', 'group_size': 1},
+        {'zone': 'Sandrift Steppe', 'group_size': 1},
+        {'username': 'Alice', 'zone': 'Sandrift Coast', 'group_size': 1, 'ts': 'yesterday'},
+    ])
+    assert status == 200
+    assert (body['applied'], body['coalesced'], body['stale']) == (1, 0, 0)
+    assert [(entry.get('index'), entry.get('username')) for entry in body['rejected']] == [
+        (2, None), (3, 'Alice'), (None, 'Stranger')]
+    assert shard().get('Alice')['zone'] == 'Sandrift Steppe'
+
+
+def test_invalid_zone_or_group_size_rejects_the_whole_batch(verified_user):
+    verified_user('Alice')
+    version = shard().version
+    body, status = update_locations([
+        {'username': 'Alice', 'zone': 'Sandrift Steppe', 'group_size': 3},
+        {'username': 'Alice', 'zone': '', 'group_size': 3},
+        {'username': 'Alice', 'zone': 'Sandrift Steppe', 'group_size': -1},
+    ])
+    assert status == 400
+    assert [entry['index'] for entry in body['invalid']] == [1, 2]
+    assert shard().version == version and shard().get('Alice') is None
+
+
+def test_updates_for_one_user_keep_the_latest_ts(verified_user):
+    verified_user('Alice')
+    now = time.time()
+    body, status = update_locations([
+        {'username': 'Alice', 'zone': 'Sandrift Steppe', 'group_size': 1, 'ts': now - 30},
+        {'username': 'Alice', 'zone': 'Sandrift Coast', 'group_size': 2, 'ts': now - 10},
+        {'username': 'Alice', 'zone': 'Sandrift Steppe', 'group_size': 3, 'ts': now - 20},
+    ])
+    assert status == 200
+    assert (body['applied'], body['coalesced'], body['stale']) == (1, 2, 0)
+    record = shard().get('Alice')
+    assert (record['zone'], record['group_size']) == ('Sandrift Coast', 2)
+
+
+def test_entries_older_than_the_stored_record_are_ignored(verified_user):
+    verified_user('Alice')
+    now = time.time()
+    shard().update('Alice', 'Sandrift Steppe', 4, datetime.utcfromtimestamp(now - 5))
+    body, status = update_locations([
+        {'username': 'Alice', 'zone': 'Sandrift Coast', 'group_size': 1, 'ts': now - 60},
+    ])
+    assert status == 200
+    assert (body['applied'], body['stale']) == (0, 1)
+    record = shard().get('Alice')
+    assert (record['zone'], record['group_size']) == ('Sandrift Steppe', 4)
+
+
+def test_batch_bumps_the_shard_version_once(verified_user):
+    names = [verified_user(name) for name in ('Alice', 'Bob', 'Carol')]
+    version = shard().version
+    body, status = update_locations([
+        {'username': name, 'zone': 'Sandrift Steppe', 'group_size': i + 1}
+        for i, name in enumerate(names)])
+    assert status == 200 and body['applied'] == 3
+    assert shard().version == version + 1
+    assert {shard().last_changed(name) for name in names} == {version + 1}
@@ -0,0 +1,65 @@
+"""인증 사용자 캐시와 위치 요청의 대소문자 무시 조회"""
+import json
+
+import pytest
+from sqlalchemy import delete, update
+
+from src.config.settings import API_SERVERS
+from src.server import run_server
+from src.server.database import User, bulk_register_users, db, migrate_database
+from src.server.user_cache import VerifiedUserCache
+
+SERVER = list(API_SERVERS)[0]
+
+
+@pytest.fixture
+def alice():
+    """DB에 'Alice'로 저장된 인증 사용자를 만들고, 끝나면 사용자와 위치를 지웁니다."""
+    with run_server.app.app_context():
+        migrate_database()
+        bulk_register_users([('Alice', SERVER)])
+        db.session.execute(update(User).values(is_verified=True, guild_name='Lions',
+                                               guild_id='g-lions'))
+        db.session.commit()
+    yield
+    run_server.location_store.shard(SERVER).remove('Alice')
+    run_server.verified_users.invalidate('Alice')
+    with run_server.app.app_context():
+        db.session.execute(delete(User))
+        db.session.commit()
+
+
+def test_cache_lookups_ignore_case(alice):
+    cache = VerifiedUserCache()
+    with run_server.app.app_context():
+        assert cache.get('alice')['username'] == 'Alice'
+        assert cache.peek('ALICE')['guild_name'] == 'Lions'
+        assert 'aLiCe' in cache
+        assert list(cache.get_many(['ALICE', 'Bob'])) == ['ALICE']
+        assert cache.warm() == 1
+    assert cache.peek('alice')['username'] == 'Alice'
+
+
+def test_location_requests_use_the_stored_name(alice):
+    client = run_server.app.test_client()
+    response = client.post('/update-location',
+                           json={'username': 'alice', 'zone': 'Sandrift Steppe', 'group_size': 2})
+    assert response.status_code == 200
+    assert client.post('/heartbeat', json={'username': 'ALICE'}).status_code == 200
+
+    response = client.post('/get-locations', json={'username': 'aLiCe'})
+    assert response.status_code == 200
+    rows = json.loads(response.data)
+    assert [(row['username'], row['guild_name']) for row in rows] == [('Alice', 'Lions')]
+
+
+def test_batch_merges_names_that_differ_only_in_case(alice):
+    with run_server.app.app_context():
+        body, status = run_server.handle_update_locations({'updates': [
+            {'username': 'alice', 'zone': 'Sandrift Steppe', 'group_size': 1, 'ts': 100},
+            {'username': 'ALICE', 'zone': 'Sandrift Coast', 'group_size': 4, 'ts': 200},
+        ]})
+    assert status == 200
+    assert (body['applied'], body['coalesced'], body['stale']) == (1, 1, 0)
+    record = run_server.location_store.shard(SERVER).get('Alice')
+    assert (record['zone'], record['group_size']) == ('Sandrift Coast', 4)
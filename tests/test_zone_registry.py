@@ -0,0 +1,41 @@
+"""지역 레지스트리 불러오기 (불러올 때 map_data.bin을 쓰지 않음)"""
+import json
+import zlib
+
+from src.core.zone_registry import compile_map_data, compile_map_file, load_zone_registry
+
+MAP = {'ZONE_TYPES': {'Lymhurst': 'city'}, 'MAP_CONNECTIONS': {'Lymhurst': ['Sunfall']}}
+
+
+def test_stale_file_is_recompiled_in_memory_without_writing(tmp_path):
+    json_path, bin_path = tmp_path / 'map_data.json', tmp_path / 'map_data.bin'
+    bin_path.write_bytes(compile_map_data({'MAP_CONNECTIONS': {'Old': []}}, 1))
+    stale = bin_path.read_bytes()
+    json_path.write_bytes(json.dumps(MAP).encode())
+
+    registry = load_zone_registry(str(bin_path), str(json_path))
+
+    assert 'Sunfall' in registry.names
+    assert registry.source_crc == zlib.crc32(json_path.read_bytes())
+    assert bin_path.read_bytes() == stale
+
+
+def test_missing_file_is_not_created(tmp_path):
+    json_path, bin_path = tmp_path / 'map_data.json', tmp_path / 'map_data.bin'
+    json_path.write_bytes(json.dumps(MAP).encode())
+
+    registry = load_zone_registry(str(bin_path), str(json_path))
+
+    assert registry.zone_type(registry.ids['Lymhurst']) == 'city'
+    assert not bin_path.exists()
+
+
+def test_build_step_writes_the_file(tmp_path):
+    json_path, bin_path = tmp_path / 'map_data.json', tmp_path / 'map_data.bin'
+    json_path.write_bytes(json.dumps(MAP).encode())
+
+    compile_map_file(str(json_path), str(bin_path))
+
+    registry = load_zone_registry(str(bin_path), str(json_path))
+    assert registry.source_crc == zlib.crc32(json_path.read_bytes())
+    assert 'Sunfall' in registry.names
@@ -0,0 +1,78 @@
+# bench_distance.py
+"""
+map_logic 거리 계산 벤치마크
+- 목적: 사전 계산된 거리 테이블(get_distance)과 기존 요청별 BFS(get_distance_bfs)를 비교
+- 1) 모든 지역 쌍에 대해 두 구현의 결과가 같은지 검증
+- 2) 무작위 지역 쌍 조회 처리량 측정
+- 3) 가중치 경로 탐색(routing)의 비용/경로 조회 처리량 측정 (v3.22.0)
+- 4) 출발 지역 하나에서 여러 대상 지역까지의 일괄 조회(distances_from) 검증 및 측정 (v3.24.0)
+- 실행: 리포지토리 루트에서 `python tools/bench_distance.py [조회 횟수]`
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core import map_logic, routing  # noqa: E402
+
+LOOKUPS = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+
+
+def verify_all_pairs():
+    zones = map_logic.ZONE_NAMES + ["Unknown Zone"]
+    mismatches = 0
+    for start in zones:
+        for end in zones:
+            if map_logic.get_distance(start, end) != map_logic.get_distance_bfs(start, end):
+                mismatches += 1
+    return len(zones) * len(zones), mismatches
+
+
+def time_lookups(func, pairs):
+    started = time.perf_counter()
+    for start, end in pairs:
+        func(start, end)
+    return time.perf_counter() - started
+
+
+if __name__ == '__main__':
+    started = time.perf_counter()
+    map_logic._build_distance_table()
+    build_ms = (time.perf_counter() - started) * 1000
+    table = map_logic.DISTANCE_TABLE
+    print(f"지역 수: {map_logic.ZONE_COUNT}, 테이블 타입: '{table.format}', "
+          f"크기: {len(table) * table.itemsize / 1024:.1f} KiB, 빌드: {build_ms:.1f} ms")
+
+    checked, mismatches = verify_all_pairs()
+    print(f"검증: {checked}쌍 중 불일치 {mismatches}건")
+
+    rng = random.Random(42)
+    zones = map_logic.ZONE_NAMES
+    pairs = [(rng.choice(zones), rng.choice(zones)) for _ in range(LOOKUPS)]
+    bfs_sec = time_lookups(map_logic.get_distance_bfs, pairs)
+    table_sec = time_lookups(map_logic.get_distance, pairs)
+    for label, sec in (("BFS   ", bfs_sec), ("테이블", table_sec)):
+        print(f"{label}: {LOOKUPS / sec:12,.0f} 조회/초 ({sec * 1e6 / LOOKUPS:8.2f} us/조회)")
+    print(f"속도 향상: x{bfs_sec / table_sec:.1f}")
+
+    started = time.perf_counter()
+    routing._build_route_tables()
+    build_ms = (time.perf_counter() - started) * 1000
+    reachable = sum(1 for cost in routing.ROUTE_COSTS if cost != routing.NO_ROUTE)
+    print(f"경로 테이블 빌드: {build_ms:.1f} ms, 도달 가능한 쌍: {reachable}")
+    for label, func in (("경로 비용", routing.route_cost), ("최단 경로", routing.shortest_path)):
+        sec = time_lookups(func, pairs)
+        print(f"{label}: {LOOKUPS / sec:12,.0f} 조회/초 ({sec * 1e6 / LOOKUPS:8.2f} us/조회)")
+
+    targets = rng.sample(zones, min(100, len(zones)))
+    sources = [rng.choice(zones) for _ in range(max(1, LOOKUPS // 100))]
+    assert all(map_logic.distances_from(source, targets)
+               == map_logic.distances_from_bfs(source, targets) for source in zones)
+    for label, func in (
+            ("대상별 조회", lambda s, ts: {t: map_logic.get_distance(s, t) for t in ts}),
+            ("BFS 한 번  ", map_logic.distances_from_bfs),
+            ("일괄 조회  ", map_logic.distances_from)):
+        sec = time_lookups(func, [(source, targets) for source in sources])
+        print(f"{label}: 대상 {len(targets)}개 기준 {sec * 1e6 / len(sources):8.2f} us/요청")
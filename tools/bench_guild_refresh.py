@@ -0,0 +1,172 @@
+# bench_guild_refresh.py
+"""
+길드 정보 주기적 갱신(GuildRefresher) 검증 및 측정 (v3.27.0)
+- 로컬 게임 정보 API 스텁(tools/stub_gameinfo.py)과 임시 DB로 실행
+- 1) 한 바퀴 갱신: 바뀐 길드만 반영되는지, '플레이어 없음'/미인증 사용자는 그대로인지 확인하고
+     동시 요청 수(스텁의 max_active)와 서버별 속도 제한을 지키는지 측정
+- 2) 변경이 없는 두 번째 바퀴는 DB를 바꾸지 않는지 확인
+- 3) 재개: 스텁의 길드를 바꾼 뒤 도중에 멈추고 새 갱신기로 이어서 진행했을 때,
+     이미 반영한 배치를 다시 조회하지 않고 모든 사용자가 새 길드로 바뀌는지 확인
+- 4) 갱신 중 /register 처리 지연(p50/p99)을 갱신이 없을 때와 비교
+- 실행: 리포지토리 루트에서 `python tools/bench_guild_refresh.py [사용자 수] [서버별 초당 요청 수]`
+"""
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 600
+RATE = float(sys.argv[2]) if len(sys.argv) > 2 else 40.0
+CONCURRENCY = 8
+BATCH_SIZE = 100
+STUB_LATENCY = 0.05
+GUILD_COUNT = 50
+
+DB_DIR = tempfile.mkdtemp(prefix="beacon_guild_refresh_")
+os.environ['BEACON_DATABASE_URI'] = f"sqlite:///{os.path.join(DB_DIR, 'refresh.db')}"
+os.environ['BEACON_RATE_LIMIT_ENABLED'] = '0'
+os.environ['BEACON_GUILD_REFRESH_ENABLED'] = '0'
+
+from sqlalchemy import update  # noqa: E402
+
+from src.config.settings import API_SERVERS  # noqa: E402
+from src.server.database import (  # noqa: E402
+    User, bulk_register_users, db, load_job_state, migrate_database,
+)
+from src.server.guild_refresh import GuildRefresher  # noqa: E402
+from src.server.run_server import (  # noqa: E402
+    app, apply_guild_change, handle_register, verified_users,
+)
+from stub_gameinfo import start_stub_server  # noqa: E402
+
+SERVERS = list(API_SERVERS)
+
+
+def stub_guild(name, seed=0):
+    key = name.lower() if not seed else f"{seed}:{name.lower()}"
+    guild_no = zlib.crc32(key.encode()) % GUILD_COUNT
+    return f"Stub Guild {guild_no}", f"guild-{guild_no}"
+
+
+def seed_users():
+    """인증 사용자(5%는 '플레이어 없음' 이름)와 미인증 사용자를 서버에 고르게 나눠 만듭니다."""
+    names = [f"missing{i:05d}" if i % 20 == 0 else f"Refresh{i:05d}" for i in range(USERS)]
+    unverified = [f"Pending{i:05d}" for i in range(USERS // 10)]
+    with app.app_context():
+        migrate_database()
+        bulk_register_users([(name, SERVERS[i % len(SERVERS)]) for i, name in enumerate(names)])
+        bulk_register_users([(name, SERVERS[0]) for name in unverified])
+        db.session.execute(update(User).where(User.username.in_(names)).values(
+            is_verified=True, guild_name='Old Guild', guild_id='old'))
+        db.session.execute(update(User).where(User.username.in_(unverified)).values(
+            guild_name='Old Guild', guild_id='old'))
+        db.session.commit()
+    return names, unverified
+
+
+def guilds():
+    with app.app_context():
+        return {user.username: (user.guild_name, user.guild_id) for user in User.query.all()}
+
+
+def check(label, ok):
+    print(f"  [{'OK' if ok else '실패'}] {label}")
+    return ok
+
+
+def register_latencies(count=300):
+    latencies = []
+    with app.app_context():
+        for i in range(count):
+            started = time.perf_counter()
+            handle_register({'username': f"Latency{i:05d}", 'server': SERVERS[i % len(SERVERS)]})
+            latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return latencies[len(latencies) // 2] * 1000, latencies[int(len(latencies) * 0.99)] * 1000
+
+
+def new_refresher():
+    return GuildRefresher(app, on_update=apply_guild_change, batch_size=BATCH_SIZE,
+                          concurrency=CONCURRENCY,
+                          rate_limits={server: (RATE, 5) for server in SERVERS},
+                          interval_seconds=0, pause_seconds=0)
+
+
+if __name__ == '__main__':
+    stub, base_url = start_stub_server(latency=STUB_LATENCY, guild_count=GUILD_COUNT)
+    for server in API_SERVERS:
+        API_SERVERS[server] = base_url
+    names, unverified = seed_users()
+    found = [name for name in names if not name.startswith('missing')]
+    print(f"인증 사용자 {len(names)}명 (플레이어 없음 {len(names) - len(found)}명), "
+          f"미인증 {len(unverified)}명, 서버 {len(SERVERS)}개 x 초당 {RATE:.0f}회, "
+          f"동시 {CONCURRENCY}개, 스텁 지연 {STUB_LATENCY * 1000:.0f} ms")
+    results = []
+
+    print("1) 한 바퀴 갱신")
+    refresher = new_refresher()
+    started = time.perf_counter()
+    refresher.run_pass()
+    elapsed = time.perf_counter() - started
+    current = guilds()
+    allowed = len(SERVERS) * (RATE * elapsed + 5)
+    print(f"  요청 {stub.request_count}회, {elapsed:.2f}초 "
+          f"({stub.request_count / elapsed:.0f}회/초)")
+    results.append(check("모든 인증 사용자를 한 번씩 조회", stub.request_count == len(names)))
+    results.append(check(f"동시 요청 수 {stub.max_active} <= {CONCURRENCY}",
+                         stub.max_active <= CONCURRENCY))
+    results.append(check(f"서버별 속도 제한 안 (요청 {stub.request_count} <= {allowed:.0f})",
+                         stub.request_count <= allowed))
+    results.append(check("플레이어가 있는 사용자는 스텁 길드로 갱신",
+                         all(current[name] == stub_guild(name) for name in found)))
+    results.append(check("'플레이어 없음'과 미인증 사용자는 그대로", all(
+        current[name] == ('Old Guild', 'old')
+        for name in names + unverified if name not in found)))
+    results.append(check("인증 사용자 캐시도 갱신", all(
+        (verified_users.peek(name) or {}).get('guild_name') == stub_guild(name)[0]
+        for name in found if name in verified_users)))
+
+    print("2) 변경 없는 두 번째 바퀴")
+    refresher.run_pass()
+    results.append(check("DB 변경 없음", guilds() == current))
+
+    print("3) 도중에 멈춘 뒤 이어서 진행")
+    stub.guild_seed = 7
+    refresher = new_refresher()
+    refresher.start()
+    while True:
+        with app.app_context():
+            cursor = (load_job_state('guild_refresh') or {}).get('cursor', 0)
+        if cursor >= USERS // 2:
+            break
+        time.sleep(0.01)
+    refresher.stop()
+    with app.app_context():
+        cursor = load_job_state('guild_refresh')['cursor']
+        remaining = User.query.filter(User.is_verified.is_(True), User.id > cursor).count()
+    before = stub.request_count
+    started = time.perf_counter()
+    new_refresher().run_pass()
+    resumed = stub.request_count - before
+    print(f"  멈춘 위치: id {cursor}, 남은 인증 사용자 {remaining}명, 재개 후 요청 {resumed}회 "
+          f"({time.perf_counter() - started:.2f}초)")
+    results.append(check("반영한 배치는 다시 조회하지 않음", resumed == remaining))
+    current = guilds()
+    results.append(check("모든 사용자가 새 길드로 갱신",
+                         all(current[name] == stub_guild(name, 7) for name in found)))
+
+    print("4) 갱신 중 /register 지연")
+    idle = register_latencies()
+    stub.guild_seed = 8
+    refresher = new_refresher()
+    refresher.start()
+    busy = register_latencies()
+    refresher.stop()
+    print(f"  갱신 없음  p50 {idle[0]:.2f} ms  p99 {idle[1]:.2f} ms")
+    print(f"  갱신 중    p50 {busy[0]:.2f} ms  p99 {busy[1]:.2f} ms")
+    stub.shutdown()
+    print("결과:", "모두 통과" if all(results) else "실패 있음")
+    sys.exit(0 if all(results) else 1)
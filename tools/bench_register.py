@@ -0,0 +1,122 @@
+# bench_register.py
+"""
+/register 쓰기 처리량 벤치마크 (v3.26.0)
+- 목적: 서버 통합이나 길드 단체 가입처럼 등록이 한꺼번에 몰릴 때의 쓰기 처리량과 지연 비교
+- 1) legacy: 기본 엔진 설정(롤백 저널, 풀 기본값)에서 요청마다 ORM 조회 + 커밋 (v3.25.0까지의 방식)
+- 2) tuned: WAL/PRAGMA/연결 풀 + handle_register(그룹 커밋으로 일괄 upsert)
+- 3) bulk: bulk_register_users를 REGISTER_BATCH_MAX개씩 직접 호출 (일괄 가져오기)
+- 시나리오마다 신규 등록(new) 후 같은 사용자들이 다른 서버로 다시 등록(move, 서버 통합)
+- 출력: 단계별 초당 등록 수와 요청 지연 p50/p99 (bulk는 묶음 단위 지연)
+- 실행: 리포지토리 루트에서 `python tools/bench_register.py [사용자 수] [동시 스레드 수]`
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+THREADS = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+
+DB_DIR = tempfile.mkdtemp(prefix="beacon_register_")
+os.environ['BEACON_DATABASE_URI'] = f"sqlite:///{os.path.join(DB_DIR, 'tuned.db')}"
+os.environ['BEACON_RATE_LIMIT_ENABLED'] = '0'
+
+from flask import Flask  # noqa: E402
+
+from src.config.settings import REGISTER_BATCH_MAX  # noqa: E402
+from src.server.database import User, bulk_register_users, db, migrate_database  # noqa: E402
+from src.server.run_server import app, handle_register, registration_committer  # noqa: E402
+
+
+def legacy_register(username, server):
+    """v3.25.0까지의 handle_register와 같은 요청별 조회 + 커밋입니다."""
+    user = User.query.filter_by(username=username).first()
+    if user:
+        user.server = server
+    else:
+        db.session.add(User(username=username, server=server))
+    db.session.commit()
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+def storm(flask_app, register, registrations, threads):
+    """registrations를 threads개 스레드가 나눠 등록하고 (초당 등록 수, 지연 목록)을 반환합니다."""
+    latencies = []
+    errors = []
+
+    def worker(chunk):
+        own = []
+        with flask_app.app_context():
+            for username, server in chunk:
+                started = time.perf_counter()
+                try:
+                    register(username, server)
+                except Exception as e:  # 잠금 대기 초과 등도 결과에 반영
+                    errors.append(e)
+                own.append(time.perf_counter() - started)
+        latencies.extend(own)
+
+    workers = [threading.Thread(target=worker, args=(registrations[i::threads],))
+               for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if errors:
+        print(f"    오류 {len(errors)}건 (첫 번째: {errors[0]})")
+    return len(registrations) / elapsed, latencies
+
+
+def bulk_import(registrations):
+    latencies = []
+    started = time.perf_counter()
+    with app.app_context():
+        for start in range(0, len(registrations), REGISTER_BATCH_MAX):
+            batch_started = time.perf_counter()
+            bulk_register_users(registrations[start:start + REGISTER_BATCH_MAX])
+            latencies.append(time.perf_counter() - batch_started)
+    return len(registrations) / (time.perf_counter() - started), latencies
+
+
+def report(name, phase, rate, latencies):
+    print(f"  {name:<7} {phase:<5} {rate:>9.0f} regs/s  "
+          f"p50 {percentile(latencies, 0.50) * 1000:>7.2f} ms  "
+          f"p99 {percentile(latencies, 0.99) * 1000:>7.2f} ms")
+
+
+if __name__ == '__main__':
+    names = [f"Storm{i:06d}" for i in range(USERS)]
+    joined = [(name, 'West (Americas)') for name in names]
+    moved = [(name, 'East (Asia)') for name in names]
+    print(f"사용자 {USERS}명, 동시 스레드 {THREADS}개 (DB: {DB_DIR})")
+
+    legacy_app = Flask(__name__)
+    legacy_app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{os.path.join(DB_DIR, 'legacy.db')}"
+    legacy_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    db.init_app(legacy_app)
+    with legacy_app.app_context():
+        db.create_all()
+    for phase, registrations in (('new', joined), ('move', moved)):
+        report('legacy', phase, *storm(legacy_app, legacy_register, registrations, THREADS))
+
+    with app.app_context():
+        migrate_database()
+    for phase, registrations in (('new', joined), ('move', moved)):
+        batches = registration_committer.batches
+        rate, latencies = storm(app, lambda username, server: handle_register(
+            {'username': username, 'server': server}), registrations, THREADS)
+        report('tuned', phase, rate, latencies)
+        print(f"{'':>16}커밋 {registration_committer.batches - batches}회")
+
+    bulk_names = [f"Import{i:06d}" for i in range(USERS)]
+    report('bulk', 'new', *bulk_import([(name, 'West (Americas)') for name in bulk_names]))
+    report('bulk', 'move', *bulk_import([(name, 'East (Asia)') for name in bulk_names]))
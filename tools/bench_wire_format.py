@@ -0,0 +1,81 @@
+# bench_wire_format.py
+"""
+/get-locations 응답 형식 벤치마크
+- 목적: 기존 JSON 행 목록과 열 기반 JSON / MessagePack(설치된 경우), gzip/zstd 압축의
+  서버 인코딩 CPU 시간, 클라이언트 디코딩 CPU 시간, 전송 바이트 수를 비교
+- 절차: 임시 DB로 서버 모듈을 불러와 합성 사용자 N명을 한 샤드에 넣고,
+  요청자 기준 전체 목록을 형식별로 반복 인코딩/디코딩
+- 실행: 리포지토리 루트에서 `python tools/bench_wire_format.py [사용자 수] [반복 횟수]`
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('BEACON_DATABASE_URI',
+                      f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+
+from src.core import wire_format  # noqa: E402
+from src.core.map_logic import ZONE_NAMES  # noqa: E402
+from src.server import run_server  # noqa: E402
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+REPEAT = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+SERVER = 'Europe'
+
+
+def populate(store):
+    rng = random.Random(1)
+    guilds = [f"Guild {i}" for i in range(200)]
+    for i in range(USERS):
+        username = f"benchuser{i:05d}"
+        run_server.verified_users.refresh(SimpleNamespace(
+            username=username, is_verified=True, server=SERVER,
+            guild_name=rng.choice(guilds), guild_id=None))
+        store.update(username, rng.choice(ZONE_NAMES), rng.randint(1, 20))
+    return "benchuser00000"
+
+
+def measure(func):
+    started = time.perf_counter()
+    for _ in range(REPEAT):
+        result = func()
+    return (time.perf_counter() - started) / REPEAT * 1000, result
+
+
+def main():
+    store = run_server.location_store.shard(SERVER)
+    requester = populate(store)
+    cases = [(media_type, encoding)
+             for media_type in wire_format.available_formats()
+             for encoding in [None, *wire_format.available_encodings()]]
+    print(f"사용자 {USERS}명, 반복 {REPEAT}회 (msgpack: {wire_format.msgpack is not None}, "
+          f"zstd: {wire_format.zstandard is not None})")
+    print(f"{'형식':<40} {'압축':>6} {'바이트':>10} {'인코딩 ms':>10} {'디코딩 ms':>10}")
+    baseline = None
+    for media_type, encoding in cases:
+        def encode():
+            body = run_server.location_encoder(media_type)(
+                run_server.collect_location_entries(store, requester))
+            return run_server.encode_location_response(body, media_type, encoding)
+
+        def decode():
+            data = wire_format.deserialize(wire_format.decompress(payload, applied),
+                                           media_type)
+            return wire_format.decode_location_columns(data) if isinstance(data, dict) else data
+
+        encode_ms, (payload, headers) = measure(encode)
+        applied = dict(headers).get('Content-Encoding')
+        decode_ms, rows = measure(decode)
+        assert len(rows) == USERS
+        if baseline is None:
+            baseline = len(payload)
+        print(f"{media_type:<40} {encoding or '-':>6} {len(payload):>10} "
+              f"{encode_ms:>10.2f} {decode_ms:>10.2f}   ({len(payload) / baseline:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+# build_map_data.py
+"""
+맵 데이터 빌드 단계 (v3.27.1)
+- 목적: map_data.json을 컴파일해 map_data.bin(zone_registry 파일 형식)을 갱신
+- 서버/클라이언트는 불러올 때 파일을 쓰지 않으므로, map_data.json을 고친 뒤 이 스크립트로 갱신
+- 실행: 리포지토리 루트에서 `python tools/build_map_data.py [json 경로] [bin 경로]`
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.core.zone_registry import (  # noqa: E402
+    MAP_DATA_BIN_PATH, MAP_DATA_JSON_PATH, ZoneRegistry, compile_map_file,
+)
+
+
+def main(argv):
+    json_path = argv[1] if len(argv) > 1 else MAP_DATA_JSON_PATH
+    bin_path = argv[2] if len(argv) > 2 else MAP_DATA_BIN_PATH
+    compiled = compile_map_file(json_path, bin_path)
+    registry = ZoneRegistry(compiled)
+    print(f"{bin_path}: {len(compiled)} bytes, 지역 {registry.count}개, "
+          f"인접 항목 {len(registry.adjacency)}개, 홉 테이블 {registry.hops.itemsize}바이트/항목")
+
+
+if __name__ == '__main__':
+    main(sys.argv)
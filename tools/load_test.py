@@ -0,0 +1,359 @@
+# load_test.py
+"""
+Albion Beacon 서버 부하 테스트
+- 목적: 합성 사용자 수천 명으로 서버를 구동하여 엔드포인트별 처리량과 p50/p95/p99 지연을 측정
+- 절차:
+  1) 로컬 게임 정보 API 스텁 서버 실행 (tools/stub_gameinfo.py)
+  2) 서버 준비: --target이 없으면 임시 DB로 Flask 서버를 같은 프로세스에서 실행
+  3) 합성 사용자 등록(/register) 및 인증(/verify), map_data.json의 지역에 고르게 분산
+  4) /update-location, /get-locations를 지정한 초당 요청 수로 --duration초 동안 호출
+  5) 엔드포인트별 요청 수, 오류 수, 처리량, 지연 백분위를 출력 (--json이면 JSON 한 줄도 출력)
+- 실행 예 (리포지토리 루트, Linux 헤드리스):
+    python tools/load_test.py --users 2000 --duration 30 --update-rate 200 --poll-rate 100
+- 서버 모드 비교: --mode flask(기본) | async(src/server/async_server.py) | both
+  --mode both는 두 모드를 각각 별도 프로세스로 실행한 뒤 결과를 나란히 출력
+  --idle-connections N이면 측정 동안 keep-alive 연결 N개를 열어 두고, 끝까지 유지된 연결 수를 출력
+- 일괄 갱신: --batch-size N(>1)이면 /update-locations로 N개씩 묶어 보냄
+  (--update-rate는 요청 수 기준)
+- 요청 제한(v3.25.0): 같은 프로세스에서 실행하는 서버는 기본으로 요청 제한을 끔
+  (BEACON_RATE_LIMIT_ENABLED=1이면 켠 채로 측정하며, 429는 오류로 집계)
+- 외부 서버 측정: 서버를 BEACON_GAMEINFO_URL=http://127.0.0.1:<스텁 포트>/api/gameinfo로 실행한 뒤
+    python tools/load_test.py --target http://127.0.0.1:5000 --stub-port <스텁 포트>
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from stub_gameinfo import start_stub_server  # noqa: E402
+
+SERVERS = ['East (Asia)', 'West (Americas)', 'Europe']
+
+
+class LatencyRecorder:
+    """엔드포인트별 지연(초)과 오류 수를 모읍니다."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.elapsed = {}
+
+    def record(self, endpoint, seconds, ok):
+        with self._lock:
+            self.latencies[endpoint].append(seconds)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def summary(self):
+        result = {}
+        for endpoint, values in self.latencies.items():
+            values = sorted(values)
+            elapsed = self.elapsed.get(endpoint) or sum(values) or 1
+
+            def percentile(p):
+                return values[max(0, math.ceil(p / 100 * len(values)) - 1)] * 1000
+
+            result[endpoint] = {
+                'requests': len(values),
+                'errors': self.errors[endpoint],
+                'throughput_rps': round(len(values) / elapsed, 1),
+                'p50_ms': round(percentile(50), 2),
+                'p95_ms': round(percentile(95), 2),
+                'p99_ms': round(percentile(99), 2),
+                'max_ms': round(values[-1] * 1000, 2),
+            }
+        return result
+
+
+class LoadClient:
+    def __init__(self, base_url, recorder):
+        self.base_url = base_url
+        self.recorder = recorder
+        self._local = threading.local()
+
+    def session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        return session
+
+    def post(self, endpoint, payload):
+        started = time.perf_counter()
+        ok = False
+        try:
+            response = self.session().post(f"{self.base_url}{endpoint}", json=payload, timeout=30)
+            ok = response.status_code < 400
+        except requests.exceptions.RequestException:
+            pass
+        self.recorder.record(endpoint, time.perf_counter() - started, ok)
+        return ok
+
+
+def start_local_server(stub_url, mode='flask'):
+    """
+    임시 DB와 스텁 게임 정보 API로 서버를 같은 프로세스에서 실행하고 주소를 반환합니다.
+    mode: 'flask'(werkzeug 스레드 서버) 또는 'async'(asyncio 서버)
+    """
+    db_dir = tempfile.mkdtemp(prefix="beacon_load_")
+    os.environ['BEACON_DATABASE_URI'] = f"sqlite:///{os.path.join(db_dir, 'load.db')}"
+    os.environ['BEACON_GAMEINFO_URL'] = stub_url
+    # 처리량 자체를 재므로 요청 제한은 기본으로 끔 (BEACON_RATE_LIMIT_ENABLED=1이면 켠 채로 측정)
+    os.environ.setdefault('BEACON_RATE_LIMIT_ENABLED', '0')
+    import logging
+    from werkzeug.serving import make_server
+    from src.server.database import migrate_database
+    from src.server.run_server import app
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    with app.app_context():
+        migrate_database()
+    if mode == 'async':
+        from src.server.async_server import AsyncHTTPServer, api
+
+        loop = asyncio.new_event_loop()
+        threading.Thread(target=loop.run_forever, daemon=True).start()
+        server = AsyncHTTPServer(api, '127.0.0.1', 0)
+        port = asyncio.run_coroutine_threadsafe(server.start(), loop).result()
+        return f"http://127.0.0.1:{port}"
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def _raw_request(sock, host):
+    """keep-alive 연결에서 가벼운 요청 하나를 보내고 응답이 완전히 도착했는지 반환합니다."""
+    body = b'{"username": ""}'
+    sock.sendall(b"POST /get-locations HTTP/1.1\r\nHost: " + host.encode() +
+                 b"\r\nContent-Type: application/json\r\nContent-Length: " +
+                 str(len(body)).encode() + b"\r\n\r\n" + body)
+    data = b''
+    while b'\r\n\r\n' not in data:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return False
+        data += chunk
+    head, _, rest = data.partition(b'\r\n\r\n')
+    length = 0
+    for line in head.split(b'\r\n')[1:]:
+        name, _, value = line.partition(b':')
+        if name.strip().lower() == b'content-length':
+            length = int(value)
+    while len(rest) < length:
+        chunk = sock.recv(65536)
+        if not chunk:
+            return False
+        rest += chunk
+    return b'connection: close' not in head.lower()
+
+
+def open_idle_connections(base_url, count):
+    """요청 하나씩을 보낸 뒤 열어 둔 keep-alive 연결 목록을 반환합니다."""
+    host, _, port = base_url.split('://', 1)[1].partition(':')
+    sockets = []
+    for _ in range(count):
+        try:
+            sock = socket.create_connection((host, int(port or 80)), timeout=10)
+            if _raw_request(sock, host):
+                sockets.append(sock)
+            else:
+                sock.close()
+        except OSError:
+            break
+    return sockets
+
+
+def count_alive_connections(sockets, base_url):
+    """열어 둔 연결에 요청을 한 번 더 보내 응답하는 연결 수를 셉니다."""
+    host = base_url.split('://', 1)[1].partition(':')[0]
+    alive = 0
+    for sock in sockets:
+        try:
+            alive += _raw_request(sock, host)
+        except OSError:
+            pass
+        sock.close()
+    return alive
+
+
+def setup_users(client, usernames, zones, workers):
+    """합성 사용자를 등록/인증하고 첫 위치를 보냅니다. (/register, /verify는 단계별 처리량 기록)"""
+    rng = random.Random(7)
+    phases = [
+        ('/register', lambda name: {'username': name, 'server': rng.choice(SERVERS)}),
+        ('/verify', lambda name: {'username': name}),
+        ('/update-location', lambda name: {'username': name, 'zone': rng.choice(zones),
+                                           'group_size': rng.randint(1, 20)}),
+    ]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for endpoint, make_payload in phases:
+            started = time.perf_counter()
+            list(pool.map(lambda name: client.post(endpoint, make_payload(name)), usernames))
+            client.recorder.elapsed.setdefault(endpoint, time.perf_counter() - started)
+    # 위치 첫 전송은 측정 대상이 아니므로 기록에서 제외
+    client.recorder.latencies.pop('/update-location', None)
+    client.recorder.errors.pop('/update-location', None)
+    client.recorder.elapsed.pop('/update-location', None)
+
+
+def drive(client, endpoint, rate, duration, workers, make_payload):
+    """rate(초당 요청 수)에 맞춰 duration초 동안 요청을 보냅니다. (워커마다 일정 간격으로 예약)"""
+    if rate <= 0:
+        return
+    interval = workers / rate
+    deadline = time.perf_counter() + duration
+
+    def worker(offset):
+        rng = random.Random(offset)
+        next_at = time.perf_counter() + offset * interval / workers
+        while next_at < deadline:
+            delay = next_at - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            client.post(endpoint, make_payload(rng))
+            next_at += interval
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    client.recorder.elapsed[endpoint] = time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Albion Beacon 서버 부하 테스트")
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--update-rate', type=float, default=200,
+                        help="/update-location 초당 요청 수")
+    parser.add_argument('--poll-rate', type=float, default=100, help="/get-locations 초당 요청 수")
+    parser.add_argument('--max-distance', type=int, default=None, help="/get-locations 반경")
+    parser.add_argument('--workers', type=int, default=16, help="엔드포인트별 동시 요청 스레드 수")
+    parser.add_argument('--stub-latency', type=float, default=0.0, help="스텁 API 응답 지연(초)")
+    parser.add_argument('--stub-port', type=int, default=0)
+    parser.add_argument('--target', default=None,
+                        help="이미 실행 중인 서버 주소 (없으면 내장 서버)")
+    parser.add_argument('--mode', choices=['flask', 'async', 'both'], default='flask',
+                        help="내장 서버 종류 (both: 두 모드를 각각 측정하여 비교)")
+    parser.add_argument('--idle-connections', type=int, default=0,
+                        help="측정 동안 열어 둘 keep-alive 연결 수")
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help="1보다 크면 /update-locations로 N개씩 묶어 전송")
+    parser.add_argument('--json', action='store_true', help="결과를 JSON 한 줄로도 출력")
+    args = parser.parse_args()
+
+    if args.mode == 'both':
+        compare_modes(sys.argv[1:])
+        return
+
+    stub, stub_url = start_stub_server(args.stub_port, args.stub_latency)
+    base_url = args.target or start_local_server(stub_url, args.mode)
+    from src.core.map_logic import ZONE_NAMES
+
+    recorder = LatencyRecorder()
+    client = LoadClient(base_url, recorder)
+    usernames = [f"loaduser{i:05d}" for i in range(args.users)]
+    print(f"대상: {base_url}, 스텁 API: {stub_url}, 사용자: {args.users}명")
+
+    started = time.perf_counter()
+    setup_users(client, usernames, ZONE_NAMES, args.workers)
+    print(f"사용자 준비 완료: {time.perf_counter() - started:.1f}s "
+          f"(스텁 API 호출 {stub.request_count}회)")
+    idle = open_idle_connections(base_url, args.idle_connections)
+    if args.idle_connections:
+        print(f"keep-alive 연결 {len(idle)}/{args.idle_connections}개 열림")
+
+    def update_payload(rng):
+        return {'username': rng.choice(usernames), 'zone': rng.choice(ZONE_NAMES),
+                'group_size': rng.randint(1, 20)}
+
+    def batch_payload(rng):
+        now = time.time()
+        return {'updates': [dict(update_payload(rng), ts=now) for _ in range(args.batch_size)]}
+
+    def poll_payload(rng):
+        payload = {'username': rng.choice(usernames)}
+        if args.max_distance is not None:
+            payload['max_distance'] = args.max_distance
+        return payload
+
+    if args.batch_size > 1:
+        update_endpoint, make_update = '/update-locations', batch_payload
+    else:
+        update_endpoint, make_update = '/update-location', update_payload
+    drivers = [
+        threading.Thread(target=drive, args=(client, update_endpoint, args.update_rate,
+                                             args.duration, args.workers, make_update)),
+        threading.Thread(target=drive, args=(client, '/get-locations', args.poll_rate,
+                                             args.duration, args.workers, poll_payload)),
+    ]
+    for thread in drivers:
+        thread.start()
+    for thread in drivers:
+        thread.join()
+
+    alive = count_alive_connections(idle, base_url)
+    summary = recorder.summary()
+    print_summary(summary)
+    if args.idle_connections:
+        print(f"측정 후 응답한 keep-alive 연결: {alive}/{args.idle_connections}")
+    if args.json:
+        print(json.dumps({'mode': args.mode, 'users': args.users, 'duration': args.duration,
+                          'idle_connections_alive': alive, 'endpoints': summary}))
+
+
+def print_summary(summary):
+    print(f"{'엔드포인트':<18} {'요청':>8} {'오류':>6} {'req/s':>9} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for endpoint, stats in summary.items():
+        print(f"{endpoint:<18} {stats['requests']:>8} {stats['errors']:>6} "
+              f"{stats['throughput_rps']:>9} {stats['p50_ms']:>9} {stats['p95_ms']:>9} "
+              f"{stats['p99_ms']:>9} {stats['max_ms']:>9}")
+
+
+def compare_modes(argv):
+    """flask/async 모드를 각각 별도 프로세스로 측정하고 엔드포인트별로 나란히 비교합니다."""
+    base_args = [arg for arg in argv if arg not in ('--mode', 'both', '--json')]
+    results = {}
+    for mode in ('flask', 'async'):
+        print(f"=== {mode} 모드 측정 중 ===")
+        output = subprocess.run([sys.executable, os.path.abspath(__file__), *base_args,
+                                 '--mode', mode, '--json'],
+                                capture_output=True, text=True, check=True).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+        print_summary(results[mode]['endpoints'])
+
+    print("=== 비교 (flask → async) ===")
+    print(f"{'엔드포인트':<18} {'req/s':>19} {'p50 ms':>19} {'p99 ms':>19}")
+    for endpoint, flask_stats in results['flask']['endpoints'].items():
+        async_stats = results['async']['endpoints'].get(endpoint)
+        if not async_stats:
+            continue
+        cells = [f"{flask_stats[key]:>8} → {async_stats[key]:<8}"
+                 for key in ('throughput_rps', 'p50_ms', 'p99_ms')]
+        print(f"{endpoint:<18} " + ' '.join(cells))
+    if results['flask']['idle_connections_alive'] or results['async']['idle_connections_alive']:
+        print(f"keep-alive 연결 유지: {results['flask']['idle_connections_alive']} → "
+              f"{results['async']['idle_connections_alive']}")
+
+
+if __name__ == '__main__':
+    main()
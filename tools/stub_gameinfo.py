@@ -0,0 +1,89 @@
+# stub_gameinfo.py
+"""
+알비온 게임 정보 API 스텁 서버
+- 목적: 실제 gameinfo API 대신 로컬에서 /api/gameinfo/search 응답을 흉내 내어 테스트/벤치마크에 사용
+- 응답: 요청한 이름 그대로의 플레이어 1명과, 이름에서 결정되는 가상 길드 정보
+- 옵션: 응답 지연(latency), 'missing'으로 시작하는 이름은 '플레이어 없음' 응답
+- 길드 이동 흉내: 실행 중 server.guild_seed를 바꾸면 플레이어들의 가상 길드가 바뀜 (기본 0)
+- 통계: request_count(요청 수), max_active(동시에 처리 중이던 최대 요청 수)
+- 사용 예 (같은 프로세스에서 API_SERVERS를 스텁으로 교체):
+    server, base_url = start_stub_server(latency=0.05)
+    for name in API_SERVERS: API_SERVERS[name] = base_url
+- 실행: `python tools/stub_gameinfo.py [포트] [지연(초)]`
+"""
+import json
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class StubGameInfoHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        if parsed.path != '/api/gameinfo/search':
+            self.send_error(404)
+            return
+        name = parse_qs(parsed.query).get('q', [''])[0]
+        with self.server.stats_lock:
+            self.server.request_count += 1
+            self.server.active += 1
+            self.server.max_active = max(self.server.max_active, self.server.active)
+        try:
+            if self.server.latency:
+                time.sleep(self.server.latency)
+        finally:
+            with self.server.stats_lock:
+                self.server.active -= 1
+
+        players = []
+        if name and not name.lower().startswith('missing'):
+            key = name.lower()
+            if self.server.guild_seed:
+                key = f"{self.server.guild_seed}:{key}"
+            guild_no = zlib.crc32(key.encode()) % self.server.guild_count
+            players.append({
+                'Name': name,
+                'Id': f"player-{name.lower()}",
+                'GuildName': f"Stub Guild {guild_no}",
+                'GuildId': f"guild-{guild_no}",
+            })
+        body = json.dumps({'guilds': [], 'players': players}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_stub_server(port=0, latency=0.0, guild_count=50):
+    """스텁 서버를 백그라운드 스레드로 시작하고 (서버 객체, API 기본 주소)를 반환합니다."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubGameInfoHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    server.guild_count = guild_count
+    server.guild_seed = 0
+    server.request_count = 0
+    server.active = 0
+    server.max_active = 0
+    server.stats_lock = threading.Lock()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/api/gameinfo"
+    return server, base_url
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8081
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.0
+    stub, url = start_stub_server(port, latency)
+    print(f"스텁 게임 정보 API 실행 중: {url} (지연 {latency}s, Ctrl+C로 종료)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        stub.shutdown()